@@ -4,8 +4,8 @@ from django.contrib.auth.models import User
 from django.urls import path, reverse
 from django.shortcuts import render, redirect
 from django.contrib import messages
-import csv
-import io
+
+from .importer import import_upload
 
 
 class UserAdmin(BaseUserAdmin):
@@ -43,80 +43,33 @@ class UserAdmin(BaseUserAdmin):
                 })
             
             try:
-                # Leer el archivo CSV
-                decoded_file = csv_file.read().decode('utf-8')
-                io_string = io.StringIO(decoded_file)
-                reader = csv.DictReader(io_string)
-                
-                created_count = 0
-                updated_count = 0
-                errors = []
-                
-                for row_num, row in enumerate(reader, start=2):  # Empezar en 2 porque la fila 1 es el header
-                    try:
-                        username = row.get('username', '').strip()
-                        email = row.get('email', '').strip()
-                        password = row.get('password', '').strip()
-                        first_name = row.get('first_name', '').strip()
-                        last_name = row.get('last_name', '').strip()
-                        is_staff = row.get('is_staff', 'False').strip().lower() == 'true'
-                        is_superuser = row.get('is_superuser', 'False').strip().lower() == 'true'
-                        
-                        # Validaciones básicas
-                        if not username:
-                            errors.append(f'Fila {row_num}: Username es requerido')
-                            continue
-                        
-                        if not email:
-                            errors.append(f'Fila {row_num}: Email es requerido')
-                            continue
-                        
-                        if not password:
-                            errors.append(f'Fila {row_num}: Password es requerido')
-                            continue
-                        
-                        # Verificar si el usuario ya existe
-                        user, created = User.objects.get_or_create(
-                            username=username,
-                            defaults={
-                                'email': email,
-                                'first_name': first_name,
-                                'last_name': last_name,
-                                'is_staff': is_staff,
-                                'is_superuser': is_superuser,
-                            }
-                        )
-                        
-                        if created:
-                            user.set_password(password)
-                            user.save()
-                            created_count += 1
-                        else:
-                            # Actualizar usuario existente
-                            user.email = email
-                            user.first_name = first_name
-                            user.last_name = last_name
-                            user.is_staff = is_staff
-                            user.is_superuser = is_superuser
-                            if password:  # Solo actualizar password si se proporciona
-                                user.set_password(password)
-                            user.save()
-                            updated_count += 1
-                            
-                    except Exception as e:
-                        errors.append(f'Fila {row_num}: Error - {str(e)}')
-                        continue
+                # Leer el archivo CSV por bloques, sin cargarlo completo en memoria
+                stats = import_upload(csv_file)
                 
                 # Mostrar mensajes de resultado
-                if created_count > 0:
-                    messages.success(request, f'Se crearon {created_count} usuario(s) exitosamente.')
-                if updated_count > 0:
-                    messages.info(request, f'Se actualizaron {updated_count} usuario(s) existente(s).')
-                if errors:
-                    for error in errors[:10]:  # Mostrar solo los primeros 10 errores
+                if stats.created > 0:
+                    messages.success(request, f'Se crearon {stats.created} usuario(s) exitosamente.')
+                if stats.updated > 0:
+                    messages.info(request, f'Se actualizaron {stats.updated} usuario(s) existente(s).')
+                if stats.processed > 0:
+                    messages.info(
+                        request,
+                        f'{stats.processed} fila(s) en {stats.elapsed:.2f} s ({stats.rows_per_second:.0f} filas/s; '
+                        f'hash de contraseñas: {stats.hash_seconds:.2f} s).'
+                    )
+                if stats.progress:
+                    messages.info(
+                        request,
+                        f'Avance en {stats.chunks} bloque(s): ' + ' · '.join(
+                            f'{entry.percentage:.0f}% ({entry.rows} filas, {entry.rows_per_second:.0f} filas/s)'
+                            for entry in stats.progress_milestones()
+                        )
+                    )
+                if stats.error_count:
+                    for error in stats.errors[:10]:  # Mostrar solo los primeros 10 errores
                         messages.warning(request, error)
-                    if len(errors) > 10:
-                        messages.warning(request, f'... y {len(errors) - 10} error(es) más.')
+                    if stats.error_count > 10:
+                        messages.warning(request, f'... y {stats.error_count - 10} error(es) más.')
                 
                 return redirect('admin:auth_user_changelist')
                 
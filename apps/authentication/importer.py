@@ -0,0 +1,335 @@
+"""
+Importación masiva de usuarios desde CSV.
+
+Procesa las filas por bloques: una sola consulta por bloque para saber qué
+usuarios ya existen, hash de contraseñas repartido en un pool de procesos (o
+con un hasher más rápido configurable para contraseñas iniciales) y escritura
+con ``bulk_create`` / ``bulk_update``. Si la escritura de un bloque falla, el
+bloque se repite fila por fila para guardar las válidas y reportar cada fila
+con error.
+
+El archivo subido se lee en streaming: ``LineReader`` decodifica el archivo en
+bloques de ``READ_CHUNK_SIZE`` bytes con un decodificador UTF-8 incremental y
+entrega líneas a ``csv.DictReader``, así que el texto decodificado en memoria
+no depende del tamaño del CSV.
+"""
+import codecs
+import csv
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice, repeat
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import DatabaseError, transaction
+
+logger = logging.getLogger(__name__)
+
+# Filas por bloque (consulta de existentes, hash y escritura)
+BATCH_SIZE = getattr(settings, 'USER_IMPORT_BATCH_SIZE', 1000)
+
+# Bytes que se leen del archivo subido en cada bloque
+READ_CHUNK_SIZE = getattr(settings, 'USER_IMPORT_READ_CHUNK_SIZE', 64 * 1024)
+
+# Errores que se conservan con su mensaje (el resto solo se cuenta)
+MAX_ERRORS = 100
+
+# Procesos para calcular los hash de contraseñas (1 = en el proceso actual)
+PASSWORD_WORKERS = getattr(settings, 'USER_IMPORT_PASSWORD_WORKERS', os.cpu_count() or 1)
+
+# Hasher para las contraseñas importadas (None = el primero de PASSWORD_HASHERS).
+# Debe estar en PASSWORD_HASHERS; Django lo reemplaza por el preferido en el
+# primer inicio de sesión de cada usuario.
+PASSWORD_HASHER = getattr(settings, 'USER_IMPORT_PASSWORD_HASHER', None)
+
+# Contraseñas por tarea del pool; por debajo de dos tareas se calculan en el proceso actual
+PASSWORDS_PER_TASK = 16
+
+UPDATE_FIELDS = ['email', 'first_name', 'last_name', 'is_staff', 'is_superuser', 'password']
+
+# Longitud máxima de los campos de texto de User (MySQL rechaza valores más largos)
+MAX_LENGTHS = {
+    name: User._meta.get_field(name).max_length
+    for name in ('username', 'email', 'first_name', 'last_name')
+}
+
+
+@dataclass
+class ImportProgress:
+    """Avance tras un bloque: filas leídas, porcentaje del archivo y filas/s"""
+    rows: int
+    percentage: float
+    rows_per_second: float
+
+
+@dataclass
+class ImportStats:
+    """Resumen de una importación de usuarios"""
+    created: int = 0
+    updated: int = 0
+    errors: list = field(default_factory=list)
+    error_count: int = 0
+    chunks: int = 0
+    progress: list = field(default_factory=list)  # ImportProgress por bloque (import_upload)
+    hash_seconds: float = 0.0
+    started_at: float = field(default_factory=time.perf_counter)
+
+    def add_error(self, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(message)
+
+    @property
+    def processed(self):
+        return self.created + self.updated
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started_at
+
+    @property
+    def rows_per_second(self):
+        elapsed = self.elapsed
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+    def progress_milestones(self, limit=10):
+        """Hasta ``limit`` entradas de ``progress`` repartidas a lo largo de la importación (incluye la última)"""
+        if len(self.progress) <= limit:
+            return list(self.progress)
+        step = len(self.progress) / limit
+        return [self.progress[round((index + 1) * step) - 1] for index in range(limit)]
+
+
+def parse_row(row):
+    """
+    Normaliza una fila del CSV. Devuelve ``(valores, None)`` o
+    ``(None, mensaje de error)``.
+    """
+    values = {
+        'username': (row.get('username') or '').strip(),
+        'email': (row.get('email') or '').strip(),
+        'password': (row.get('password') or '').strip(),
+        'first_name': (row.get('first_name') or '').strip(),
+        'last_name': (row.get('last_name') or '').strip(),
+        'is_staff': (row.get('is_staff') or 'False').strip().lower() == 'true',
+        'is_superuser': (row.get('is_superuser') or 'False').strip().lower() == 'true',
+    }
+    if not values['username']:
+        return None, 'Username es requerido'
+    if not values['email']:
+        return None, 'Email es requerido'
+    if not values['password']:
+        return None, 'Password es requerido'
+    for name, max_length in MAX_LENGTHS.items():
+        if len(values[name]) > max_length:
+            return None, f'El campo {name} supera los {max_length} caracteres'
+    return values, None
+
+
+class LineReader:
+    """
+    Líneas de texto de un archivo subido, leído por bloques de ``chunk_size``
+    bytes con un decodificador incremental (acepta UTF-8 con o sin BOM).
+    Las líneas conservan su fin de línea, como espera ``csv.reader``.
+
+    ``bytes_read`` indica cuántos bytes del archivo se han decodificado hasta
+    la última línea entregada; sirve para calcular el avance.
+    """
+
+    def __init__(self, uploaded, chunk_size=None):
+        self.uploaded = uploaded
+        self.chunk_size = chunk_size or READ_CHUNK_SIZE
+        self.bytes_read = 0
+
+    def __iter__(self):
+        decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        pending = ''
+        for chunk in self.uploaded.chunks(self.chunk_size):
+            # InMemoryUploadedFile.chunks() ignora chunk_size y entrega el archivo completo
+            for start in range(0, len(chunk), self.chunk_size):
+                block = chunk[start:start + self.chunk_size]
+                self.bytes_read += len(block)
+                *lines, pending = (pending + decoder.decode(block)).split('\n')
+                for line in lines:
+                    yield line + '\n'
+        pending += decoder.decode(b'', final=True)
+        if pending:
+            yield pending
+
+
+def iter_lines(uploaded, chunk_size=None):
+    """Líneas de un archivo subido (ver ``LineReader``)"""
+    return iter(LineReader(uploaded, chunk_size))
+
+
+def _init_worker():
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+class LazyProcessPool:
+    """
+    ``ProcessPoolExecutor`` que se crea la primera vez que se usa, de modo que
+    un archivo pequeño (bloques con menos de ``2 * PASSWORDS_PER_TASK``
+    contraseñas) no levanta procesos.
+    """
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self._executor = None
+
+    def map(self, fn, *iterables):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker)
+        return self._executor.map(fn, *iterables)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+
+
+def _hash_many(passwords, hasher):
+    return [make_password(password, hasher=hasher or 'default') for password in passwords]
+
+
+def hash_passwords(passwords, executor=None, hasher=None):
+    """Hash de una lista de contraseñas, repartido entre los procesos de ``executor``"""
+    if executor is None or len(passwords) < 2 * PASSWORDS_PER_TASK:
+        return _hash_many(passwords, hasher)
+    slices = [
+        passwords[start:start + PASSWORDS_PER_TASK]
+        for start in range(0, len(passwords), PASSWORDS_PER_TASK)
+    ]
+    return [hashed for part in executor.map(_hash_many, slices, repeat(hasher)) for hashed in part]
+
+
+def import_chunk(rows, stats, executor=None, hasher=None):
+    """Importa un bloque de ``(número de fila, fila)``"""
+    # Si un username aparece varias veces en el bloque gana la última fila
+    by_username = {}
+    for row_num, row in rows:
+        values, error = parse_row(row)
+        if error:
+            stats.add_error(f'Fila {row_num}: {error}')
+            continue
+        by_username[values['username']] = (row_num, values)
+
+    if not by_username:
+        return
+
+    existing = dict(User.objects.filter(username__in=by_username).values_list('username', 'pk'))
+
+    hash_start = time.perf_counter()
+    hashed = hash_passwords([values['password'] for _, values in by_username.values()], executor, hasher)
+    stats.hash_seconds += time.perf_counter() - hash_start
+
+    to_create = []
+    to_update = []
+    numbered_users = []
+    for (username, (row_num, values)), password in zip(by_username.items(), hashed):
+        user = User(pk=existing.get(username), **{**values, 'password': password})
+        numbered_users.append((row_num, user, user.pk is None))
+        if user.pk is None:
+            to_create.append(user)
+        else:
+            to_update.append(user)
+
+    try:
+        with transaction.atomic():
+            User.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+            User.objects.bulk_update(to_update, UPDATE_FIELDS, batch_size=BATCH_SIZE)
+    except DatabaseError:
+        logger.warning(
+            "Falló la escritura de un bloque de %s usuarios; se reintenta fila por fila",
+            len(numbered_users),
+        )
+        save_rows(numbered_users, stats)
+        return
+
+    stats.created += len(to_create)
+    stats.updated += len(to_update)
+
+
+def save_rows(numbered_users, stats):
+    """
+    Guarda ``(número de fila, usuario, es_nuevo)`` uno por uno, cada uno en
+    su propia transacción, y reporta como ``Fila N`` los que fallan.
+    """
+    for row_num, user, is_new in numbered_users:
+        try:
+            with transaction.atomic():
+                if is_new:
+                    # bulk_create pudo asignar pk a parte del bloque antes de revertirse
+                    user.pk = None
+                    user.save(force_insert=True)
+                else:
+                    user.save(update_fields=UPDATE_FIELDS)
+        except DatabaseError as e:
+            stats.add_error(f'Fila {row_num}: {str(e)}')
+            continue
+        if is_new:
+            stats.created += 1
+        else:
+            stats.updated += 1
+
+
+def import_users(rows, batch_size=None, workers=None, hasher=None, progress=None):
+    """
+    Importa usuarios desde un iterable de filas (``dict`` de ``csv.DictReader``).
+
+    Args:
+        rows: Filas en orden; la primera corresponde a la línea 2 del CSV
+        batch_size: Filas por bloque (por defecto ``USER_IMPORT_BATCH_SIZE``)
+        workers: Procesos para el hash (por defecto ``USER_IMPORT_PASSWORD_WORKERS``)
+        hasher: Nombre del hasher (por defecto ``USER_IMPORT_PASSWORD_HASHER``)
+        progress: Callable opcional que recibe ``ImportStats`` tras cada bloque
+
+    Returns:
+        ``ImportStats`` con el resumen de la importación.
+    """
+    batch_size = batch_size or BATCH_SIZE
+    workers = workers or PASSWORD_WORKERS
+    hasher = hasher or PASSWORD_HASHER
+    stats = ImportStats()
+
+    numbered = enumerate(rows, start=2)  # La fila 1 es el encabezado
+    executor = LazyProcessPool(workers) if workers > 1 else None
+    try:
+        while chunk := list(islice(numbered, batch_size)):
+            import_chunk(chunk, stats, executor, hasher)
+            stats.chunks += 1
+            if progress:
+                progress(stats)
+    finally:
+        if executor:
+            executor.shutdown()
+    return stats
+
+
+def import_upload(uploaded, chunk_size=None, **kwargs):
+    """
+    Importa usuarios desde un ``UploadedFile`` CSV en streaming: cada bloque
+    de filas se escribe en la base de datos antes de leer el siguiente. El
+    avance de cada bloque se registra en el log mientras dura la importación
+    y queda en ``ImportStats.progress`` para mostrarlo al terminar.
+    """
+    total_bytes = uploaded.size or 0
+    lines = LineReader(uploaded, chunk_size)
+
+    def log_progress(stats):
+        percentage = min(100.0, 100 * lines.bytes_read / total_bytes) if total_bytes else 100.0
+        snapshot = ImportProgress(stats.processed + stats.error_count, percentage, stats.rows_per_second)
+        stats.progress.append(snapshot)
+        logger.info(
+            "Importación de usuarios '%s': %s filas (%.0f%%), %.0f filas/s",
+            uploaded.name, snapshot.rows, snapshot.percentage, snapshot.rows_per_second,
+        )
+
+    reader = csv.DictReader(lines)
+    return import_users(reader, progress=log_progress, **kwargs)
@@ -0,0 +1,130 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DataError
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from .importer import ImportProgress, ImportStats, LineReader, import_upload, import_users, iter_lines, parse_row
+
+
+def _row(username, **overrides):
+    return {
+        'username': username,
+        'email': f'{username}@tecsup.edu.pe',
+        'password': 'Temporal123',
+        'first_name': 'Ana',
+        'last_name': 'Quispe',
+        **overrides,
+    }
+
+
+class ParseRowTests(SimpleTestCase):
+    def test_valid_row(self):
+        values, error = parse_row(_row('ana', is_staff='TRUE'))
+        self.assertIsNone(error)
+        self.assertTrue(values['is_staff'])
+        self.assertFalse(values['is_superuser'])
+
+    def test_required_fields(self):
+        self.assertEqual(parse_row(_row(''))[1], 'Username es requerido')
+        self.assertEqual(parse_row(_row('ana', password=' '))[1], 'Password es requerido')
+
+    def test_field_lengths(self):
+        _, error = parse_row(_row('a' * 151))
+        self.assertEqual(error, 'El campo username supera los 150 caracteres')
+        _, error = parse_row(_row('ana', last_name='x' * 151))
+        self.assertIn('last_name', error)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ImportUsersTests(TestCase):
+    def test_creates_and_updates(self):
+        User.objects.create_user('ana', 'antes@tecsup.edu.pe', 'x')
+        stats = import_users([_row('ana'), _row('luis'), _row('')], workers=1)
+
+        self.assertEqual((stats.created, stats.updated, stats.error_count), (1, 1, 1))
+        self.assertEqual(stats.errors, ['Fila 4: Username es requerido'])
+        self.assertEqual(User.objects.get(username='ana').email, 'ana@tecsup.edu.pe')
+        self.assertTrue(User.objects.get(username='luis').check_password('Temporal123'))
+
+    def test_failed_block_is_retried_row_by_row(self):
+        original_save = User.save
+
+        def save(user, *args, **kwargs):
+            if user.username == 'roto':
+                raise DataError('Data too long')
+            return original_save(user, *args, **kwargs)
+
+        rows = [_row('ana'), _row('roto'), _row('luis')]
+        with mock.patch.object(User.objects, 'bulk_create', side_effect=DataError('Data too long')), \
+                mock.patch.object(User, 'save', autospec=True, side_effect=save):
+            stats = import_users(rows, workers=1)
+
+        self.assertEqual(stats.created, 2)
+        self.assertEqual(stats.errors, ['Fila 3: Data too long'])
+        self.assertEqual(
+            sorted(User.objects.values_list('username', flat=True)), ['ana', 'luis'],
+        )
+
+    def test_upload_progress_per_chunk(self):
+        lines = ['username,email,password'] + [
+            f'user{index},user{index}@tecsup.edu.pe,Temporal123' for index in range(5)
+        ]
+        uploaded = SimpleUploadedFile('usuarios.csv', '\n'.join(lines).encode(), content_type='text/csv')
+        stats = import_upload(uploaded, chunk_size=16, batch_size=2, workers=1)
+
+        self.assertEqual(stats.created, 5)
+        self.assertEqual(stats.chunks, 3)
+        self.assertEqual([entry.rows for entry in stats.progress], [2, 4, 5])
+        self.assertEqual(stats.progress[-1].percentage, 100.0)
+        self.assertLess(stats.progress[0].percentage, 100.0)
+
+    def test_small_file_does_not_start_pool(self):
+        with mock.patch('apps.authentication.importer.ProcessPoolExecutor') as pool:
+            stats = import_users([_row('ana'), _row('luis'), _row('rosa')], workers=4)
+        pool.assert_not_called()
+        self.assertEqual(stats.created, 3)
+
+
+class ImportStatsTests(SimpleTestCase):
+    def test_errors_are_capped(self):
+        stats = ImportStats()
+        for row_num in range(150):
+            stats.add_error(f'Fila {row_num}: error')
+        self.assertEqual(stats.error_count, 150)
+        self.assertEqual(len(stats.errors), 100)
+
+
+    def test_progress_milestones(self):
+        stats = ImportStats(progress=[ImportProgress(row, row, 0.0) for row in range(1, 26)])
+        milestones = stats.progress_milestones()
+        self.assertEqual(len(milestones), 10)
+        self.assertEqual(milestones[-1].rows, 25)
+        self.assertEqual(len(ImportStats(progress=stats.progress[:3]).progress_milestones()), 3)
+
+
+class IterLinesTests(SimpleTestCase):
+    def upload(self, text, bom=True):
+        content = (b'\xef\xbb\xbf' if bom else b'') + text.encode('utf-8')
+        return SimpleUploadedFile('usuarios.csv', content, content_type='text/csv')
+
+    def test_multibyte_characters_across_chunks(self):
+        text = 'username,first_name\r\nnuñez,Begoña\r\npeña,Iñaki'
+        # Con bloques de 1 a 4 bytes cada ñ (2 bytes) y el BOM (3) quedan partidos
+        for chunk_size in range(1, 5):
+            lines = list(iter_lines(self.upload(text), chunk_size=chunk_size))
+            self.assertEqual(lines, ['username,first_name\r\n', 'nuñez,Begoña\r\n', 'peña,Iñaki'])
+
+    def test_without_bom(self):
+        lines = list(iter_lines(self.upload('a\nb\n', bom=False), chunk_size=2))
+        self.assertEqual(lines, ['a\n', 'b\n'])
+
+    def test_bytes_read_advances_with_lines(self):
+        uploaded = self.upload('\n'.join(['x' * 9] * 10), bom=False)  # 10 bytes por línea
+        reader = LineReader(uploaded, chunk_size=10)
+        lines = iter(reader)
+        next(lines)
+        self.assertLess(reader.bytes_read, uploaded.size)
+        list(lines)
+        self.assertEqual(reader.bytes_read, uploaded.size)
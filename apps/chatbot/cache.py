@@ -0,0 +1,172 @@
+"""
+Cache de respuestas del chatbot para preguntas repetidas.
+
+La clave es el mensaje normalizado (minúsculas, sin tildes, signos ni espacios
+repetidos) junto con un contexto agrupado del estudiante: el nivel de riesgo
+y el curso, no el porcentaje exacto, para que estudiantes en la misma
+situación compartan respuesta. Por eso, con la cache activa, el prompt
+solo lleva ese mismo contexto agrupado (ver ``format_bucket_context`` en
+``views``) y una respuesta nunca incluye datos de otro estudiante. Solo se guardan mensajes cortos, que son los
+que se repiten ("tengo examen mañana", "no quiero ir a clase").
+
+Se activa por canal con ``CHATBOT_RESPONSE_CACHE_CHANNELS`` (``web``,
+``whatsapp``). Hay dos niveles, como en la cache de predicciones:
+
+* LRU en memoria del proceso (``CHATBOT_RESPONSE_CACHE_SIZE`` entradas) con
+  vencimiento por ``CHATBOT_RESPONSE_CACHE_TTL``.
+* Opcionalmente, un backend de ``CACHES`` de Django
+  (``CHATBOT_RESPONSE_CACHE_BACKEND``) compartido entre workers.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+CACHE_SIZE = getattr(settings, 'CHATBOT_RESPONSE_CACHE_SIZE', 1000)
+CACHE_TTL = getattr(settings, 'CHATBOT_RESPONSE_CACHE_TTL', 3600)  # segundos
+CACHE_BACKEND = getattr(settings, 'CHATBOT_RESPONSE_CACHE_BACKEND', None)
+CACHE_CHANNELS = frozenset(getattr(settings, 'CHATBOT_RESPONSE_CACHE_CHANNELS', ()))
+
+# Mensajes normalizados más largos no se guardan (casi nunca se repiten)
+MAX_MESSAGE_LENGTH = getattr(settings, 'CHATBOT_RESPONSE_CACHE_MAX_LENGTH', 200)
+
+KEY_PREFIX = 'chatbot'
+
+WEB = 'web'
+WHATSAPP = 'whatsapp'
+
+_NON_WORD = re.compile(r'[^\w]+')
+
+
+def normalize_message(message):
+    """``'¡Tengo  EXAMEN mañana!'`` -> ``'tengo examen manana'``"""
+    text = unicodedata.normalize('NFKD', message.lower())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return _NON_WORD.sub(' ', text).strip()
+
+
+def context_bucket(prediction=None, characteristics=None):
+    """Contexto agrupado del estudiante: nivel de riesgo y código del curso"""
+    risk_level = prediction.risk_level if prediction else ''
+    course = characteristics.course.codigo if characteristics and characteristics.course else ''
+    return f'{risk_level}:{course}'
+
+
+def response_key(message, bucket):
+    """Clave de cache, o ``None`` si el mensaje no se guarda"""
+    normalized = normalize_message(message)
+    if not normalized or len(normalized) > MAX_MESSAGE_LENGTH:
+        return None
+    digest = hashlib.blake2b(f'{bucket}|{normalized}'.encode(), digest_size=16).hexdigest()
+    return f'{KEY_PREFIX}:{digest}'
+
+
+class ResponseCache:
+    """LRU con TTL en memoria y un segundo nivel opcional en un backend de Django"""
+
+    def __init__(self, maxsize=CACHE_SIZE, ttl=CACHE_TTL, backend=CACHE_BACKEND, channels=CACHE_CHANNELS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.backend = backend
+        self.channels = frozenset(channels)
+        self._entries = OrderedDict()  # clave -> (respuesta, vence)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.backend_hits = 0
+        self.misses = 0
+
+    def enabled(self, channel):
+        return channel in self.channels and (self.maxsize > 0 or bool(self.backend))
+
+    def get(self, key):
+        """Respuesta guardada para ``key`` o ``None``"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                response, expires = entry
+                if now < expires:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return response
+                del self._entries[key]
+
+        response = self._backend_get(key) if self.backend else None
+        with self._lock:
+            if response is None:
+                self.misses += 1
+                return None
+            self.backend_hits += 1
+        self._remember(key, response)
+        return response
+
+    def set(self, key, response):
+        self._remember(key, response)
+        if self.backend:
+            self._backend_set(key, response)
+
+    async def aget(self, key):
+        # El backend de Django es síncrono: se consulta fuera del event loop
+        if self.backend:
+            return await sync_to_async(self.get)(key)
+        return self.get(key)
+
+    async def aset(self, key, response):
+        if self.backend:
+            return await sync_to_async(self.set)(key, response)
+        return self.set(key, response)
+
+    def _remember(self, key, response):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (response, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _backend_get(self, key):
+        try:
+            return caches[self.backend].get(key)
+        except Exception:
+            logger.warning("No se pudo leer la cache de respuestas '%s'", self.backend, exc_info=True)
+            return None
+
+    def _backend_set(self, key, response):
+        try:
+            caches[self.backend].set(key, response, timeout=self.ttl)
+        except Exception:
+            logger.warning("No se pudo escribir la cache de respuestas '%s'", self.backend, exc_info=True)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.backend_hits = self.misses = 0
+
+    def stats(self):
+        """Contadores de este proceso"""
+        with self._lock:
+            hits = self.hits + self.backend_hits
+            total = hits + self.misses
+            return {
+                'channels': sorted(self.channels),
+                'backend': self.backend,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'backend_hits': self.backend_hits,
+                'misses': self.misses,
+                'hit_rate': round(hits / total, 4) if total else None,
+            }
+
+
+response_cache = ResponseCache()
@@ -1,15 +1,113 @@
+import asyncio
+import logging
 import os
+import threading
+import time
+import weakref
+
+import httpx
+from django.conf import settings
 from google import genai
+from google.genai import errors, types
+
+logger = logging.getLogger(__name__)
+
+# Pool de conexiones HTTP del cliente compartido (keep-alive entre mensajes)
+MAX_CONNECTIONS = getattr(settings, 'GEMINI_MAX_CONNECTIONS', 20)
+MAX_KEEPALIVE_CONNECTIONS = getattr(settings, 'GEMINI_MAX_KEEPALIVE_CONNECTIONS', 10)
+KEEPALIVE_EXPIRY = getattr(settings, 'GEMINI_KEEPALIVE_EXPIRY', 60)  # segundos
+TIMEOUT = getattr(settings, 'GEMINI_TIMEOUT', 30)  # segundos
+
+# URL base alternativa del API (p. ej. un servidor local de pruebas)
+BASE_URL = getattr(settings, 'GEMINI_BASE_URL', None)
+
+# Prompt del sistema como cached content del lado del servidor (una subida por
+# proceso, renovada antes de que venza su TTL)
+PROMPT_CACHE_ENABLED = getattr(settings, 'GEMINI_PROMPT_CACHE', True)
+PROMPT_CACHE_TTL = getattr(settings, 'GEMINI_PROMPT_CACHE_TTL', 3600)  # segundos
+
+# Fracción del TTL tras la que se renueva el cached content
+PROMPT_CACHE_REFRESH = 0.9
+
+# Segundos de espera antes de reintentar si no se pudo crear el cached content
+PROMPT_CACHE_RETRY = 300
+
+
+def http_options(base_url=None):
+    """Opciones HTTP de ``genai.Client``: pool de conexiones, keep-alive y timeout"""
+    limits = httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+    )
+    return types.HttpOptions(
+        base_url=base_url or BASE_URL,
+        timeout=int(TIMEOUT * 1000),  # milisegundos
+        client_args={'limits': limits},
+        async_client_args={'limits': limits},
+    )
+
+
+class PromptCache:
+    """
+    Nombre del cached content con el prompt del sistema y cuándo renovarlo.
+
+    ``get(create)`` solo llama a ``create(ttl)`` (la subida del prompt) cuando
+    no hay un nombre vigente, una sola vez aunque lo pidan varios hilos a la
+    vez. Si la subida falla devuelve ``None`` y no reintenta hasta pasados
+    ``PROMPT_CACHE_RETRY`` segundos.
+    """
+
+    def __init__(self, ttl=PROMPT_CACHE_TTL):
+        self.ttl = ttl
+        self.name = None
+        self.uploads = 0
+        self._refresh_at = 0.0
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+
+    def ready(self):
+        """True si ``get`` puede responder sin subir el prompt"""
+        now = time.monotonic()
+        return (self.name is not None and now < self._refresh_at) or now < self._retry_at
+
+    def get(self, create):
+        if self.ready():
+            return self.name
+        with self._lock:
+            if self.ready():
+                return self.name
+            now = time.monotonic()
+            try:
+                self.name = create(self.ttl)
+                self.uploads += 1
+                self._refresh_at = now + self.ttl * PROMPT_CACHE_REFRESH
+            except Exception as e:
+                logger.warning("No se pudo crear el cached content del prompt de Gemini: %s", e)
+                self.name = None
+                self._retry_at = now + PROMPT_CACHE_RETRY
+            return self.name
+
+    def invalidate(self):
+        """Descarta el nombre actual (p. ej. si el servidor ya no lo reconoce)"""
+        with self._lock:
+            self.name = None
+            self._refresh_at = 0.0
+
 
 class GeminiClient:
     """
     Cliente ALMA IA compatible con google-genai>=1.51.0
     Usa un solo string de entrada (NO roles) y un prompt
-    diseñado para respuestas variadas, humanas y accionables.
+    diseñado para respuestas variadas, humanas y accionables,
+    enviado como instrucción del sistema (cached content).
     """
 
     MODEL = "gemini-2.5-flash-lite"
 
+    # Prefijo de las respuestas de ``chat``/``achat`` cuando falla la llamada
+    ERROR_PREFIX = "Error al generar respuesta"
+
     SYSTEM_PROMPT = """
 Eres ALMA IA, un asistente académico-emocional diseñado para acompañar
 a estudiantes universitarios en situaciones de estrés, sobrecarga, indecisión
@@ -82,39 +180,239 @@ Que cada mensaje tuyo deje al estudiante un poquito más organizado,
 un poquito más tranquilo y con un siguiente paso claro.
 """
 
-    def __init__(self):
-        api_key = os.getenv("GEMINI_API_KEY")
+    def __init__(self, api_key=None, base_url=None, client=None):
+        api_key = api_key or os.getenv("GEMINI_API_KEY")
         if not api_key:
             raise ValueError("GEMINI_API_KEY no está configurada.")
 
-        self.client = genai.Client(api_key=api_key)
+        self.client = client or genai.Client(api_key=api_key, http_options=http_options(base_url))
+        self.prompt_cache = PromptCache() if PROMPT_CACHE_ENABLED else None
+        # Las conexiones del cliente async quedan ligadas al event loop que las
+        # abrió: self.client.aio es del primer loop que lo usa (el de uvicorn).
+        # Los demás loops (p. ej. uno por petición cuando Django ejecuta vistas
+        # async bajo WSGI) usan el cliente síncrono compartido en un hilo, en
+        # lugar de crear un cliente y un pool de conexiones nuevos cada vez.
+        self._aio_lock = threading.Lock()
+        self._aio_owner = None
+
+    def build_prompt(self, user_message: str, prediction_context: str = None) -> str:
+        """
+        Texto plano con el contexto del estudiante y el mensaje. El prompt
+        maestro va aparte, en la configuración (ver ``generation_config``).
+        """
+        context_section = ""
+        if prediction_context:
+            context_section = f"CONTEXTO DEL ESTUDIANTE:\n{prediction_context}\n\n"
+
+        return (
+            f"{context_section}"
+            f"Usuario: {user_message}\n"
+            f"ALMA IA:"
+        )
+
+    def _create_prompt_cache(self, ttl):
+        cached = self.client.caches.create(
+            model=self.MODEL,
+            config=types.CreateCachedContentConfig(
+                display_name="alma-ia-system-prompt",
+                system_instruction=self.SYSTEM_PROMPT,
+                ttl=f"{int(ttl)}s",
+            ),
+        )
+        return cached.name
+
+    def generation_config(self):
+        """
+        Configuración con el prompt maestro: el cached content del servidor si
+        está disponible (no se reenvía ni se re-tokeniza en cada turno) o, si
+        no, ``system_instruction``.
+        """
+        name = self.prompt_cache.get(self._create_prompt_cache) if self.prompt_cache else None
+        if name:
+            return types.GenerateContentConfig(cached_content=name)
+        return types.GenerateContentConfig(system_instruction=self.SYSTEM_PROMPT)
+
+    async def ageneration_config(self):
+        """``generation_config`` sin bloquear el event loop si hay que subir el prompt"""
+        if self.prompt_cache is None or self.prompt_cache.ready():
+            return self.generation_config()
+        return await asyncio.to_thread(self.generation_config)
+
+    def _stale_prompt_cache(self, config, error):
+        """
+        True si ``error`` indica que el cached content ya no existe: se descarta
+        y la petición se repite con ``system_instruction``.
+        """
+        if config.cached_content and isinstance(error, errors.ClientError) and error.code in (403, 404):
+            self.prompt_cache.invalidate()
+            return True
+        return False
+
+    def _system_instruction_config(self):
+        return types.GenerateContentConfig(system_instruction=self.SYSTEM_PROMPT)
+
+    def _retry_stale(self, request, config):
+        """``request(config)``; si el cached content ya no existe, se repite con system_instruction"""
+        try:
+            return request(config)
+        except errors.ClientError as e:
+            if not self._stale_prompt_cache(config, e):
+                raise
+        return request(self._system_instruction_config())
+
+    async def _aretry_stale(self, request, config):
+        """Versión async de ``_retry_stale``"""
+        try:
+            return await request(config)
+        except errors.ClientError as e:
+            if not self._stale_prompt_cache(config, e):
+                raise
+        return await request(self._system_instruction_config())
+
+    def _generate(self, contents):
+        return self._retry_stale(
+            lambda config: self.client.models.generate_content(model=self.MODEL, contents=contents, config=config),
+            self.generation_config(),
+        )
+
+    def _open_stream(self, contents):
+        """
+        Abre ``generate_content_stream`` y lee el primer fragmento: la petición
+        (y un error por cached content eliminado) ocurre al empezar a iterar,
+        así que el reintento tiene que cubrirlo. Devuelve ``(stream, primero)``.
+        """
+        def request(config):
+            stream = iter(self.client.models.generate_content_stream(
+                model=self.MODEL, contents=contents, config=config,
+            ))
+            return stream, next(stream, None)
+        return self._retry_stale(request, self.generation_config())
+
+    async def _aopen_stream(self, aio, contents):
+        """Versión async de ``_open_stream`` con ``client.aio``"""
+        async def request(config):
+            stream = await aio.models.generate_content_stream(model=self.MODEL, contents=contents, config=config)
+            stream = stream.__aiter__()
+            try:
+                return stream, await stream.__anext__()
+            except StopAsyncIteration:
+                return stream, None
+        return await self._aretry_stale(request, await self.ageneration_config())
+
+    async def _agenerate(self, contents):
+        aio = self._aio()
+        if aio is None:
+            return await asyncio.to_thread(self._generate, contents)
+        return await self._aretry_stale(
+            lambda config: aio.models.generate_content(model=self.MODEL, contents=contents, config=config),
+            await self.ageneration_config(),
+        )
+
+    async def _astream(self, contents):
+        """Fragmentos de ``generate_content_stream`` (ver ``_open_stream``)"""
+        aio = self._aio()
+        if aio is None:
+            # Cliente síncrono compartido, consumido desde un hilo
+            stream, chunk = await asyncio.to_thread(self._open_stream, contents)
+            while chunk is not None:
+                yield chunk
+                chunk = await asyncio.to_thread(next, stream, None)
+            return
+
+        stream, chunk = await self._aopen_stream(aio, contents)
+        if chunk is None:
+            return
+        yield chunk
+        async for chunk in stream:
+            yield chunk
+
+    def _aio(self):
+        """
+        ``client.aio`` si el event loop actual es el primero que lo usó (el loop
+        de larga duración de uvicorn); ``None`` en cualquier otro loop.
+        """
+        loop = asyncio.get_running_loop()
+        with self._aio_lock:
+            if self._aio_owner is None:
+                self._aio_owner = weakref.ref(loop)
+            return self.client.aio if self._aio_owner() is loop else None
 
     def chat(self, user_message: str, prediction_context: str = None) -> str:
         """
-        Envía un mensaje al modelo usando texto plano concatenado con el prompt maestro.
+        Envía un mensaje al modelo como texto plano, con el prompt maestro como instrucción del sistema.
         
         Args:
             user_message: Mensaje del usuario
             prediction_context: Contexto de la predicción de deserción del estudiante (opcional)
         """
         try:
-            context_section = ""
-            if prediction_context:
-                context_section = f"\n\nCONTEXTO DEL ESTUDIANTE:\n{prediction_context}\n"
-
-            full_prompt = (
-                f"{self.SYSTEM_PROMPT}"
-                f"{context_section}\n\n"
-                f"Usuario: {user_message}\n"
-                f"ALMA IA:"
-            )
-
-            response = self.client.models.generate_content(
-                model=self.MODEL,
-                contents=full_prompt
-            )
+            response = self._generate(self.build_prompt(user_message, prediction_context))
+
+            return response.text.strip()
+
+        except Exception as e:
+            return f"{self.ERROR_PREFIX}: {str(e)}"
+
+    async def achat(self, user_message: str, prediction_context: str = None) -> str:
+        """
+        Versión async de ``chat`` (``client.aio``): no bloquea el worker
+        mientras espera la respuesta del modelo.
+        """
+        try:
+            response = await self._agenerate(self.build_prompt(user_message, prediction_context))
 
             return response.text.strip()
 
         except Exception as e:
-            return f"Error al generar respuesta: {str(e)}"
+            return f"{self.ERROR_PREFIX}: {str(e)}"
+
+    async def achat_stream(self, user_message: str, prediction_context: str = None):
+        """
+        Genera la respuesta por fragmentos de texto a medida que el modelo los
+        produce (``generate_content_stream``). A diferencia de ``chat``, los
+        errores se propagan para que quien consume el stream decida qué mostrar.
+        """
+        async for chunk in self._astream(self.build_prompt(user_message, prediction_context)):
+            if chunk.text:
+                yield chunk.text
+
+
+_lock = threading.Lock()
+_shared = None
+
+
+def get_gemini_client():
+    """
+    ``GeminiClient`` compartido por todo el proceso (seguro entre hilos).
+
+    Se crea en el primer uso y reutiliza sus conexiones HTTP entre mensajes,
+    en lugar de pagar el handshake TLS en cada turno del chat.
+    """
+    global _shared
+    client = _shared
+    if client is None:
+        with _lock:
+            if _shared is None:
+                _shared = GeminiClient()
+            client = _shared
+    return client
+
+
+def reset_gemini_client():
+    """Descarta el cliente compartido; el siguiente uso crea uno nuevo"""
+    global _shared
+    with _lock:
+        _shared = None
+
+
+def _after_fork_in_child():
+    # Con preload_app de gunicorn el worker hereda el cliente del master: sus
+    # sockets pertenecen al padre, así que el hijo crea su propio cliente (sin
+    # cerrar el heredado) y un lock nuevo por si el fork ocurrió con él tomado.
+    global _lock, _shared
+    _lock = threading.Lock()
+    _shared = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,137 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.chatbot.gemini_client import GeminiClient
+
+STUB_REPLY = 'Elige una tarea y dime cuál; con eso armamos el plan.'
+BENCHMARK_MESSAGE = 'Tengo examen mañana y no he empezado'
+
+
+def check_reply(response):
+    if response != STUB_REPLY:
+        raise CommandError(f'Respuesta inesperada del servidor local: {response}')
+
+
+class StubGeminiHandler(BaseHTTPRequestHandler):
+    """Responde a ``generateContent`` como el API de Gemini, tras ``delay`` segundos"""
+    protocol_version = 'HTTP/1.1'  # keep-alive, como el API real
+    delay = 0.0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        time.sleep(self.delay)
+        if 'cachedContents' in self.path:
+            # Creación del cached content con el prompt del sistema
+            body = json.dumps({'name': 'cachedContents/stub'}).encode()
+        else:
+            body = json.dumps({
+                'candidates': [{
+                    'content': {'role': 'model', 'parts': [{'text': STUB_REPLY}]},
+                    'finishReason': 'STOP',
+                }],
+            }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = 'Mide la latencia por mensaje del chatbot contra un servidor local que simula el API de Gemini'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--messages',
+            type=int,
+            default=200,
+            help='Mensajes por variante',
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=1,
+            help='Mensajes concurrentes (hilos, o tareas en la variante async)',
+        )
+        parser.add_argument(
+            '--delay-ms',
+            type=float,
+            default=0.0,
+            help='Latencia simulada del modelo en el servidor local',
+        )
+
+    def handle(self, *args, **options):
+        messages = options['messages']
+        threads = options['threads']
+        if messages < 1 or threads < 1:
+            raise CommandError('--messages y --threads deben ser mayores que 0')
+
+        self.threads = threads
+        handler = type('Handler', (StubGeminiHandler,), {'delay': options['delay_ms'] / 1000})
+        server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f'http://127.0.0.1:{server.server_address[1]}'
+
+        shared = GeminiClient(api_key='stub', base_url=base_url)
+        variants = [
+            ('cliente nuevo por mensaje', self.run_threads(lambda: GeminiClient(api_key='stub', base_url=base_url))),
+            ('cliente compartido', self.run_threads(lambda: shared)),
+            ('cliente compartido (async)', self.run_async(shared)),
+        ]
+
+        try:
+            baseline_p50 = None
+            for name, run in variants:
+                run(1)  # Calentar antes de medir
+                start = time.perf_counter()
+                timings = run(messages)
+                total = time.perf_counter() - start
+
+                p50, p99 = np.percentile(timings, [50, 99])
+                baseline_p50 = baseline_p50 or p50
+                self.stdout.write(
+                    f'{name:<28} p50 {p50:8.3f} ms   p99 {p99:8.3f} ms   '
+                    f'{messages / total:8.1f} msg/s   {baseline_p50 / p50:5.2f}x'
+                )
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.stdout.write(self.style.SUCCESS(f'✓ {messages} mensajes por variante, {threads} hilo(s)'))
+
+    def run_threads(self, get_client):
+        """Envía ``n`` mensajes con ``chat`` desde ``self.threads`` hilos; devuelve las latencias en ms"""
+        def send(_):
+            start = time.perf_counter()
+            check_reply(get_client().chat(BENCHMARK_MESSAGE))
+            return (time.perf_counter() - start) * 1000
+
+        def run(n):
+            with ThreadPoolExecutor(max_workers=self.threads) as executor:
+                return list(executor.map(send, range(n)))
+        return run
+
+    def run_async(self, client):
+        """Envía ``n`` mensajes con ``achat``, hasta ``self.threads`` a la vez en un solo hilo"""
+        async def send(semaphore):
+            async with semaphore:
+                start = time.perf_counter()
+                check_reply(await client.achat(BENCHMARK_MESSAGE))
+                return (time.perf_counter() - start) * 1000
+
+        async def gather(n):
+            semaphore = asyncio.Semaphore(self.threads)
+            return await asyncio.gather(*(send(semaphore) for _ in range(n)))
+
+        loop = asyncio.new_event_loop()
+        return lambda n: loop.run_until_complete(gather(n))
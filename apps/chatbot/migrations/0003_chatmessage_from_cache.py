@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0002_chatmessage_user_alter_chatmessage_model_used'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatmessage',
+            name='from_cache',
+            field=models.BooleanField(default=False, verbose_name='Respuesta desde cache'),
+        ),
+    ]
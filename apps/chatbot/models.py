@@ -18,6 +18,8 @@ class ChatMessage(models.Model):
     bot_response = models.TextField(verbose_name="Respuesta del bot")
     created_at = models.DateTimeField(default=timezone.now, verbose_name="Fecha de creación")
     model_used = models.CharField(max_length=100, default="gemini-2.5-flash-lite", verbose_name="Modelo utilizado")
+    # True si la respuesta salió de la cache de respuestas (sin llamar a Gemini)
+    from_cache = models.BooleanField(default=False, verbose_name="Respuesta desde cache")
     
     class Meta:
         verbose_name = "Mensaje de Chat"
@@ -1,3 +1,465 @@
-from django.test import TestCase
+import json
+import os
+import threading
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory, SimpleTestCase
+from google.genai import errors
+
+from .cache import WEB, WHATSAPP, ResponseCache, context_bucket, normalize_message, response_key
+from .gemini_client import GeminiClient, PromptCache
+from .models import ChatMessage
+from .views import get_bot_response, get_prediction_context, sse_event, stream_message
+
+
+class FakeCaches:
+    """Sustituto de ``client.caches``: cuenta las subidas del prompt"""
+
+    def __init__(self, available=True):
+        self.available = available
+        self.attempts = 0
+        self.created = []
+
+    def create(self, model, config):
+        self.attempts += 1
+        if not self.available:
+            raise errors.ClientError(400, {'error': {'message': 'Caching no disponible', 'status': 'INVALID_ARGUMENT'}})
+        self.created.append(config)
+        return SimpleNamespace(name=f'cachedContents/{len(self.created)}')
+
+
+STREAM_CHUNKS = [
+    SimpleNamespace(text='Abre el documento '),
+    SimpleNamespace(text=None),
+    SimpleNamespace(text='y escribe el título.'),
+]
+
+
+class FakeModels:
+    """Sustituto de ``client.models``: guarda cada petición"""
+
+    def __init__(self, stale_caches=()):
+        self.calls = []
+        self.stale_caches = set(stale_caches)
+
+    def generate_content(self, model, contents, config):
+        self.calls.append((contents, config))
+        self.check(config)
+        return SimpleNamespace(text=' Abre el documento y escribe el título. ')
+
+    def generate_content_stream(self, model, contents, config):
+        # Como en google-genai, la petición (y sus errores) ocurre al iterar
+        self.calls.append((contents, config))
+        self.check(config)
+        yield from STREAM_CHUNKS
+
+    def check(self, config):
+        if config.cached_content in self.stale_caches:
+            raise errors.ClientError(404, {'error': {'message': 'CachedContent not found', 'status': 'NOT_FOUND'}})
+
+
+class FakeAsyncModels:
+    """Sustituto de ``client.aio.models``: delega en los modelos síncronos"""
+
+    def __init__(self, models):
+        self.sync = models
+        self.calls = 0
+
+    async def generate_content(self, model, contents, config):
+        self.calls += 1
+        return self.sync.generate_content(model, contents, config)
+
+    async def generate_content_stream(self, model, contents, config):
+        self.calls += 1
+        chunks = self.sync.generate_content_stream(model, contents, config)
+
+        async def stream():
+            for chunk in chunks:
+                yield chunk
+        return stream()
+
+
+class FakeGenaiClient:
+    def __init__(self, caches=None, models=None):
+        self.caches = caches or FakeCaches()
+        self.models = models or FakeModels()
+        self.aio = SimpleNamespace(models=FakeAsyncModels(self.models))
+
+
+class PromptCacheTests(SimpleTestCase):
+    """El prompt del sistema se sube una vez por proceso como cached content"""
+
+    def make_client(self, fake, ttl=3600):
+        client = GeminiClient(api_key='test', client=fake)
+        client.prompt_cache = PromptCache(ttl=ttl)
+        return client
+
+    def test_prompt_uploaded_once(self):
+        fake = FakeGenaiClient()
+        client = self.make_client(fake)
+        for message in ['Tengo examen mañana', 'No sé por dónde empezar', 'Gracias']:
+            self.assertEqual(client.chat(message), 'Abre el documento y escribe el título.')
+
+        self.assertEqual(len(fake.caches.created), 1)
+        self.assertEqual(fake.caches.created[0].system_instruction, GeminiClient.SYSTEM_PROMPT)
+        for contents, config in fake.models.calls:
+            self.assertEqual(config.cached_content, 'cachedContents/1')
+            self.assertIsNone(config.system_instruction)
+            self.assertNotIn(GeminiClient.SYSTEM_PROMPT, contents)
+
+    def test_concurrent_messages_upload_once(self):
+        fake = FakeGenaiClient()
+        client = self.make_client(fake)
+        threads = [threading.Thread(target=client.chat, args=('Hola',)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(fake.caches.created), 1)
+        self.assertEqual(len(fake.models.calls), 8)
+
+    def test_refreshed_before_ttl(self):
+        fake = FakeGenaiClient()
+        client = self.make_client(fake, ttl=100)
+        with mock.patch('apps.chatbot.gemini_client.time.monotonic', return_value=1000.0):
+            client.chat('Hola')
+        with mock.patch('apps.chatbot.gemini_client.time.monotonic', return_value=1080.0):
+            client.chat('Hola')
+        self.assertEqual(len(fake.caches.created), 1)
+
+        # Al 90 % del TTL se crea uno nuevo, antes de que el servidor lo elimine
+        with mock.patch('apps.chatbot.gemini_client.time.monotonic', return_value=1095.0):
+            client.chat('Hola')
+        self.assertEqual(len(fake.caches.created), 2)
+        self.assertEqual(fake.models.calls[-1][1].cached_content, 'cachedContents/2')
+
+    def test_fallback_when_caching_unavailable(self):
+        fake = FakeGenaiClient(caches=FakeCaches(available=False))
+        client = self.make_client(fake)
+        with self.assertLogs('apps.chatbot.gemini_client', level='WARNING'):
+            self.assertEqual(client.chat('Hola'), 'Abre el documento y escribe el título.')
+        client.chat('Hola otra vez')
+
+        # No se reintenta en cada mensaje
+        self.assertEqual(fake.caches.attempts, 1)
+        for _, config in fake.models.calls:
+            self.assertIsNone(config.cached_content)
+            self.assertEqual(config.system_instruction, GeminiClient.SYSTEM_PROMPT)
+
+    def test_stale_cache_is_recreated(self):
+        fake = FakeGenaiClient(models=FakeModels(stale_caches={'cachedContents/1'}))
+        client = self.make_client(fake)
+
+        # La petición con el cached content eliminado se repite con system_instruction
+        self.assertEqual(client.chat('Hola'), 'Abre el documento y escribe el título.')
+        self.assertEqual(fake.models.calls[-1][1].system_instruction, GeminiClient.SYSTEM_PROMPT)
+
+        client.chat('Hola otra vez')
+        self.assertEqual(len(fake.caches.created), 2)
+        self.assertEqual(fake.models.calls[-1][1].cached_content, 'cachedContents/2')
+
+    def test_disabled(self):
+        fake = FakeGenaiClient()
+        client = GeminiClient(api_key='test', client=fake)
+        client.prompt_cache = None
+        client.chat('Hola')
+        self.assertEqual(fake.caches.attempts, 0)
+        self.assertEqual(fake.models.calls[0][1].system_instruction, GeminiClient.SYSTEM_PROMPT)
+
+
+class AsyncClientTests(SimpleTestCase):
+    """``achat`` desde varios event loops reutiliza el mismo cliente"""
+
+    def test_sequential_async_to_sync_calls(self):
+        # Bajo WSGI Django ejecuta cada vista async en un event loop nuevo
+        fake = FakeGenaiClient()
+        client = GeminiClient(api_key='test', client=fake)
+        with mock.patch('apps.chatbot.gemini_client.genai.Client') as new_client:
+            for _ in range(3):
+                self.assertEqual(async_to_sync(client.achat)('Hola'), 'Abre el documento y escribe el título.')
+        new_client.assert_not_called()
+
+        # Solo el primer loop usa client.aio; los siguientes, el cliente síncrono compartido
+        self.assertEqual(fake.aio.models.calls, 1)
+        self.assertEqual(len(fake.models.calls), 3)
+
+
+class AsyncPromptCacheTests(SimpleTestCase):
+    """``achat`` y ``achat_stream`` con el cached content, también cuando ya no existe"""
+
+    def make_client(self, fake):
+        client = GeminiClient(api_key='test', client=fake)
+        client.prompt_cache = PromptCache(ttl=3600)
+        return client
+
+    @staticmethod
+    async def collect(stream):
+        return [text async for text in stream]
+
+    def test_achat(self):
+        fake = FakeGenaiClient()
+        client = self.make_client(fake)
+
+        async def run():
+            return [await client.achat('Hola'), await client.achat('Hola otra vez')]
+        self.assertEqual(async_to_sync(run)(), ['Abre el documento y escribe el título.'] * 2)
+        self.assertEqual(fake.aio.models.calls, 2)
+        self.assertEqual(len(fake.caches.created), 1)
+        self.assertEqual(fake.models.calls[-1][1].cached_content, 'cachedContents/1')
+
+    def test_achat_stale_cache(self):
+        fake = FakeGenaiClient(models=FakeModels(stale_caches={'cachedContents/1'}))
+        client = self.make_client(fake)
+
+        async def run():
+            return [await client.achat('Hola'), await client.achat('Hola otra vez')]
+        self.assertEqual(async_to_sync(run)(), ['Abre el documento y escribe el título.'] * 2)
+        self.assertEqual(fake.models.calls[1][1].system_instruction, GeminiClient.SYSTEM_PROMPT)
+        self.assertEqual(len(fake.caches.created), 2)
+        self.assertEqual(fake.models.calls[-1][1].cached_content, 'cachedContents/2')
+
+    def test_achat_stream(self):
+        fake = FakeGenaiClient()
+        client = self.make_client(fake)
+        texts = async_to_sync(self.collect)(client.achat_stream('Hola'))
+        self.assertEqual(texts, ['Abre el documento ', 'y escribe el título.'])
+        self.assertEqual(fake.aio.models.calls, 1)
+        self.assertEqual(fake.models.calls[0][1].cached_content, 'cachedContents/1')
+
+    def test_achat_stream_stale_cache(self):
+        # El error llega al iterar el stream, no al crearlo
+        fake = FakeGenaiClient(models=FakeModels(stale_caches={'cachedContents/1'}))
+        client = self.make_client(fake)
+
+        async def run():
+            return [await self.collect(client.achat_stream(message)) for message in ('Hola', 'Hola otra vez')]
+        first, second = async_to_sync(run)()
+        self.assertEqual(first, ['Abre el documento ', 'y escribe el título.'])
+        self.assertEqual(second, first)
+        self.assertEqual(fake.models.calls[1][1].system_instruction, GeminiClient.SYSTEM_PROMPT)
+        self.assertEqual(len(fake.caches.created), 2)
+        self.assertEqual(fake.models.calls[-1][1].cached_content, 'cachedContents/2')
+
+    def test_achat_stream_from_another_loop_stale_cache(self):
+        fake = FakeGenaiClient(models=FakeModels(stale_caches={'cachedContents/1'}))
+        client = self.make_client(fake)
+        async_to_sync(client.achat)('Hola')  # Este loop queda como dueño de client.aio
+        aio_calls = fake.aio.models.calls
+        fake.models.calls.clear()
+        fake.models.stale_caches.add('cachedContents/2')
+
+        # Otro loop usa el cliente síncrono desde un hilo, con el mismo reintento
+        texts = async_to_sync(self.collect)(client.achat_stream('Hola'))
+        self.assertEqual(texts, ['Abre el documento ', 'y escribe el título.'])
+        self.assertEqual(fake.aio.models.calls, aio_calls)
+        self.assertEqual(fake.models.calls[0][1].cached_content, 'cachedContents/2')
+        self.assertEqual(fake.models.calls[1][1].system_instruction, GeminiClient.SYSTEM_PROMPT)
+
+    def test_stream_error_is_propagated(self):
+        fake = FakeGenaiClient(caches=FakeCaches(available=False))
+        fake.models.generate_content_stream = mock.Mock(side_effect=errors.ClientError(
+            400, {'error': {'message': 'Petición inválida', 'status': 'INVALID_ARGUMENT'}},
+        ))
+        client = self.make_client(fake)
+        with self.assertLogs('apps.chatbot.gemini_client', level='WARNING'), self.assertRaises(errors.ClientError):
+            async_to_sync(self.collect)(client.achat_stream('Hola'))
+
+
+class ResponseCacheTests(SimpleTestCase):
+    """Cache de respuestas en memoria (sin backend de Django)"""
+
+    def setUp(self):
+        self.cache = ResponseCache(maxsize=2, ttl=60, backend=None, channels={WEB})
+        self.bucket = context_bucket(SimpleNamespace(risk_level='Alto'), None)
+
+    def test_normalized_messages_share_key(self):
+        self.assertEqual(normalize_message('¡Tengo  EXAMEN mañana!'), 'tengo examen manana')
+        self.assertEqual(
+            response_key('tengo examen mañana', self.bucket),
+            response_key('Tengo examen manana...', self.bucket),
+        )
+        self.assertNotEqual(
+            response_key('tengo examen mañana', self.bucket),
+            response_key('tengo examen mañana', context_bucket()),
+        )
+        self.assertIsNone(response_key('?!', self.bucket))
+        self.assertIsNone(response_key('a' * 500, self.bucket))
+
+    def test_bucket_ignores_exact_percentage(self):
+        course = SimpleNamespace(course=SimpleNamespace(codigo=9119))
+        low = SimpleNamespace(risk_level='Bajo', risk_percentage=12.5)
+        also_low = SimpleNamespace(risk_level='Bajo', risk_percentage=21.0)
+        self.assertEqual(context_bucket(low, course), context_bucket(also_low, course))
+
+    def test_hit_after_set(self):
+        key = response_key('no quiero ir a clase', self.bucket)
+        self.assertIsNone(self.cache.get(key))
+        self.cache.set(key, 'Elige una sola clase para hoy.')
+        self.assertEqual(self.cache.get(key), 'Elige una sola clase para hoy.')
+        self.assertEqual(self.cache.stats()['hit_rate'], 0.5)
+
+    def test_ttl_expiry(self):
+        key = response_key('hola', self.bucket)
+        with mock.patch('apps.chatbot.cache.time.monotonic', return_value=100.0):
+            self.cache.set(key, 'Hola')
+        with mock.patch('apps.chatbot.cache.time.monotonic', return_value=159.0):
+            self.assertEqual(self.cache.get(key), 'Hola')
+        with mock.patch('apps.chatbot.cache.time.monotonic', return_value=161.0):
+            self.assertIsNone(self.cache.get(key))
+        self.assertEqual(self.cache.stats()['size'], 0)
+
+    def test_lru_eviction(self):
+        keys = [response_key(message, self.bucket) for message in ('uno', 'dos', 'tres')]
+        self.cache.set(keys[0], '1')
+        self.cache.set(keys[1], '2')
+        self.cache.get(keys[0])
+        self.cache.set(keys[2], '3')
+        self.assertEqual(self.cache.get(keys[0]), '1')
+        self.assertIsNone(self.cache.get(keys[1]))
+
+    def test_enabled_per_channel(self):
+        self.assertTrue(self.cache.enabled(WEB))
+        self.assertFalse(self.cache.enabled(WHATSAPP))
+        self.assertFalse(ResponseCache(maxsize=0, backend=None, channels={WEB}).enabled(WEB))
+
+
+class SharedContextTests(SimpleTestCase):
+    """Con la cache activa el prompt solo lleva el contexto agrupado"""
+
+    def setUp(self):
+        course = SimpleNamespace(nombre='Diseño de Software', codigo=9119)
+        self.students = {
+            debtor: SimpleNamespace(
+                prediction=SimpleNamespace(
+                    risk_level='Alto', risk_percentage=70 + debtor, prediction_label='Abandono',
+                ),
+                characteristics=SimpleNamespace(
+                    course=course, age_at_enrollment=19, scholarship_holder=False,
+                    debtor=debtor, tuition_fees_up_to_date=not debtor,
+                ),
+            )
+            for debtor in (True, False)
+        }
+        patcher = mock.patch('apps.chatbot.views.response_cache', ResponseCache(
+            maxsize=10, ttl=60, backend=None, channels={WEB},
+        ))
+        self.cache = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def context(self, student, bucketed):
+        predictions = mock.MagicMock()
+        predictions.filter.return_value.order_by.return_value.afirst = mock.AsyncMock(return_value=student.prediction)
+        characteristics = mock.MagicMock()
+        characteristics.select_related.return_value.filter.return_value.afirst = mock.AsyncMock(
+            return_value=student.characteristics,
+        )
+        user = SimpleNamespace(is_authenticated=True, is_staff=False)
+        with mock.patch('apps.chatbot.views.DropoutPrediction.objects', predictions), \
+                mock.patch('apps.chatbot.views.StudentCharacteristics.objects', characteristics):
+            return async_to_sync(get_prediction_context)(user, bucketed=bucketed)
+
+    def test_same_bucket_never_shares_personal_details(self):
+        # Gemini simulado que repite el contexto recibido en la respuesta
+        async def achat(user_message, prediction_context=None):
+            return f'Respuesta para: {prediction_context}'
+        gemini = SimpleNamespace(achat=achat)
+
+        replies = []
+        with mock.patch('apps.chatbot.views.get_gemini_client', return_value=gemini):
+            for debtor in (True, False):
+                context, bucket = self.context(self.students[debtor], bucketed=self.cache.enabled(WEB))
+                replies.append(async_to_sync(get_bot_response)('tengo examen mañana', context, bucket, WEB))
+
+        (first, first_cached), (second, second_cached) = replies
+        self.assertEqual((first_cached, second_cached), (False, True))
+        self.assertEqual(first, second)
+        self.assertIn('Alto', first)
+        self.assertNotIn('deudas', first)
+        self.assertNotIn('%', first)
+
+    def test_full_context_without_cache(self):
+        context, _ = self.context(self.students[True], bucketed=False)
+        self.assertIn('Tiene deudas pendientes', context)
+        bucketed, _ = self.context(self.students[True], bucketed=True)
+        self.assertEqual(bucketed, 'Nivel de riesgo de desercion: Alto\nCurso: Diseño de Software (Codigo: 9119)')
+
+
+def parse_sse(body):
+    """Lista de ``(evento, datos)`` de un cuerpo Server-Sent Events"""
+    events = []
+    for frame in body.split('\n\n'):
+        if not frame:
+            continue
+        fields = dict(line.split(': ', 1) for line in frame.split('\n'))
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+class StreamMessageTests(SimpleTestCase):
+    """Framing SSE de ``stream_message`` con un cliente de Gemini simulado"""
+
+    def setUp(self):
+        patchers = [
+            mock.patch.dict(os.environ, {'GEMINI_API_KEY': 'test'}),
+            mock.patch('apps.chatbot.views.response_cache.channels', frozenset()),
+            mock.patch(
+                'apps.chatbot.views.ChatMessage.objects.acreate',
+                new=mock.AsyncMock(return_value=SimpleNamespace(id=7)),
+            ),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def stream(self, fragments=(), error=None):
+        async def achat_stream(user_message, prediction_context=None):
+            for text in fragments:
+                yield text
+            if error:
+                raise error
+
+        gemini = SimpleNamespace(achat_stream=achat_stream)
+        request = RequestFactory().post('/chatbot/stream/', data={'message': 'Hola'}, content_type='application/json')
+
+        async def auser():
+            return AnonymousUser()
+        request.auser = auser
+
+        async def consume():
+            response = await stream_message(request)
+            body = ''.join([chunk.decode() async for chunk in response.streaming_content])
+            return response, body
+
+        with mock.patch('apps.chatbot.views.get_gemini_client', return_value=gemini):
+            response, body = async_to_sync(consume)()
+        self.assertEqual(response['Content-Type'], 'text/event-stream; charset=utf-8')
+        return parse_sse(body)
+
+    def test_sse_event_framing(self):
+        self.assertEqual(
+            sse_event('token', {'text': 'Línea 1\nlínea 2'}),
+            'event: token\ndata: {"text": "Línea 1\\nlínea 2"}\n\n',
+        )
+
+    def test_tokens_then_done(self):
+        events = self.stream(['Abre el ', 'documento.'])
+        self.assertEqual(events, [
+            ('token', {'text': 'Abre el '}),
+            ('token', {'text': 'documento.'}),
+            ('done', {'message_id': 7, 'from_cache': False}),
+        ])
+        self.assertEqual(ChatMessage.objects.acreate.call_args.kwargs['bot_response'], 'Abre el documento.')
+
+    def test_empty_response_is_an_error(self):
+        events = self.stream([])
+        self.assertEqual([event for event, _ in events], ['error'])
+        ChatMessage.objects.acreate.assert_not_called()
+
+    def test_generation_error(self):
+        events = self.stream(['Abre'], error=RuntimeError('sin conexión'))
+        self.assertEqual(events[0], ('token', {'text': 'Abre'}))
+        self.assertEqual(events[1][0], 'error')
+        self.assertIn('sin conexión', events[1][1]['error'])
@@ -1,4 +1,4 @@
-from django.http import HttpResponse, JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.utils.html import escape
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
@@ -7,8 +7,9 @@ from web_project import TemplateLayout
 import json
 import os
 
+from .cache import WEB, WHATSAPP, context_bucket, response_cache, response_key
 from .models import ChatMessage
-from .gemini_client import GeminiClient
+from .gemini_client import GeminiClient, get_gemini_client
 from apps.prediction.models import DropoutPrediction, StudentCharacteristics
 
 
@@ -23,50 +24,99 @@ class ChatView(TemplateView):
         return context
 
 
-def get_prediction_context(user):
+def format_prediction_context(prediction, characteristics):
+    """
+    Texto con la predicción de deserción y las características del estudiante
+    que se agrega al prompt.
+    """
+    context_parts = []
+    context_parts.append(f"Riesgo de Desercion: {prediction.risk_percentage:.2f}% ({prediction.risk_level})")
+    context_parts.append(f"Prediccion: {prediction.prediction_label}")
+    
+    if characteristics and characteristics.course:
+        context_parts.append(f"Curso: {characteristics.course.nombre} (Codigo: {characteristics.course.codigo})")
+    
+    if characteristics:
+        context_parts.append(f"Edad al momento de inscripcion: {characteristics.age_at_enrollment} anos")
+        if characteristics.scholarship_holder:
+            context_parts.append("Tiene beca")
+        if characteristics.debtor:
+            context_parts.append("Tiene deudas pendientes")
+        if not characteristics.tuition_fees_up_to_date:
+            context_parts.append("Matricula no esta al dia")
+    
+    return "\n".join(context_parts)
+
+
+def format_bucket_context(prediction, characteristics):
+    """
+    Texto del contexto agrupado (nivel de riesgo y curso) que se usa cuando
+    la respuesta puede guardarse en la cache: estudiantes con la misma clave
+    comparten la respuesta, así que el prompt no lleva datos individuales
+    (porcentaje exacto, edad, beca, deudas, matrícula).
+    """
+    context_parts = [f"Nivel de riesgo de desercion: {prediction.risk_level}"]
+    if characteristics and characteristics.course:
+        context_parts.append(f"Curso: {characteristics.course.nombre} (Codigo: {characteristics.course.codigo})")
+    return "\n".join(context_parts)
+
+
+async def get_prediction_context(user, bucketed=False):
     """
     Obtiene el contexto de la prediccion de desercion del usuario autenticado.
+    
+    Args:
+        user: Usuario de la petición
+        bucketed: Usar solo el contexto agrupado (cuando la cache de
+            respuestas está activa para el canal)
+    
+    Returns:
+        Tupla ``(contexto, grupo)``: el texto para el prompt (o ``None``) y el
+        contexto agrupado (nivel de riesgo y curso) para la cache de respuestas.
     """
     if not user or not user.is_authenticated or user.is_staff:
-        return None
+        return None, context_bucket()
     
     try:
-        prediction = DropoutPrediction.objects.filter(user=user).order_by('-created_at').first()
+        prediction = await DropoutPrediction.objects.filter(user=user).order_by('-created_at').afirst()
         if not prediction:
-            return None
-        
-        try:
-            characteristics = StudentCharacteristics.objects.get(user=user)
-        except StudentCharacteristics.DoesNotExist:
-            characteristics = None
+            return None, context_bucket()
         
-        context_parts = []
-        context_parts.append(f"Riesgo de Desercion: {prediction.risk_percentage:.2f}% ({prediction.risk_level})")
-        context_parts.append(f"Prediccion: {prediction.prediction_label}")
-        
-        if characteristics and characteristics.course:
-            context_parts.append(f"Curso: {characteristics.course.nombre} (Codigo: {characteristics.course.codigo})")
-        
-        if characteristics:
-            context_parts.append(f"Edad al momento de inscripcion: {characteristics.age_at_enrollment} anos")
-            if characteristics.scholarship_holder:
-                context_parts.append("Tiene beca")
-            if characteristics.debtor:
-                context_parts.append("Tiene deudas pendientes")
-            if not characteristics.tuition_fees_up_to_date:
-                context_parts.append("Matricula no esta al dia")
-        
-        return "\n".join(context_parts)
+        characteristics = await StudentCharacteristics.objects.select_related('course').filter(user=user).afirst()
+        format_context = format_bucket_context if bucketed else format_prediction_context
+        return format_context(prediction, characteristics), context_bucket(prediction, characteristics)
         
     except Exception:
-        return None
+        return None, context_bucket()
+
+
+async def get_bot_response(user_message, prediction_context, bucket, channel):
+    """
+    Respuesta de Gemini, o de la cache de respuestas si está activa para el
+    canal. Devuelve ``(respuesta, desde_cache)``.
+    
+    Con la cache activa ``prediction_context`` debe ser el contexto agrupado
+    (``get_prediction_context(user, bucketed=True)``).
+    """
+    key = response_key(user_message, bucket) if response_cache.enabled(channel) else None
+    if key:
+        cached = await response_cache.aget(key)
+        if cached is not None:
+            return cached, True
+    
+    bot_response = await get_gemini_client().achat(user_message, prediction_context=prediction_context)
+    if key and not bot_response.startswith(GeminiClient.ERROR_PREFIX):
+        await response_cache.aset(key, bot_response)
+    return bot_response, False
 
 
 @csrf_exempt
 @require_http_methods(["POST"])
-def send_message(request):
+async def send_message(request):
     """
     API endpoint para enviar mensajes al chatbot desde la web.
+    
+    Es async: mientras espera a Gemini el worker (uvicorn) atiende otros chats.
     """
     try:
         data = json.loads(request.body)
@@ -84,30 +134,30 @@ def send_message(request):
                 'error': 'API key de Gemini no configurada'
             })
         
-        prediction_context = None
-        if request.user.is_authenticated:
-            prediction_context = get_prediction_context(request.user)
+        user = await request.auser()
+        prediction_context, bucket = await get_prediction_context(user, bucketed=response_cache.enabled(WEB))
         
         try:
-            gemini_client = GeminiClient()
-            bot_response = gemini_client.chat(user_message, prediction_context=prediction_context)
+            bot_response, from_cache = await get_bot_response(user_message, prediction_context, bucket, WEB)
         except Exception as e:
             return JsonResponse({
                 'success': False,
                 'error': f'Error al conectar con Gemini: {str(e)}'
             })
         
-        chat_message = ChatMessage.objects.create(
-            user=request.user if request.user.is_authenticated else None,
+        chat_message = await ChatMessage.objects.acreate(
+            user=user if user.is_authenticated else None,
             user_message=user_message,
             bot_response=bot_response,
-            model_used=GeminiClient.MODEL
+            model_used=GeminiClient.MODEL,
+            from_cache=from_cache
         )
         
         return JsonResponse({
             'success': True,
             'response': bot_response,
-            'message_id': chat_message.id
+            'message_id': chat_message.id,
+            'from_cache': from_cache
         })
         
     except json.JSONDecodeError:
@@ -122,6 +172,85 @@ def send_message(request):
         })
 
 
+def sse_event(event, data):
+    """Evento Server-Sent Events con ``data`` serializado como JSON (una línea)"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+async def stream_message(request):
+    """
+    Igual que ``send_message`` pero devuelve la respuesta por Server-Sent
+    Events a medida que Gemini la genera: eventos ``token`` con cada fragmento,
+    ``done`` con el id del ``ChatMessage`` guardado al final y ``error`` si la
+    generación falla o no devuelve texto (p. ej. bloqueada por los filtros de
+    seguridad); en ese caso no se guarda el mensaje. Sin un servidor ASGI
+    Django junta el stream completo antes de enviarlo.
+    """
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'success': False,
+            'error': 'Formato JSON invalido'
+        })
+    
+    user_message = data.get('message', '').strip()
+    if not user_message:
+        return JsonResponse({
+            'success': False,
+            'error': 'El mensaje no puede estar vacio'
+        })
+    
+    if not os.getenv('GEMINI_API_KEY'):
+        return JsonResponse({
+            'success': False,
+            'error': 'API key de Gemini no configurada'
+        })
+    
+    user = await request.auser()
+    cache_enabled = response_cache.enabled(WEB)
+    prediction_context, bucket = await get_prediction_context(user, bucketed=cache_enabled)
+    key = response_key(user_message, bucket) if cache_enabled else None
+    cached = await response_cache.aget(key) if key else None
+    
+    async def events():
+        if cached is not None:
+            # Desde la cache: la respuesta completa en un solo fragmento
+            bot_response = cached
+            yield sse_event('token', {'text': cached})
+        else:
+            parts = []
+            try:
+                async for text in get_gemini_client().achat_stream(user_message, prediction_context=prediction_context):
+                    parts.append(text)
+                    yield sse_event('token', {'text': text})
+            except Exception as e:
+                yield sse_event('error', {'error': f'Error al conectar con Gemini: {str(e)}'})
+                return
+            bot_response = ''.join(parts).strip()
+            if not bot_response:
+                yield sse_event('error', {'error': 'Gemini no devolvió una respuesta. Intenta reformular tu mensaje.'})
+                return
+            if key:
+                await response_cache.aset(key, bot_response)
+        
+        chat_message = await ChatMessage.objects.acreate(
+            user=user if user.is_authenticated else None,
+            user_message=user_message,
+            bot_response=bot_response,
+            model_used=GeminiClient.MODEL,
+            from_cache=cached is not None
+        )
+        yield sse_event('done', {'message_id': chat_message.id, 'from_cache': cached is not None})
+    
+    response = StreamingHttpResponse(events(), content_type='text/event-stream; charset=utf-8')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Sin buffer en nginx
+    return response
+
+
 class ChatHistoryView(TemplateView):
     """
     Vista para mostrar el historial de conversaciones usando el layout de Materio.
@@ -137,7 +266,7 @@ class ChatHistoryView(TemplateView):
 
 @csrf_exempt
 @require_http_methods(["POST"])
-def twilio_whatsapp_webhook(request):
+async def twilio_whatsapp_webhook(request):
     """
     Webhook de Twilio WhatsApp Sandbox: recibe mensajes entrantes,
     usa ALMA/Gemini para responder y devuelve TwiML.
@@ -149,25 +278,31 @@ def twilio_whatsapp_webhook(request):
         twiml = '<?xml version="1.0" encoding="UTF-8"?><Response><Message>Necesito un mensaje de texto para ayudarte.</Message></Response>'
         return HttpResponse(twiml, content_type="text/xml")
 
-    prediction_context = None
-    if getattr(request, "user", None) and request.user.is_authenticated:
-        prediction_context = get_prediction_context(request.user)
+    prediction_context, bucket = None, context_bucket()
+    if hasattr(request, "auser"):
+        prediction_context, bucket = await get_prediction_context(
+            await request.auser(),
+            bucketed=response_cache.enabled(WHATSAPP),
+        )
 
     if not os.getenv("GEMINI_API_KEY"):
         twiml = '<?xml version="1.0" encoding="UTF-8"?><Response><Message>Configura GEMINI_API_KEY en el servidor.</Message></Response>'
         return HttpResponse(twiml, content_type="text/xml")
 
     try:
-        bot_response = GeminiClient().chat(
+        bot_response, from_cache = await get_bot_response(
             incoming_body,
-            prediction_context=prediction_context,
+            prediction_context,
+            bucket,
+            WHATSAPP,
         )
 
-        ChatMessage.objects.create(
+        await ChatMessage.objects.acreate(
             user=None,
             user_message=f"{from_number or 'whatsapp'}: {incoming_body}",
             bot_response=bot_response,
             model_used=GeminiClient.MODEL,
+            from_cache=from_cache,
         )
     except Exception:
         bot_response = "Tuvimos un problema al responder. Intenta de nuevo en unos minutos."
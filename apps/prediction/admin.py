@@ -1,9 +1,10 @@
 from django.contrib import admin
+from django.http import StreamingHttpResponse
 from django.urls import path
-from django.shortcuts import redirect
+from django.utils import timezone
+from django.shortcuts import redirect, render
 from django.contrib import messages
-from django.db import transaction
-from .models import Curso, StudentCharacteristics, DropoutPrediction
+from .models import Curso, StudentCharacteristics, DropoutPrediction, ModelVersion, PredictionJob
 
 
 @admin.register(Curso)
@@ -76,11 +77,58 @@ class StudentCharacteristicsAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_urls(self):
+        urls = super().get_urls()
+        custom_urls = [
+            path('import/', self.admin_site.admin_view(self.import_view), name='prediction_studentcharacteristics_import'),
+        ]
+        return custom_urls + urls
+
+    def import_view(self, request):
+        """Importa características en bloque desde un CSV/Parquet con las columnas de análisis/dataset.csv"""
+        if not (self.has_add_permission(request) and self.has_change_permission(request)):
+            messages.error(request, 'No tienes permisos para realizar esta acción.')
+            return redirect('admin:prediction_studentcharacteristics_changelist')
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'has_view_permission': True,
+        }
+        if request.method != 'POST':
+            return render(request, 'admin/prediction/studentcharacteristics/import.html', context)
+
+        uploaded = request.FILES.get('data_file')
+        if not uploaded or not uploaded.name.lower().endswith(('.csv', '.parquet')):
+            messages.error(request, 'Selecciona un archivo .csv o .parquet.')
+            return render(request, 'admin/prediction/studentcharacteristics/import.html', context)
+
+        from .importer import import_characteristics
+
+        file_format = 'parquet' if uploaded.name.lower().endswith('.parquet') else 'csv'
+        try:
+            stats = import_characteristics(uploaded, file_format=file_format)
+        except Exception as e:
+            messages.error(request, f'Error al procesar el archivo: {str(e)}')
+            return render(request, 'admin/prediction/studentcharacteristics/import.html', context)
+
+        if stats.processed:
+            messages.success(
+                request,
+                f'Se crearon {stats.created} y se actualizaron {stats.updated} registros de características '
+                f'en {stats.elapsed:.2f} s ({stats.rows_per_second:.0f} filas/s).'
+            )
+        for error in stats.errors[:10]:
+            messages.warning(request, error)
+        if len(stats.errors) > 10:
+            messages.warning(request, f'... y {len(stats.errors) - 10} error(es) más.')
+        return redirect('admin:prediction_studentcharacteristics_changelist')
+
 
 @admin.register(DropoutPrediction)
 class DropoutPredictionAdmin(admin.ModelAdmin):
-    list_display = ['user', 'risk_percentage', 'risk_level', 'prediction_label', 'created_at']
-    list_filter = ['risk_level', 'prediction', 'created_at']
+    list_display = ['user', 'risk_percentage', 'risk_level', 'prediction_label', 'model_version', 'created_at']
+    list_filter = ['risk_level', 'prediction', 'model_version', 'created_at']
     search_fields = ['user__username', 'user__email']
     readonly_fields = ['created_at', 'updated_at']
     date_hierarchy = 'created_at'
@@ -93,7 +141,7 @@ class DropoutPredictionAdmin(admin.ModelAdmin):
         ('Resultados de la Predicción', {
             'fields': (
                 'risk_score', 'risk_percentage', 'risk_level',
-                'prediction', 'prediction_label'
+                'prediction', 'prediction_label', 'model_version'
             )
         }),
         ('Fechas', {
@@ -106,6 +154,7 @@ class DropoutPredictionAdmin(admin.ModelAdmin):
         urls = super().get_urls()
         custom_urls = [
             path('predict-all-students/', self.admin_site.admin_view(self.predict_all_students_view), name='prediction_dropoutprediction_predict_all'),
+            path('export/', self.admin_site.admin_view(self.export_view), name='prediction_dropoutprediction_export'),
         ]
         return custom_urls + urls
 
@@ -115,144 +164,119 @@ class DropoutPredictionAdmin(admin.ModelAdmin):
         return super().changelist_view(request, extra_context=extra_context)
 
     def predict_all_students_view(self, request):
-        """Vista para ejecutar predicción de todos los estudiantes"""
+        """Encola la predicción de todos los estudiantes para el worker en segundo plano"""
         if not request.user.is_staff:
             messages.error(request, 'No tienes permisos para realizar esta acción.')
             return redirect('admin:prediction_dropoutprediction_changelist')
         
         from django.contrib.auth.models import User
-        from .models import StudentCharacteristics
-        from .views import load_model
-        import pandas as pd
+        from .jobs import enqueue_rescore
         
-        try:
-            # Obtener todos los usuarios que no son staff (estudiantes)
-            students = User.objects.filter(is_staff=False)
-            
-            if not students.exists():
-                messages.warning(request, 'No hay estudiantes registrados.')
-                return redirect('admin:prediction_dropoutprediction_changelist')
-            
-            # Cargar el modelo
-            model = load_model()
-            
-            predictions_created = 0
-            predictions_updated = 0
-            errors = []
-            
-            with transaction.atomic():
-                for student in students:
-                    try:
-                        # Obtener o crear características del estudiante
-                        characteristics, created = StudentCharacteristics.objects.get_or_create(
-                            user=student,
-                            defaults={
-                                'marital_status': 1,
-                                'application_mode': 1,
-                                'application_order': 1,
-                                'daytime_evening_attendance': 1,
-                                'previous_qualification': 1,
-                                'nacionality': 1,
-                                'mother_qualification': 1,
-                                'father_qualification': 1,
-                                'mother_occupation': 1,
-                                'father_occupation': 1,
-                                'gender': 1,
-                                'age_at_enrollment': 20,
-                            }
-                        )
-                        
-                        # Validar que tenga curso asignado
-                        if not characteristics.course:
-                            errors.append(f"Estudiante {student.username} no tiene curso asignado")
-                            continue
-                        
-                        # Convertir características al formato que espera el modelo
-                        student_data = {
-                            "Marital status": characteristics.marital_status,
-                            "Application mode": characteristics.application_mode,
-                            "Application order": characteristics.application_order,
-                            "Course": characteristics.course.codigo,
-                            "Daytime/evening attendance": characteristics.daytime_evening_attendance,
-                            "Previous qualification": characteristics.previous_qualification,
-                            "Nacionality": characteristics.nacionality,
-                            "Mother's qualification": characteristics.mother_qualification,
-                            "Father's qualification": characteristics.father_qualification,
-                            "Mother's occupation": characteristics.mother_occupation,
-                            "Father's occupation": characteristics.father_occupation,
-                            "Displaced": characteristics.displaced,
-                            "Educational special needs": characteristics.educational_special_needs,
-                            "Debtor": characteristics.debtor,
-                            "Tuition fees up to date": characteristics.tuition_fees_up_to_date,
-                            "Gender": characteristics.gender,
-                            "Scholarship holder": characteristics.scholarship_holder,
-                            "Age at enrollment": characteristics.age_at_enrollment,
-                            "International": characteristics.international,
-                            "Curricular units 1st sem (credited)": characteristics.curricular_units_1st_sem_credited,
-                            "Curricular units 1st sem (enrolled)": characteristics.curricular_units_1st_sem_enrolled,
-                            "Curricular units 1st sem (evaluations)": characteristics.curricular_units_1st_sem_evaluations,
-                            "Curricular units 1st sem (approved)": characteristics.curricular_units_1st_sem_approved,
-                            "Curricular units 1st sem (grade)": characteristics.curricular_units_1st_sem_grade,
-                            "Curricular units 1st sem (without evaluations)": characteristics.curricular_units_1st_sem_without_evaluations,
-                            "Curricular units 2nd sem (credited)": characteristics.curricular_units_2nd_sem_credited,
-                            "Curricular units 2nd sem (enrolled)": characteristics.curricular_units_2nd_sem_enrolled,
-                            "Curricular units 2nd sem (evaluations)": characteristics.curricular_units_2nd_sem_evaluations,
-                            "Curricular units 2nd sem (approved)": characteristics.curricular_units_2nd_sem_approved,
-                            "Curricular units 2nd sem (grade)": characteristics.curricular_units_2nd_sem_grade,
-                            "Curricular units 2nd sem (without evaluations)": characteristics.curricular_units_2nd_sem_without_evaluations,
-                            "Unemployment rate": characteristics.unemployment_rate,
-                            "Inflation rate": characteristics.inflation_rate,
-                            "GDP": characteristics.gdp,
-                        }
-                        
-                        # Convertir a DataFrame
-                        student_df = pd.DataFrame([student_data])
-                        
-                        # Hacer predicción
-                        risk_score = model.predict_proba(student_df)[0][1]
-                        prediction = model.predict(student_df)[0]
-                        
-                        # Clasificar el riesgo
-                        if risk_score < 0.3:
-                            risk_level = "Bajo"
-                        elif risk_score < 0.6:
-                            risk_level = "Medio"
-                        else:
-                            risk_level = "Alto"
-                        
-                        # Crear o actualizar predicción
-                        prediction_obj, created = DropoutPrediction.objects.update_or_create(
-                            user=student,
-                            defaults={
-                                'student_characteristics': characteristics,
-                                'risk_score': float(risk_score),
-                                'risk_percentage': float(risk_score * 100),
-                                'risk_level': risk_level,
-                                'prediction': int(prediction),
-                                'prediction_label': 'Deserción' if prediction == 1 else 'No deserción',
-                            }
-                        )
-                        
-                        if created:
-                            predictions_created += 1
-                        else:
-                            predictions_updated += 1
-                            
-                    except Exception as e:
-                        errors.append(f"Error con estudiante {student.username}: {str(e)}")
-                        continue
-            
-            # Mostrar mensajes
-            if predictions_created > 0:
-                messages.success(request, f'Se crearon {predictions_created} nuevas predicciones.')
-            if predictions_updated > 0:
-                messages.info(request, f'Se actualizaron {predictions_updated} predicciones existentes.')
-            if errors:
-                messages.warning(request, f'Se encontraron {len(errors)} errores durante el proceso.')
-                for error in errors[:10]:  # Mostrar solo los primeros 10 errores
-                    messages.warning(request, error)
-            
-        except Exception as e:
-            messages.error(request, f'Error al procesar las predicciones: {str(e)}')
+        # Obtener todos los usuarios que no son staff (estudiantes)
+        if not User.objects.filter(is_staff=False).exists():
+            messages.warning(request, 'No hay estudiantes registrados.')
+            return redirect('admin:prediction_dropoutprediction_changelist')
+        
+        # Por defecto solo se re-evalúan los estudiantes con predicción obsoleta;
+        # ?full=1 fuerza la re-evaluación de todos
+        incremental = request.GET.get('full') != '1'
+        job, created = enqueue_rescore(requested_by=request.user, incremental=incremental)
+        if created:
+            messages.success(
+                request,
+                f'Se encoló el trabajo {job.pk}. El worker (manage.py run_prediction_worker) '
+                f'lo procesará en segundo plano.'
+            )
+        else:
+            messages.info(request, f'Ya hay un trabajo de predicción en curso ({job}).')
         
-        return redirect('admin:prediction_dropoutprediction_changelist')
+        return redirect('admin:prediction_predictionjob_change', job.pk)
+
+    def export_view(self, request):
+        """Descarga la última predicción de cada estudiante con sus características (CSV o Parquet)"""
+        if not self.has_view_permission(request):
+            messages.error(request, 'No tienes permisos para realizar esta acción.')
+            return redirect('admin:prediction_dropoutprediction_changelist')
+
+        from .export import iter_csv, iter_parquet, parquet_available
+
+        filename = f"predicciones_{timezone.now():%Y%m%d-%H%M%S}"
+        if request.GET.get('format') == 'parquet':
+            if not parquet_available():
+                messages.error(request, 'La exportación a Parquet requiere pyarrow.')
+                return redirect('admin:prediction_dropoutprediction_changelist')
+            # Cada row group se envía en cuanto se escribe; el pie va al final
+            response = StreamingHttpResponse(iter_parquet(), content_type='application/vnd.apache.parquet')
+            response['Content-Disposition'] = f'attachment; filename="{filename}.parquet"'
+            return response
+
+        response = StreamingHttpResponse(iter_csv(), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+        return response
+
+
+@admin.register(ModelVersion)
+class ModelVersionAdmin(admin.ModelAdmin):
+    list_display = ['version', 'is_active', 'artifact_path', 'created_at', 'activated_at']
+    list_filter = ['is_active', 'created_at']
+    search_fields = ['version', 'notes']
+    readonly_fields = ['is_active', 'created_at', 'activated_at']
+    actions = ['activate_version']
+
+    @admin.action(description='Activar la versión seleccionada')
+    def activate_version(self, request, queryset):
+        if queryset.count() != 1:
+            messages.error(request, 'Selecciona exactamente una versión para activar.')
+            return
+        model_version = queryset.first()
+        model_version.activate()
+        messages.success(
+            request,
+            f'Versión {model_version.version} activada. Los workers la cargarán sin reiniciarse.'
+        )
+
+
+@admin.register(PredictionJob)
+class PredictionJobAdmin(admin.ModelAdmin):
+    list_display = [
+        'id', 'status', 'incremental', 'progress_display', 'processed', 'failed', 'total',
+        'throughput_display', 'requested_by', 'created_at', 'finished_at',
+    ]
+    list_filter = ['status', 'incremental', 'created_at']
+    readonly_fields = [
+        'status', 'incremental', 'requested_by', 'total', 'processed', 'failed', 'progress_display',
+        'throughput_display', 'elapsed_display', 'worker', 'errors',
+        'created_at', 'started_at', 'heartbeat_at', 'finished_at',
+    ]
+    fieldsets = (
+        ('Progreso', {
+            'fields': (
+                'status', 'progress_display', 'processed', 'failed', 'total',
+                'throughput_display', 'elapsed_display',
+            )
+        }),
+        ('Detalles', {
+            'fields': ('incremental', 'requested_by', 'worker', 'errors')
+        }),
+        ('Fechas', {
+            'fields': ('created_at', 'started_at', 'heartbeat_at', 'finished_at'),
+        }),
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def progress_display(self, obj):
+        return f"{obj.progress_percentage:.1f}%"
+    progress_display.short_description = 'Progreso'
+
+    def throughput_display(self, obj):
+        return f"{obj.throughput:.0f} estudiantes/s"
+    throughput_display.short_description = 'Velocidad'
+
+    def elapsed_display(self, obj):
+        return f"{obj.elapsed_seconds:.2f} s"
+    elapsed_display.short_description = 'Duración'
@@ -1,7 +1,24 @@
+import logging
+
 from django.apps import AppConfig
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
 
 
 class PredictionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.prediction'
 
+    def ready(self):
+        # Re-evaluación al guardar características (opcional)
+        if getattr(settings, 'PREDICTION_REALTIME_RESCORE', False):
+            from . import signals  # noqa: F401
+
+        # Precargar el modelo al arrancar el proceso en lugar de en la primera petición
+        if getattr(settings, 'PREDICTION_PRELOAD_MODEL', False):
+            from .scoring import warm_up
+            try:
+                warm_up()
+            except FileNotFoundError as e:
+                logger.warning("No se pudo precargar el modelo de predicción: %s", e)
@@ -0,0 +1,234 @@
+"""
+Re-evaluación masiva de estudiantes.
+
+Recorre ``StudentCharacteristics`` por bloques (filas de ``values_list`` con el
+curso ya resuelto por JOIN), evalúa cada bloque con una sola inferencia
+matricial y guarda las predicciones con ``bulk_create`` / ``bulk_update``.
+Cada bloque se guarda en su propia transacción, de modo que
+un error no revierte el trabajo ya hecho.
+
+En modo incremental solo se evalúan los estudiantes cuya predicción más
+reciente no corresponde a su huella de características actual o a la versión
+activa del modelo (ver ``stale_characteristics``).
+"""
+import time
+from dataclasses import dataclass, field
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Subquery
+from django.utils import timezone
+
+from .features import FIELD_NAMES, ORM_LOOKUPS, fingerprint, rows_to_array
+from .models import StudentCharacteristics, DropoutPrediction
+from .scoring import active_model, score, build_result
+
+# Estudiantes por bloque (consulta, inferencia y escritura)
+CHUNK_SIZE = getattr(settings, 'PREDICTION_BULK_CHUNK_SIZE', 2000)
+
+# Valores con los que se crean las características de estudiantes que no tienen
+DEFAULT_CHARACTERISTICS = {
+    'marital_status': 1,
+    'application_mode': 1,
+    'application_order': 1,
+    'daytime_evening_attendance': 1,
+    'previous_qualification': 1,
+    'nacionality': 1,
+    'mother_qualification': 1,
+    'father_qualification': 1,
+    'mother_occupation': 1,
+    'father_occupation': 1,
+    'gender': 1,
+    'age_at_enrollment': 20,
+}
+
+PREDICTION_FIELDS = [
+    'student_characteristics', 'risk_score', 'risk_percentage', 'risk_level',
+    'prediction', 'prediction_label', 'model_version', 'features_fingerprint', 'updated_at',
+]
+
+# Columnas de cada fila antes de las características: pk, user_id, username, fingerprint
+ROW_PREFIX = ('pk', 'user_id', 'user__username', 'fingerprint')
+
+
+@dataclass
+class RescoreStats:
+    """Resumen de una re-evaluación masiva"""
+    created: int = 0
+    updated: int = 0
+    failed: int = 0  # Estudiantes no evaluados (puede haber menos mensajes en errors)
+    errors: list = field(default_factory=list)
+    started_at: float = field(default_factory=time.perf_counter)
+
+    @property
+    def processed(self):
+        return self.created + self.updated
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started_at
+
+    @property
+    def rows_per_second(self):
+        elapsed = self.elapsed
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+
+def ensure_characteristics():
+    """
+    Crea características por defecto para los estudiantes que aún no tienen.
+    Devuelve el número de registros creados.
+    """
+    missing_user_ids = User.objects.filter(
+        is_staff=False,
+        student_characteristics__isnull=True,
+    ).values_list('pk', flat=True)
+
+    to_create = [
+        StudentCharacteristics(user_id=user_id, **DEFAULT_CHARACTERISTICS)
+        for user_id in missing_user_ids
+    ]
+    StudentCharacteristics.objects.bulk_create(to_create, batch_size=CHUNK_SIZE)
+    return len(to_create)
+
+
+def _chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _latest_prediction_ids(user_ids):
+    """Mapa user_id -> id de su predicción más reciente (una sola consulta)"""
+    latest = {}
+    rows = DropoutPrediction.objects.filter(
+        user_id__in=user_ids,
+    ).order_by('user_id', '-created_at').values_list('user_id', 'pk')
+    for user_id, pk in rows:
+        latest.setdefault(user_id, pk)
+    return latest
+
+
+def stale_characteristics(queryset, model_version):
+    """
+    Filtra ``queryset`` a los estudiantes cuya predicción más reciente falta,
+    se calculó con otra versión del modelo o con otras características.
+
+    Es una sola consulta: un ``NOT EXISTS`` correlacionado que localiza la
+    última predicción de cada usuario con el índice ``(user, -created_at)``.
+    """
+    latest_pk = (
+        DropoutPrediction.objects
+        .filter(user_id=OuterRef(OuterRef('user_id')))
+        .order_by('-created_at')
+        .values('pk')[:1]
+    )
+    up_to_date = (
+        DropoutPrediction.objects
+        .filter(
+            pk=Subquery(latest_pk),
+            model_version=model_version,
+            features_fingerprint=OuterRef('fingerprint'),
+        )
+        .exclude(features_fingerprint='')
+    )
+    return queryset.filter(~Exists(up_to_date))
+
+
+def score_chunk(rows, loaded_model, stats):
+    """
+    Evalúa y guarda un bloque de filas ``(*ROW_PREFIX, *ORM_LOOKUPS)`` tal
+    como las devuelve ``values_list``.
+    """
+    offset = len(ROW_PREFIX)
+    course_index = offset + FIELD_NAMES.index('course')
+    scorable = []
+    for row in rows:
+        if row[course_index] is None:
+            stats.errors.append(f"Estudiante {row[2]} no tiene curso asignado")
+            stats.failed += 1
+            continue
+        scorable.append(row)
+
+    if not scorable:
+        return
+
+    features = rows_to_array([row[offset:] for row in scorable])
+    fingerprints = [fingerprint(vector) for vector in features]
+    risk_scores, predictions = score(features, model=loaded_model.model)
+
+    existing = _latest_prediction_ids([row[1] for row in scorable])
+    now = timezone.now()
+    to_create = []
+    to_update = []
+    # Huellas ausentes u obsoletas (filas escritas sin pasar por save())
+    characteristics_to_update = []
+    rows = zip(scorable, fingerprints, risk_scores, predictions)
+    for row, features_fingerprint, risk_score, prediction in rows:
+        characteristics_id, user_id, _username, stored_fingerprint = row[:len(ROW_PREFIX)]
+        prediction_obj = DropoutPrediction(
+            pk=existing.get(user_id),
+            user_id=user_id,
+            student_characteristics_id=characteristics_id,
+            features_fingerprint=features_fingerprint,
+            updated_at=now,
+            **build_result(risk_score, prediction, loaded_model.version),
+        )
+        if prediction_obj.pk is None:
+            to_create.append(prediction_obj)
+        else:
+            to_update.append(prediction_obj)
+        if stored_fingerprint != features_fingerprint:
+            characteristics_to_update.append(
+                StudentCharacteristics(pk=characteristics_id, fingerprint=features_fingerprint)
+            )
+
+    with transaction.atomic():
+        DropoutPrediction.objects.bulk_update(to_update, PREDICTION_FIELDS, batch_size=CHUNK_SIZE)
+        DropoutPrediction.objects.bulk_create(to_create, batch_size=CHUNK_SIZE)
+        StudentCharacteristics.objects.bulk_update(characteristics_to_update, ['fingerprint'], batch_size=CHUNK_SIZE)
+
+    stats.created += len(to_create)
+    stats.updated += len(to_update)
+
+
+def rescore_students(queryset=None, chunk_size=None, loaded_model=None, progress=None, incremental=False):
+    """
+    Re-evalúa a todos los estudiantes (o a los de ``queryset``) por bloques.
+
+    Args:
+        queryset: Queryset de ``StudentCharacteristics`` a evaluar
+        chunk_size: Estudiantes por bloque (por defecto ``CHUNK_SIZE``)
+        loaded_model: ``LoadedModel`` a usar (por defecto el modelo activo)
+        progress: Callable opcional que recibe ``RescoreStats`` tras cada bloque
+        incremental: Evaluar solo los estudiantes de ``stale_characteristics``
+
+    Returns:
+        ``RescoreStats`` con el resumen del proceso.
+    """
+    chunk_size = chunk_size or CHUNK_SIZE
+    if loaded_model is None:
+        loaded_model = active_model()
+    if queryset is None:
+        queryset = StudentCharacteristics.objects.filter(user__is_staff=False)
+    if incremental:
+        queryset = stale_characteristics(queryset, loaded_model.version)
+
+    stats = RescoreStats()
+    rows = (
+        queryset
+        .order_by('pk')
+        .values_list(*ROW_PREFIX, *ORM_LOOKUPS)
+        .iterator(chunk_size=chunk_size)
+    )
+    for chunk in _chunked(rows, chunk_size):
+        try:
+            score_chunk(chunk, loaded_model, stats)
+        except Exception as e:
+            stats.errors.append(f"Error en un bloque de {len(chunk)} estudiantes: {str(e)}")
+            stats.failed += len(chunk)
+        if progress:
+            progress(stats)
+    return stats
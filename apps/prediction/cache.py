@@ -0,0 +1,161 @@
+"""
+Cache de resultados de predicción.
+
+La clave es un hash estable del vector de características canónico (la fila
+``float64`` en el orden de ``FEATURES``) junto con la versión del modelo, y el
+valor es el ``risk_score``; la etiqueta se deriva con el umbral vigente, así
+que cambiar ``PREDICTION_DECISION_THRESHOLD`` no deja resultados obsoletos.
+
+Hay dos niveles:
+
+* LRU en memoria del proceso (``PREDICTION_CACHE_SIZE`` entradas, 0 lo
+  desactiva). Se vacía en cuanto cambia la versión activa del modelo.
+* Opcionalmente, un backend de ``CACHES`` de Django
+  (``PREDICTION_CACHE_BACKEND``) compartido entre workers. Como la versión
+  forma parte de la clave, las entradas de versiones anteriores simplemente
+  dejan de consultarse y expiran con ``PREDICTION_CACHE_TIMEOUT``.
+"""
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+
+from .features import fingerprint
+
+logger = logging.getLogger(__name__)
+
+CACHE_SIZE = getattr(settings, 'PREDICTION_CACHE_SIZE', 10000)
+CACHE_BACKEND = getattr(settings, 'PREDICTION_CACHE_BACKEND', None)
+CACHE_TIMEOUT = getattr(settings, 'PREDICTION_CACHE_TIMEOUT', 3600)
+
+KEY_PREFIX = 'prediction'
+
+
+def feature_key(version, row):
+    """Clave de cache de un vector de características para una versión del modelo"""
+    return f'{KEY_PREFIX}:{version}:{fingerprint(row)}'
+
+
+class PredictionCache:
+    """LRU en memoria con un segundo nivel opcional en un backend de Django"""
+
+    def __init__(self, maxsize=CACHE_SIZE, backend=CACHE_BACKEND, timeout=CACHE_TIMEOUT):
+        self.maxsize = maxsize
+        self.backend = backend
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self.hits = 0
+        self.backend_hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        return self.maxsize > 0 or bool(self.backend)
+
+    def _switch_version(self, version):
+        # Llamar con el lock tomado
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+    def lookup(self, version, students):
+        """
+        Busca cada fila de ``students`` en la cache.
+
+        Returns:
+            Tupla ``(keys, risk_scores, missing)``: claves por fila, arreglo de
+            ``risk_score`` (``nan`` donde no hubo acierto) y máscara de filas
+            que hay que evaluar con el modelo.
+        """
+        keys = [feature_key(version, row) for row in students]
+        risk_scores = np.full(len(keys), np.nan, dtype=np.float64)
+
+        with self._lock:
+            self._switch_version(version)
+            for i, key in enumerate(keys):
+                value = self._entries.get(key)
+                if value is not None:
+                    self._entries.move_to_end(key)
+                    risk_scores[i] = value
+            local_hits = int(np.count_nonzero(~np.isnan(risk_scores)))
+            self.hits += local_hits
+
+        missing = np.isnan(risk_scores)
+        if self.backend and missing.any():
+            pending = [keys[i] for i in np.flatnonzero(missing)]
+            found = self._backend_get_many(pending)
+            if found:
+                for i in np.flatnonzero(missing):
+                    if keys[i] in found:
+                        risk_scores[i] = found[keys[i]]
+                self._remember(version, found)
+                with self._lock:
+                    self.backend_hits += len(found)
+                missing = np.isnan(risk_scores)
+
+        with self._lock:
+            self.misses += int(np.count_nonzero(missing))
+        return keys, risk_scores, missing
+
+    def store(self, version, keys, risk_scores):
+        """Guarda los ``risk_score`` recién calculados para ``keys``"""
+        entries = {key: float(value) for key, value in zip(keys, risk_scores)}
+        self._remember(version, entries)
+        if self.backend:
+            self._backend_set_many(entries)
+
+    def _remember(self, version, entries):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            # Resultados de una versión que ya no está activa no se guardan
+            if version != self._version:
+                return
+            for key, value in entries.items():
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _backend_get_many(self, keys):
+        try:
+            return caches[self.backend].get_many(keys)
+        except Exception:
+            logger.warning("No se pudo leer la cache de predicciones '%s'", self.backend, exc_info=True)
+            return {}
+
+    def _backend_set_many(self, entries):
+        try:
+            caches[self.backend].set_many(entries, timeout=self.timeout)
+        except Exception:
+            logger.warning("No se pudo escribir la cache de predicciones '%s'", self.backend, exc_info=True)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.backend_hits = self.misses = 0
+
+    def stats(self):
+        """Contadores de este proceso para el health check"""
+        with self._lock:
+            hits = self.hits + self.backend_hits
+            total = hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'backend': self.backend,
+                'model_version': self._version,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'backend_hits': self.backend_hits,
+                'misses': self.misses,
+                'hit_rate': round(hits / total, 4) if total else None,
+            }
+
+
+prediction_cache = PredictionCache()
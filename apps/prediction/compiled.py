@@ -0,0 +1,174 @@
+"""
+Motor de inferencia compilado para bosques de árboles de sklearn.
+
+Exporta los árboles de un ``RandomForestClassifier`` (o ``ExtraTreesClassifier``
+/ ``DecisionTreeClassifier``) a arreglos NumPy planos (feature, threshold,
+hijo izquierdo, hijo derecho y probabilidades de hoja de todos los nodos) y
+recorre todos los árboles a la vez con operaciones vectorizadas. Evita el
+costo fijo de ``predict_proba`` de sklearn en cada llamada (validación de la
+entrada, revisión de nombres de columnas y despacho con joblib por árbol), que
+domina la latencia cuando se evalúa un solo estudiante.
+
+Las probabilidades son las mismas que las de sklearn: la entrada se convierte
+a ``float32`` igual que en ``sklearn.tree`` y cada hoja se normaliza igual que
+``DecisionTreeClassifier.predict_proba``.
+
+Los ``Pipeline`` que genera ``train_dropout_model`` se compilan aplicando el
+``StandardScaler`` como una operación afín sobre la matriz y luego el bosque
+compilado del último paso.
+"""
+import numpy as np
+
+# Máximo de celdas (filas x árboles) por bloque, para acotar la memoria temporal
+MAX_BLOCK_CELLS = 1_000_000
+
+
+class FlatForest:
+    """Bosque de árboles de clasificación en arreglos planos"""
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, classes, n_features):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.classes_ = classes
+        self.n_features_in_ = n_features
+
+    @classmethod
+    def from_sklearn(cls, estimator):
+        """Compila un bosque o árbol de clasificación ya entrenado"""
+        from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+        from sklearn.tree import DecisionTreeClassifier
+
+        if isinstance(estimator, (RandomForestClassifier, ExtraTreesClassifier)):
+            trees = estimator.estimators_
+        elif isinstance(estimator, DecisionTreeClassifier):
+            trees = [estimator]
+        else:
+            raise TypeError(f"{type(estimator).__name__} no es un bosque de árboles de clasificación")
+        if estimator.n_outputs_ != 1:
+            raise TypeError("Solo se admiten clasificadores de una salida")
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for tree in trees:
+            t = tree.tree_
+            is_leaf = t.children_left == -1
+            # En las hojas los hijos apuntan al propio nodo, así el recorrido se estabiliza
+            node_ids = np.arange(t.node_count)
+            features.append(np.where(is_leaf, 0, t.feature))
+            thresholds.append(np.where(is_leaf, np.inf, t.threshold))
+            lefts.append(np.where(is_leaf, node_ids, t.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, t.children_right) + offset)
+
+            # Normalizar como DecisionTreeClassifier.predict_proba
+            value = t.value[:, 0, :].astype(np.float64)
+            normalizer = value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            values.append(value / normalizer)
+
+            roots.append(offset)
+            offset += t.node_count
+            max_depth = max(max_depth, t.max_depth)
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features), dtype=np.intp),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+            left=np.ascontiguousarray(np.concatenate(lefts), dtype=np.intp),
+            right=np.ascontiguousarray(np.concatenate(rights), dtype=np.intp),
+            value=np.ascontiguousarray(np.concatenate(values), dtype=np.float64),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max_depth,
+            classes=estimator.classes_,
+            n_features=estimator.n_features_in_,
+        )
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def apply(self, X):
+        """Índice global de la hoja alcanzada en cada árbol: matriz ``(n, n_trees)``"""
+        # Misma conversión que sklearn.tree (float32) antes de comparar con los umbrales
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Se esperaban {self.n_features_in_} columnas y se recibieron {X.shape[1]}")
+
+        nodes = np.broadcast_to(self.roots, (X.shape[0], self.n_trees)).copy()
+        rows = np.arange(X.shape[0])[:, None]
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_proba(self, X):
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        block_rows = max(1, MAX_BLOCK_CELLS // self.n_trees)
+        proba = np.empty((X.shape[0], len(self.classes_)), dtype=np.float64)
+        for start in range(0, X.shape[0], block_rows):
+            leaves = self.apply(X[start:start + block_rows])
+            proba[start:start + block_rows] = self.value[leaves].mean(axis=1)
+        return proba
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+class FlatPipeline:
+    """``StandardScaler`` (opcional) seguido de un ``FlatForest``"""
+
+    def __init__(self, scalers, forest):
+        self.scalers = scalers  # Lista de (media, escala) en orden de aplicación
+        self.forest = forest
+        self.classes_ = forest.classes_
+        self.n_features_in_ = forest.n_features_in_
+
+    @classmethod
+    def from_sklearn(cls, pipeline):
+        from sklearn.preprocessing import StandardScaler
+
+        scalers = []
+        for name, step in pipeline.steps[:-1]:
+            if step is None or step == 'passthrough':
+                continue
+            if not isinstance(step, StandardScaler):
+                raise TypeError(f"Paso '{name}' ({type(step).__name__}) no se puede compilar")
+            mean = step.mean_ if step.with_mean else None
+            scale = step.scale_ if step.with_std else None
+            scalers.append((mean, scale))
+        return cls(scalers, FlatForest.from_sklearn(pipeline.steps[-1][1]))
+
+    def transform(self, X):
+        X = np.array(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        # Mismas operaciones que StandardScaler.transform
+        for mean, scale in self.scalers:
+            if mean is not None:
+                X -= mean
+            if scale is not None:
+                X /= scale
+        return X
+
+    def predict_proba(self, X):
+        return self.forest.predict_proba(self.transform(X))
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+def compile_model(model):
+    """Devuelve la versión compilada de ``model`` o lanza ``TypeError`` si no se admite"""
+    from sklearn.pipeline import Pipeline
+
+    if isinstance(model, Pipeline):
+        return FlatPipeline.from_sklearn(model)
+    return FlatForest.from_sklearn(model)
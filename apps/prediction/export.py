@@ -0,0 +1,191 @@
+"""
+Exportación masiva de predicciones.
+
+Une la predicción más reciente de cada estudiante con sus características y
+su curso y la escribe como CSV o como Parquet (si ``pyarrow`` está
+instalado); ambos formatos se pueden generar en streaming para
+``StreamingHttpResponse``. Las filas se leen por bloques
+de ``PREDICTION_EXPORT_CHUNK_SIZE`` con paginación por clave primaria, así que
+la memoria no crece con el tamaño de la tabla (MySQL no tiene cursores del
+lado del servidor y ``iterator()`` por sí solo cargaría todo el resultado).
+"""
+import csv
+import io
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Exists, OuterRef
+
+from .features import FEATURES
+from .models import DropoutPrediction
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet es opcional
+    pa = pq = None
+
+CHUNK_SIZE = getattr(settings, 'PREDICTION_EXPORT_CHUNK_SIZE', 5000)
+
+_CHARACTERISTICS = 'user__student_characteristics__'
+
+# (encabezado, ruta ORM desde DropoutPrediction, tipo)
+EXPORT_COLUMNS = (
+    ('user_id', 'user_id', 'int'),
+    ('username', 'user__username', 'str'),
+    ('email', 'user__email', 'str'),
+    ('risk_score', 'risk_score', 'float'),
+    ('risk_percentage', 'risk_percentage', 'float'),
+    ('risk_level', 'risk_level', 'str'),
+    ('prediction', 'prediction', 'int'),
+    ('prediction_label', 'prediction_label', 'str'),
+    ('model_version', 'model_version', 'str'),
+    ('predicted_at', 'created_at', 'datetime'),
+    ('updated_at', 'updated_at', 'datetime'),
+    ('course_code', f'{_CHARACTERISTICS}course__codigo', 'int'),
+    ('course_name', f'{_CHARACTERISTICS}course__nombre', 'str'),
+) + tuple(
+    (feature.field, f'{_CHARACTERISTICS}{feature.field}', 'int' if feature.dtype is int else 'float')
+    for feature in FEATURES
+    if feature.field != 'course'
+)
+
+HEADERS = tuple(header for header, _, _ in EXPORT_COLUMNS)
+LOOKUPS = tuple(lookup for _, lookup, _ in EXPORT_COLUMNS)
+
+
+def latest_predictions():
+    """Predicción más reciente de cada estudiante"""
+    newer = DropoutPrediction.objects.filter(
+        user_id=OuterRef('user_id'),
+        created_at__gt=OuterRef('created_at'),
+    )
+    return DropoutPrediction.objects.filter(~Exists(newer))
+
+
+def iter_chunks(queryset=None, chunk_size=None):
+    """
+    Produce listas de hasta ``chunk_size`` filas con los valores de
+    ``EXPORT_COLUMNS``, paginando por ``pk`` (una consulta acotada por bloque).
+    """
+    chunk_size = chunk_size or CHUNK_SIZE
+    if queryset is None:
+        queryset = latest_predictions()
+    queryset = queryset.order_by('pk').values_list('pk', *LOOKUPS)
+
+    last_pk = 0
+    while True:
+        rows = list(queryset.filter(pk__gt=last_pk)[:chunk_size].iterator(chunk_size=chunk_size))
+        if not rows:
+            return
+        last_pk = rows[-1][0]
+        yield [row[1:] for row in rows]
+
+
+class _Echo:
+    """Pseudo-archivo: ``csv.writer`` devuelve la línea en lugar de guardarla"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(queryset=None, chunk_size=None):
+    """Genera el CSV por bloques (un ``str`` por bloque) para ``StreamingHttpResponse``"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(HEADERS)
+    for rows in iter_chunks(queryset, chunk_size):
+        yield ''.join(writer.writerow(row) for row in rows)
+
+
+def write_csv(destination, queryset=None, chunk_size=None):
+    """Escribe el CSV en un archivo de texto abierto; devuelve el número de filas"""
+    writer = csv.writer(destination)
+    writer.writerow(HEADERS)
+    total = 0
+    for rows in iter_chunks(queryset, chunk_size):
+        writer.writerows(rows)
+        total += len(rows)
+    return total
+
+
+def parquet_available():
+    return pa is not None
+
+
+def _parquet_schema():
+    if pa is None:
+        raise ImproperlyConfigured("La exportación a Parquet requiere pyarrow (pip install pyarrow)")
+
+    arrow_types = {
+        'int': pa.int64(),
+        'float': pa.float64(),
+        'str': pa.string(),
+        'datetime': pa.timestamp('us', tz=settings.TIME_ZONE if settings.USE_TZ else None),
+    }
+    return pa.schema([(header, arrow_types[kind]) for header, _, kind in EXPORT_COLUMNS])
+
+
+def _parquet_table(rows, schema):
+    columns = zip(*rows)
+    arrays = [pa.array(values, type=field.type) for values, field in zip(columns, schema)]
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def write_parquet(destination, queryset=None, chunk_size=None):
+    """
+    Escribe un archivo Parquet (un row group por bloque); devuelve el número
+    de filas. ``destination`` es una ruta o un archivo binario abierto.
+    """
+    schema = _parquet_schema()
+    total = 0
+    with pq.ParquetWriter(destination, schema) as writer:
+        for rows in iter_chunks(queryset, chunk_size):
+            writer.write_table(_parquet_table(rows, schema))
+            total += len(rows)
+    return total
+
+
+class _StreamSink(io.RawIOBase):
+    """
+    Archivo de solo escritura que acumula los bytes hasta que se leen con
+    ``drain``: ``ParquetWriter`` escribe en él y ``iter_parquet`` entrega lo
+    escrito después de cada row group.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def iter_parquet(queryset=None, chunk_size=None):
+    """
+    Genera el Parquet por bloques (``bytes`` de cada row group y al final el
+    pie) para ``StreamingHttpResponse``: solo un bloque queda en memoria.
+    """
+    schema = _parquet_schema()
+    sink = _StreamSink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for rows in iter_chunks(queryset, chunk_size):
+            writer.write_table(_parquet_table(rows, schema))
+            if data := sink.drain():
+                yield data
+    if data := sink.drain():
+        yield data
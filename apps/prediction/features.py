@@ -0,0 +1,176 @@
+"""
+Esquema canónico de las características del modelo de deserción.
+
+Define una sola vez el orden de las 34 columnas con las que se entrenó el
+modelo (``análisis/dataset.csv``), el nombre del campo en el API y en
+``StudentCharacteristics``, su tipo y su valor por defecto. El API, el admin y
+los comandos convierten sus datos directamente a una matriz ``float64``
+contigua con este esquema, sin construir diccionarios ni DataFrames por fila.
+"""
+import hashlib
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+DTYPE = np.float64
+
+
+@dataclass(frozen=True)
+class Feature:
+    """Una columna del modelo"""
+    field: str  # Nombre en el API y en StudentCharacteristics
+    column: str  # Nombre de la columna en el dataset de entrenamiento
+    dtype: type = int
+    required: bool = False
+    default: float = 0
+    lookup: str = None  # Ruta ORM si difiere de ``field``
+
+    @property
+    def orm_lookup(self):
+        return self.lookup or self.field
+
+
+FEATURES = (
+    Feature("marital_status", "Marital status", required=True),
+    Feature("application_mode", "Application mode", required=True),
+    Feature("application_order", "Application order", required=True),
+    Feature("course", "Course", required=True, lookup="course__codigo"),
+    Feature("daytime_evening_attendance", "Daytime/evening attendance", required=True),
+    Feature("previous_qualification", "Previous qualification", required=True),
+    Feature("nacionality", "Nacionality", required=True),
+    Feature("mother_qualification", "Mother's qualification", required=True),
+    Feature("father_qualification", "Father's qualification", required=True),
+    Feature("mother_occupation", "Mother's occupation", required=True),
+    Feature("father_occupation", "Father's occupation", required=True),
+    Feature("displaced", "Displaced"),
+    Feature("educational_special_needs", "Educational special needs"),
+    Feature("debtor", "Debtor"),
+    Feature("tuition_fees_up_to_date", "Tuition fees up to date"),
+    Feature("gender", "Gender", required=True),
+    Feature("scholarship_holder", "Scholarship holder"),
+    Feature("age_at_enrollment", "Age at enrollment", required=True),
+    Feature("international", "International"),
+    Feature("curricular_units_1st_sem_credited", "Curricular units 1st sem (credited)"),
+    Feature("curricular_units_1st_sem_enrolled", "Curricular units 1st sem (enrolled)"),
+    Feature("curricular_units_1st_sem_evaluations", "Curricular units 1st sem (evaluations)"),
+    Feature("curricular_units_1st_sem_approved", "Curricular units 1st sem (approved)"),
+    Feature("curricular_units_1st_sem_grade", "Curricular units 1st sem (grade)", dtype=float, default=0.0),
+    Feature("curricular_units_1st_sem_without_evaluations", "Curricular units 1st sem (without evaluations)"),
+    Feature("curricular_units_2nd_sem_credited", "Curricular units 2nd sem (credited)"),
+    Feature("curricular_units_2nd_sem_enrolled", "Curricular units 2nd sem (enrolled)"),
+    Feature("curricular_units_2nd_sem_evaluations", "Curricular units 2nd sem (evaluations)"),
+    Feature("curricular_units_2nd_sem_approved", "Curricular units 2nd sem (approved)"),
+    Feature("curricular_units_2nd_sem_grade", "Curricular units 2nd sem (grade)", dtype=float, default=0.0),
+    Feature("curricular_units_2nd_sem_without_evaluations", "Curricular units 2nd sem (without evaluations)"),
+    Feature("unemployment_rate", "Unemployment rate", dtype=float, default=0.0),
+    Feature("inflation_rate", "Inflation rate", dtype=float, default=0.0),
+    Feature("gdp", "GDP", dtype=float, default=0.0),
+)
+
+N_FEATURES = len(FEATURES)
+FIELD_NAMES = tuple(feature.field for feature in FEATURES)
+COLUMN_NAMES = tuple(feature.column for feature in FEATURES)
+REQUIRED_FIELDS = tuple(feature.field for feature in FEATURES if feature.required)
+
+# Argumentos para ``StudentCharacteristics.objects.values_list(*ORM_LOOKUPS)``
+ORM_LOOKUPS = tuple(feature.orm_lookup for feature in FEATURES)
+
+_DEFAULTS = tuple(feature.default for feature in FEATURES)
+
+
+def validate_payload(payload):
+    """
+    Valida un estudiante recibido por el API.
+    Devuelve un mensaje de error o ``None`` si es válido.
+    """
+    if not isinstance(payload, dict):
+        return 'Cada elemento debe ser un objeto JSON'
+
+    missing_fields = [field for field in REQUIRED_FIELDS if payload.get(field) is None]
+    if missing_fields:
+        return f'Campos requeridos faltantes: {", ".join(missing_fields)}'
+
+    for feature in FEATURES:
+        value = payload.get(feature.field, feature.default)
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return f'Valor no numérico en "{feature.field}": {value!r}'
+        if not math.isfinite(number):
+            return f'Valor no finito en "{feature.field}": {value!r}'
+    return None
+
+
+def payloads_to_array(payloads):
+    """
+    Convierte estudiantes del API (ya validados) a una matriz ``(n, 34)``.
+    Los campos opcionales ausentes toman su valor por defecto.
+    """
+    matrix = np.empty((len(payloads), N_FEATURES), dtype=DTYPE)
+    for row, payload in enumerate(payloads):
+        matrix[row] = [payload.get(field, default) for field, default in zip(FIELD_NAMES, _DEFAULTS)]
+    return matrix
+
+
+def rows_to_array(rows):
+    """
+    Convierte filas de ``values_list(*ORM_LOOKUPS)`` (o cualquier secuencia
+    de valores en el orden de ``FEATURES``) a una matriz ``(n, 34)``.
+    """
+    matrix = np.array(rows, dtype=DTYPE, order='C')
+    return matrix.reshape(-1, N_FEATURES)
+
+
+def fingerprint(values):
+    """
+    Huella estable (hex de 32 caracteres) de un vector de características en
+    el orden de ``FEATURES``. Identifica el contenido con el que se evaluó a un
+    estudiante y es la clave de la cache de predicciones.
+    """
+    # + 0.0 normaliza -0.0 a 0.0 para que ambos generen la misma huella
+    row = np.ascontiguousarray(values, dtype=DTYPE) + 0.0
+    return hashlib.blake2b(row.tobytes(), digest_size=16, person=b'dropout-risk').hexdigest()
+
+
+def instance_values(characteristics):
+    """Valores de un ``StudentCharacteristics`` en el orden de ``FEATURES``"""
+    values = []
+    for feature in FEATURES:
+        if feature.field == 'course':
+            course = characteristics.course
+            values.append(course.codigo if course else None)
+        else:
+            values.append(getattr(characteristics, feature.field))
+    return values
+
+
+def instances_to_array(characteristics_list):
+    """Convierte instancias de ``StudentCharacteristics`` a una matriz ``(n, 34)``"""
+    return rows_to_array([instance_values(characteristics) for characteristics in characteristics_list])
+
+
+def schema():
+    """Esquema que se guarda dentro de los artefactos entrenados (``feature_schema_``)"""
+    return {'columns': list(COLUMN_NAMES), 'dtype': np.dtype(DTYPE).name}
+
+
+def check_schema(model):
+    """
+    Verifica que un modelo cargado espera exactamente las columnas de
+    ``FEATURES`` y en el mismo orden. Lanza ``ValueError`` si no coincide.
+
+    Usa el esquema embebido (``feature_schema_``) si existe; para artefactos
+    anteriores recurre a ``feature_names_in_`` y ``n_features_in_``.
+    """
+    embedded = getattr(model, 'feature_schema_', None)
+    if embedded is not None and list(embedded.get('columns', ())) != list(COLUMN_NAMES):
+        raise ValueError(f"El esquema del modelo no coincide con FEATURES: {embedded.get('columns')}")
+
+    names = getattr(model, 'feature_names_in_', None)
+    if names is not None and list(names) != list(COLUMN_NAMES):
+        raise ValueError(f"Las columnas del modelo no coinciden con FEATURES: {list(names)}")
+
+    n_features = getattr(model, 'n_features_in_', None)
+    if n_features is not None and n_features != N_FEATURES:
+        raise ValueError(f"El modelo espera {n_features} columnas y FEATURES define {N_FEATURES}")
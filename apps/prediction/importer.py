@@ -0,0 +1,245 @@
+"""
+Importación masiva de ``StudentCharacteristics``.
+
+Acepta archivos con las mismas columnas que ``análisis/dataset.csv`` (o con
+los nombres de campo del API) más una columna ``username`` que identifica al
+estudiante. El archivo se lee por bloques (``pandas.read_csv(chunksize=...)``
+o lotes de Parquet), cada bloque se valida con operaciones vectorizadas, los
+códigos de curso se resuelven con un diccionario precargado y las filas se
+guardan con ``bulk_create`` / ``bulk_update`` en una transacción por bloque.
+"""
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils import timezone
+
+from .features import COLUMN_NAMES, FEATURES, fingerprint
+from .models import Curso, StudentCharacteristics
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet es opcional
+    pq = None
+
+CHUNK_SIZE = getattr(settings, 'PREDICTION_IMPORT_CHUNK_SIZE', 5000)
+
+# Filas por sentencia INSERT/UPDATE
+BULK_BATCH_SIZE = 1000
+
+USERNAME_COLUMN = 'username'
+
+# Nombres de campo del API -> columnas del dataset
+_FIELD_TO_COLUMN = {feature.field: feature.column for feature in FEATURES}
+_REQUIRED_COLUMNS = [feature.column for feature in FEATURES if feature.required]
+_INT_COLUMNS = [feature.column for feature in FEATURES if feature.dtype is int]
+_OPTIONAL_DEFAULTS = {feature.column: feature.default for feature in FEATURES if not feature.required}
+_COURSE_COLUMN = _FIELD_TO_COLUMN['course']
+
+# Campos que se escriben (el curso va como course_id)
+_MODEL_FIELDS = [feature.field for feature in FEATURES]
+UPDATE_FIELDS = [*_MODEL_FIELDS, 'fingerprint', 'updated_at']
+
+
+@dataclass
+class ImportStats:
+    """Resumen de una importación"""
+    created: int = 0
+    updated: int = 0
+    errors: list = field(default_factory=list)
+    db_seconds: float = 0.0
+    started_at: float = field(default_factory=time.perf_counter)
+
+    @property
+    def processed(self):
+        return self.created + self.updated
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started_at
+
+    @property
+    def rows_per_second(self):
+        elapsed = self.elapsed
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+
+def read_chunks(source, file_format='csv', chunk_size=None):
+    """Produce DataFrames de hasta ``chunk_size`` filas desde una ruta o archivo"""
+    chunk_size = chunk_size or CHUNK_SIZE
+    if file_format == 'parquet':
+        if pq is None:
+            raise ImproperlyConfigured("La importación de Parquet requiere pyarrow (pip install pyarrow)")
+        offset = 0
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_size):
+            df = batch.to_pandas()
+            df.index = pd.RangeIndex(offset, offset + len(df))
+            offset += len(df)
+            yield df
+        return
+    yield from pd.read_csv(source, chunksize=chunk_size, encoding='utf-8-sig', dtype={USERNAME_COLUMN: str})
+
+
+def _normalize_columns(df):
+    df.columns = [str(column).strip() for column in df.columns]
+    return df.rename(columns=_FIELD_TO_COLUMN)
+
+
+def check_columns(df):
+    """Devuelve un mensaje de error si faltan columnas obligatorias, o ``None``"""
+    missing = [column for column in [USERNAME_COLUMN, *_REQUIRED_COLUMNS] if column not in df.columns]
+    if missing:
+        return f'Columnas faltantes: {", ".join(missing)}'
+    return None
+
+
+def _first_column(mask):
+    """Nombre de la primera columna en True de cada fila"""
+    return mask.astype('int8').idxmax(axis=1)
+
+
+def validate_chunk(df, course_ids):
+    """
+    Valida un bloque con operaciones vectorizadas.
+
+    Returns:
+        Tupla ``(values, course_pks, errors)``: la matriz ``(n, 34)`` ya
+        completada con los valores por defecto, el pk del ``Curso`` de cada
+        fila y una Serie con el mensaje de error por fila (``None`` si es válida).
+    """
+    raw = df.reindex(columns=list(COLUMN_NAMES))
+    numeric = raw.apply(pd.to_numeric, errors='coerce')
+
+    errors = pd.Series(None, index=df.index, dtype=object)
+
+    def flag(mask, message):
+        # Solo se conserva el primer error de cada fila
+        mask = mask & errors.isna()
+        errors[mask] = message if isinstance(message, str) else message[mask]
+
+    usernames = df[USERNAME_COLUMN].fillna('').astype(str).str.strip()
+    flag(usernames.eq(''), 'username es requerido')
+
+    # Valores presentes pero no numéricos
+    not_numeric = raw.notna() & numeric.isna()
+    flag(not_numeric.any(axis=1), 'Valor no numérico en "' + _first_column(not_numeric) + '"')
+
+    missing_required = numeric[_REQUIRED_COLUMNS].isna()
+    flag(missing_required.any(axis=1), 'Campo requerido faltante: "' + _first_column(missing_required) + '"')
+
+    numeric = numeric.fillna(_OPTIONAL_DEFAULTS)
+    non_integer = numeric[_INT_COLUMNS].notna() & (numeric[_INT_COLUMNS] % 1 != 0)
+    flag(non_integer.any(axis=1), 'Valor no entero en "' + _first_column(non_integer) + '"')
+
+    course_pks = numeric[_COURSE_COLUMN].map(course_ids)
+    flag(
+        numeric[_COURSE_COLUMN].notna() & course_pks.isna(),
+        'Curso no registrado: ' + numeric[_COURSE_COLUMN].map('{:g}'.format),
+    )
+
+    return numeric.to_numpy(dtype=np.float64), course_pks, errors
+
+
+def import_chunk(df, course_ids, stats, now=None):
+    """Valida y guarda un bloque; devuelve los ``user_id`` de las filas escritas"""
+    df = df.copy()
+    df[USERNAME_COLUMN] = df[USERNAME_COLUMN].fillna('').astype(str).str.strip()
+    values, course_pks, errors = validate_chunk(df, course_ids)
+
+    usernames = df[USERNAME_COLUMN].tolist()
+    user_ids = dict(
+        User.objects.filter(username__in=set(usernames), is_staff=False).values_list('username', 'pk')
+    )
+    valid = errors.isna().to_numpy()
+
+    # Si un estudiante aparece varias veces en el bloque gana la última fila
+    rows_by_user = {}
+    for position, (row_number, username) in enumerate(zip(df.index, usernames)):
+        if not valid[position]:
+            stats.errors.append(f'Fila {row_number + 2}: {errors.iloc[position]}')
+            continue
+        user_id = user_ids.get(username)
+        if user_id is None:
+            stats.errors.append(f'Fila {row_number + 2}: No existe un estudiante con username "{username}"')
+            continue
+        rows_by_user[user_id] = position
+
+    if not rows_by_user:
+        return []
+
+    db_start = time.perf_counter()
+    existing = dict(
+        StudentCharacteristics.objects.filter(user_id__in=rows_by_user).values_list('user_id', 'pk')
+    )
+    now = now or timezone.now()
+    to_create = []
+    to_update = []
+    for user_id, position in rows_by_user.items():
+        vector = values[position]
+        fields = {
+            name: (int(value) if feature.dtype is int else float(value))
+            for name, feature, value in zip(_MODEL_FIELDS, FEATURES, vector)
+            if feature.field != 'course'
+        }
+        characteristics = StudentCharacteristics(
+            pk=existing.get(user_id),
+            user_id=user_id,
+            course_id=int(course_pks.iloc[position]),
+            fingerprint=fingerprint(vector),
+            updated_at=now,
+            **fields,
+        )
+        if characteristics.pk is None:
+            to_create.append(characteristics)
+        else:
+            to_update.append(characteristics)
+
+    with transaction.atomic():
+        StudentCharacteristics.objects.bulk_create(to_create, batch_size=BULK_BATCH_SIZE)
+        StudentCharacteristics.objects.bulk_update(to_update, UPDATE_FIELDS, batch_size=BULK_BATCH_SIZE)
+    stats.db_seconds += time.perf_counter() - db_start
+
+    stats.created += len(to_create)
+    stats.updated += len(to_update)
+    return list(rows_by_user)
+
+
+def import_characteristics(source, file_format='csv', chunk_size=None, progress=None):
+    """
+    Importa características desde una ruta o archivo CSV/Parquet.
+
+    Args:
+        source: Ruta o archivo abierto (CSV en UTF-8, con o sin BOM)
+        file_format: ``csv`` o ``parquet``
+        chunk_size: Filas por bloque (por defecto ``PREDICTION_IMPORT_CHUNK_SIZE``)
+        progress: Callable opcional que recibe ``ImportStats`` tras cada bloque
+
+    Returns:
+        ``ImportStats`` con el resumen de la importación.
+    """
+    stats = ImportStats()
+    course_ids = dict(Curso.objects.values_list('codigo', 'pk'))
+    realtime = getattr(settings, 'PREDICTION_REALTIME_RESCORE', False)
+
+    for index, df in enumerate(read_chunks(source, file_format, chunk_size)):
+        df = _normalize_columns(df)
+        if index == 0:
+            error = check_columns(df)
+            if error:
+                stats.errors.append(error)
+                return stats
+        user_ids = import_chunk(df, course_ids, stats)
+        if realtime and user_ids:
+            # bulk_create/bulk_update no emiten post_save
+            from .realtime import rescore_queue
+            rescore_queue.enqueue(
+                *StudentCharacteristics.objects.filter(user_id__in=user_ids).values_list('pk', flat=True)
+            )
+        if progress:
+            progress(stats)
+    return stats
@@ -0,0 +1,164 @@
+"""
+Cola de trabajos de re-evaluación respaldada por la base de datos.
+
+El admin solo encola un ``PredictionJob``; el comando ``run_prediction_worker``
+reclama los trabajos pendientes con ``select_for_update(skip_locked=True)`` y
+los ejecuta fuera del ciclo de petición HTTP. No requiere Redis ni Celery.
+
+Mientras ejecuta un trabajo el worker actualiza ``heartbeat_at`` tras cada
+bloque. Un trabajo en ejecución sin latido durante ``PREDICTION_JOB_LEASE_SECONDS``
+(worker detenido o caído) se marca como fallido para que se pueda encolar otro.
+Si eso le pasa a un worker que seguía vivo (p. ej. un bloque muy lento), el
+siguiente latido lo detecta y el worker abandona el trabajo sin sobrescribir
+su estado.
+"""
+import os
+import socket
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import StudentCharacteristics, PredictionJob
+
+# Errores guardados por trabajo (el resto solo se cuenta)
+MAX_STORED_ERRORS = 50
+
+ACTIVE_STATUSES = [PredictionJob.STATUS_PENDING, PredictionJob.STATUS_RUNNING]
+
+# Segundos sin latido tras los cuales un trabajo en ejecución se da por abandonado
+LEASE_SECONDS = getattr(settings, 'PREDICTION_JOB_LEASE_SECONDS', 600)
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def expire_stale_jobs(now=None):
+    """
+    Marca como fallidos los trabajos en ejecución cuyo latido venció.
+    Devuelve el número de trabajos marcados.
+    """
+    now = now or timezone.now()
+    cutoff = now - timedelta(seconds=LEASE_SECONDS)
+    return PredictionJob.objects.filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff),
+        status=PredictionJob.STATUS_RUNNING,
+    ).update(
+        status=PredictionJob.STATUS_FAILED,
+        errors=f"El worker dejó de responder (sin latido durante {LEASE_SECONDS} s)",
+        finished_at=now,
+    )
+
+
+class LeaseLost(Exception):
+    """El trabajo ya no está en ejecución a nombre de este worker"""
+
+
+def _owned(job):
+    """El trabajo, solo si sigue en ejecución a nombre de ``job.worker``"""
+    return PredictionJob.objects.filter(pk=job.pk, status=PredictionJob.STATUS_RUNNING, worker=job.worker)
+
+
+def heartbeat(job, **fields):
+    """
+    Renueva el plazo del trabajo y guarda ``fields`` en la misma consulta.
+    Lanza ``LeaseLost`` si el trabajo ya se marcó como fallido (ver
+    ``expire_stale_jobs``).
+    """
+    if not _owned(job).update(heartbeat_at=timezone.now(), **fields):
+        raise LeaseLost(f"El trabajo {job.pk} ya no está asignado a {job.worker}")
+
+
+def enqueue_rescore(requested_by=None, incremental=True):
+    """
+    Encola una re-evaluación de los estudiantes (por defecto solo los que
+    tienen la predicción obsoleta; ``incremental=False`` evalúa a todos).
+
+    Si ya existe un trabajo pendiente o en ejecución se devuelve ese mismo en
+    lugar de crear otro; los trabajos abandonados no cuentan (ver
+    ``expire_stale_jobs``). Devuelve ``(job, created)``.
+    """
+    expire_stale_jobs()
+    with transaction.atomic():
+        job = PredictionJob.objects.select_for_update().filter(status__in=ACTIVE_STATUSES).first()
+        if job:
+            return job, False
+        job = PredictionJob.objects.create(requested_by=requested_by, incremental=incremental)
+    return job, True
+
+
+def claim_next_job(worker=None):
+    """Reclama el trabajo pendiente más antiguo o devuelve ``None``"""
+    expire_stale_jobs()
+    with transaction.atomic():
+        job = (
+            PredictionJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=PredictionJob.STATUS_PENDING)
+            .order_by('created_at')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = PredictionJob.STATUS_RUNNING
+        job.started_at = job.heartbeat_at = timezone.now()
+        job.worker = worker or worker_name()
+        job.save(update_fields=['status', 'started_at', 'heartbeat_at', 'worker'])
+    return job
+
+
+def run_job(job, chunk_size=None):
+    """
+    Ejecuta un trabajo ya reclamado y actualiza su progreso por bloque.
+
+    Si el plazo del trabajo venció mientras se ejecutaba, se detiene en el
+    siguiente bloque y devuelve el trabajo tal como está en la base de datos.
+    """
+    from .bulk import ensure_characteristics, rescore_students, stale_characteristics
+    from .scoring import active_model
+
+    def update_progress(stats):
+        heartbeat(job, processed=stats.processed, failed=stats.failed)
+
+    try:
+        ensure_characteristics()
+        loaded_model = active_model()
+        queryset = StudentCharacteristics.objects.filter(user__is_staff=False)
+        if job.incremental:
+            queryset = stale_characteristics(queryset, loaded_model.version)
+        job.total = queryset.count()
+        heartbeat(job, total=job.total)
+
+        stats = rescore_students(
+            queryset=queryset,
+            chunk_size=chunk_size,
+            loaded_model=loaded_model,
+            progress=update_progress,
+        )
+
+        job.processed = stats.processed
+        job.failed = stats.failed
+        job.errors = "\n".join(stats.errors[:MAX_STORED_ERRORS])
+        job.status = PredictionJob.STATUS_DONE
+    except LeaseLost:
+        job.refresh_from_db()
+        return job
+    except Exception as e:
+        job.errors = f"Error al procesar las predicciones: {str(e)}"
+        job.status = PredictionJob.STATUS_FAILED
+
+    job.finished_at = timezone.now()
+    saved = _owned(job).update(
+        processed=job.processed,
+        failed=job.failed,
+        errors=job.errors,
+        status=job.status,
+        finished_at=job.finished_at,
+    )
+    if not saved:
+        # Otro proceso lo marcó como fallido mientras terminaba: se conserva ese estado
+        job.refresh_from_db()
+    return job
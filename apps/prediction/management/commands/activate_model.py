@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.prediction.models import ModelVersion
+from apps.prediction.registry import CHECK_INTERVAL, REGISTRY_DIR
+
+
+class Command(BaseCommand):
+    help = 'Activa una versión registrada del modelo (los workers la cargan sin reiniciarse)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model_version', help='Versión a activar')
+
+    def handle(self, *args, **options):
+        try:
+            model_version = ModelVersion.objects.get(version=options['model_version'])
+        except ModelVersion.DoesNotExist:
+            raise CommandError(f"La versión {options['model_version']} no está registrada")
+
+        if not (REGISTRY_DIR / model_version.artifact_path).exists():
+            raise CommandError(f'No existe el artefacto {REGISTRY_DIR / model_version.artifact_path}')
+
+        model_version.activate()
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Versión {model_version.version} activada. Los workers la cargarán '
+            f'en un máximo de {CHECK_INTERVAL} s.'
+        ))
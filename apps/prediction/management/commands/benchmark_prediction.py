@@ -0,0 +1,74 @@
+import time
+
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.prediction.features import COLUMN_NAMES, DTYPE
+from apps.prediction.registry import BASE_DIR, prepare_model
+from apps.prediction.scoring import active_model, score, legacy_score
+
+DATASET_PATH = BASE_DIR / "análisis" / "dataset.csv"
+
+
+class Command(BaseCommand):
+    help = 'Compara la latencia de inferencia (p50/p99) de los distintos caminos de evaluación'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=1,
+            help='Filas por llamada al modelo (1 = API individual)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=50,
+            help='Número de repeticiones por variante',
+        )
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        repeat = options['repeat']
+        if rows < 1 or repeat < 1:
+            raise CommandError('--rows y --repeat deben ser mayores que 0')
+
+        try:
+            estimator = active_model().estimator
+        except FileNotFoundError as e:
+            raise CommandError(str(e))
+
+        dataset = pd.read_csv(DATASET_PATH, encoding='utf-8-sig')
+        students = (
+            dataset[list(COLUMN_NAMES)]
+            .sample(n=rows, replace=True, random_state=42)
+            .to_numpy(dtype=DTYPE)
+        )
+
+        variants = [
+            ('predict_proba + predict', lambda: legacy_score(students, model=estimator)),
+            ('una pasada (sklearn)', lambda: score(students, model=estimator)),
+        ]
+        flat = prepare_model(estimator, engine='flat')
+        if flat is not estimator:
+            variants.append(('una pasada (flat)', lambda: score(students, model=flat)))
+            max_diff = np.abs(flat.predict_proba(students) - estimator.predict_proba(students)).max()
+            self.stdout.write(f'Diferencia máxima de probabilidad flat vs sklearn: {max_diff:.2e}')
+
+        baseline_p50 = None
+        for name, func in variants:
+            func()  # Calentar antes de medir
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                func()
+                timings.append((time.perf_counter() - start) * 1000)
+            p50, p99 = np.percentile(timings, [50, 99])
+            baseline_p50 = baseline_p50 or p50
+            self.stdout.write(
+                f'{name:<26} p50 {p50:8.3f} ms   p99 {p99:8.3f} ms   '
+                f'{baseline_p50 / p50:5.2f}x'
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'✓ {rows} fila(s) por llamada, {repeat} repeticiones por variante'))
@@ -0,0 +1,60 @@
+import sys
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.prediction.export import parquet_available, write_csv, write_parquet
+
+
+class Command(BaseCommand):
+    help = 'Exporta la última predicción de cada estudiante con sus características y curso (CSV o Parquet)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            '-o',
+            default='-',
+            help='Archivo de salida ("-" = salida estándar, solo CSV)',
+        )
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'parquet'],
+            default=None,
+            help='Formato (por defecto según la extensión de --output, o csv)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=None,
+            help='Filas por bloque (por defecto PREDICTION_EXPORT_CHUNK_SIZE)',
+        )
+
+    def handle(self, *args, **options):
+        output = options['output']
+        chunk_size = options['chunk_size']
+        export_format = options['format'] or ('parquet' if output.endswith('.parquet') else 'csv')
+        if chunk_size is not None and chunk_size < 1:
+            raise CommandError('--chunk-size debe ser mayor que 0')
+
+        start = time.perf_counter()
+        if export_format == 'parquet':
+            if output == '-':
+                raise CommandError('La exportación a Parquet requiere --output')
+            if not parquet_available():
+                raise CommandError('La exportación a Parquet requiere pyarrow (pip install pyarrow)')
+            total = write_parquet(output, chunk_size=chunk_size)
+        elif output == '-':
+            total = write_csv(sys.stdout, chunk_size=chunk_size)
+        else:
+            with Path(output).open('w', newline='', encoding='utf-8') as destination:
+                total = write_csv(destination, chunk_size=chunk_size)
+
+        elapsed = time.perf_counter() - start
+        rate = total / elapsed if elapsed > 0 else 0.0
+        # Con CSV a la salida estándar el resumen va a stderr para no mezclarlo con los datos
+        report = self.stderr if output == '-' else self.stdout
+        report.write(
+            f'✓ {total} predicciones exportadas ({export_format}) en {elapsed:.2f} s ({rate:.0f} filas/s)',
+            style_func=self.style.SUCCESS,
+        )
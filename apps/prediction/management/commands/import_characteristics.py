@@ -0,0 +1,50 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.prediction.importer import import_characteristics
+
+
+class Command(BaseCommand):
+    help = 'Importa características de estudiantes desde un CSV/Parquet con las columnas de análisis/dataset.csv más username'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Archivo .csv o .parquet')
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'parquet'],
+            default=None,
+            help='Formato (por defecto según la extensión)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=None,
+            help='Filas por bloque (por defecto PREDICTION_IMPORT_CHUNK_SIZE)',
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        chunk_size = options['chunk_size']
+        if not path.is_file():
+            raise CommandError(f'No existe el archivo {path}')
+        if chunk_size is not None and chunk_size < 1:
+            raise CommandError('--chunk-size debe ser mayor que 0')
+        file_format = options['format'] or ('parquet' if path.suffix.lower() == '.parquet' else 'csv')
+
+        def report(stats):
+            self.stdout.write(f'  {stats.processed} filas guardadas ({stats.rows_per_second:.0f} filas/s)')
+
+        try:
+            stats = import_characteristics(path, file_format=file_format, chunk_size=chunk_size, progress=report)
+        except Exception as e:
+            raise CommandError(f'Error al procesar el archivo: {str(e)}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {stats.created} creadas, {stats.updated} actualizadas en {stats.elapsed:.2f} s '
+            f'({stats.rows_per_second:.0f} filas/s, {stats.db_seconds:.2f} s en la base de datos)'
+        ))
+        if stats.errors:
+            self.stdout.write(self.style.WARNING(f'{len(stats.errors)} filas con errores'))
+            for error in stats.errors[:10]:
+                self.stdout.write(self.style.WARNING(f'  - {error}'))
@@ -0,0 +1,61 @@
+import shutil
+from pathlib import Path
+
+import joblib
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.prediction.features import check_schema
+from apps.prediction.models import ModelVersion
+from apps.prediction.registry import REGISTRY_DIR
+
+
+class Command(BaseCommand):
+    help = 'Copia un artefacto de modelo al registro y lo registra como una nueva versión'
+
+    def add_arguments(self, parser):
+        parser.add_argument('artifact', help='Ruta al archivo .pkl/.joblib del modelo')
+        parser.add_argument(
+            '--version',
+            dest='model_version',
+            default=None,
+            help='Identificador de la versión (por defecto, la fecha y hora actual)',
+        )
+        parser.add_argument(
+            '--activate',
+            action='store_true',
+            help='Activar la versión al registrarla',
+        )
+        parser.add_argument('--notes', default='', help='Notas de la versión')
+
+    def handle(self, *args, **options):
+        source = Path(options['artifact'])
+        if not source.is_file():
+            raise CommandError(f'No existe el archivo {source}')
+
+        version = options['model_version'] or timezone.now().strftime('%Y%m%d-%H%M%S')
+        if ModelVersion.objects.filter(version=version).exists():
+            raise CommandError(f'La versión {version} ya está registrada')
+
+        # Rechazar artefactos cuyo esquema no coincide antes de copiarlos
+        try:
+            check_schema(joblib.load(source))
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        # Un directorio por versión; los artefactos registrados no se sobrescriben
+        artifact_path = Path(version) / source.name
+        destination = REGISTRY_DIR / artifact_path
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(source, destination)
+
+        model_version = ModelVersion.objects.create(
+            version=version,
+            artifact_path=str(artifact_path),
+            notes=options['notes'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'✓ Versión {version} registrada en {destination}'))
+
+        if options['activate']:
+            model_version.activate()
+            self.stdout.write(self.style.SUCCESS(f'✓ Versión {version} activada'))
@@ -0,0 +1,80 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+PROC = Path('/proc')
+
+# Campos de /proc/<pid>/smaps_rollup que se reportan (en kB)
+SMAPS_FIELDS = ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty')
+
+
+def read_smaps_rollup(pid):
+    """Lee /proc/<pid>/smaps_rollup y devuelve los campos en kB"""
+    values = {}
+    for line in (PROC / str(pid) / 'smaps_rollup').read_text().splitlines():
+        name, _, rest = line.partition(':')
+        if name in SMAPS_FIELDS:
+            values[name] = int(rest.split()[0])
+    return values
+
+
+def child_pids(pid):
+    """PIDs de los procesos hijos directos de ``pid``"""
+    children = []
+    for task in (PROC / str(pid) / 'task').iterdir():
+        children_file = task / 'children'
+        if children_file.exists():
+            children.extend(int(child) for child in children_file.read_text().split())
+    return sorted(children)
+
+
+class Command(BaseCommand):
+    help = 'Reporta la memoria (RSS/PSS/USS) del master de gunicorn y de cada worker'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'master_pid',
+            type=int,
+            nargs='?',
+            help='PID del master de gunicorn',
+        )
+        parser.add_argument(
+            '--pidfile',
+            help='Archivo con el PID del master (opción --pid de gunicorn)',
+        )
+
+    def handle(self, *args, **options):
+        master_pid = options['master_pid']
+        if master_pid is None and options['pidfile']:
+            master_pid = int(Path(options['pidfile']).read_text().strip())
+        if master_pid is None:
+            raise CommandError('Indica el PID del master o --pidfile')
+        if not (PROC / str(master_pid) / 'smaps_rollup').exists():
+            raise CommandError(f'No se puede leer /proc/{master_pid}/smaps_rollup (¿Linux >= 4.14?)')
+
+        workers = child_pids(master_pid)
+        header = f"{'Proceso':<16}{'PID':>8}{'RSS MB':>10}{'PSS MB':>10}{'USS MB':>10}{'Compartida MB':>15}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+
+        total_rss = total_pss = 0
+        for role, pid in [('master', master_pid)] + [('worker', pid) for pid in workers]:
+            try:
+                mem = read_smaps_rollup(pid)
+            except (FileNotFoundError, PermissionError) as e:
+                self.stdout.write(self.style.WARNING(f'{role:<16}{pid:>8}  no disponible: {e}'))
+                continue
+            rss = mem.get('Rss', 0) / 1024
+            pss = mem.get('Pss', 0) / 1024
+            uss = (mem.get('Private_Clean', 0) + mem.get('Private_Dirty', 0)) / 1024
+            shared = (mem.get('Shared_Clean', 0) + mem.get('Shared_Dirty', 0)) / 1024
+            total_rss += rss
+            total_pss += pss
+            self.stdout.write(f'{role:<16}{pid:>8}{rss:>10.1f}{pss:>10.1f}{uss:>10.1f}{shared:>15.1f}')
+
+        self.stdout.write('-' * len(header))
+        self.stdout.write(f"{'total':<24}{total_rss:>10.1f}{total_pss:>10.1f}")
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {len(workers)} worker(s). La suma de PSS es la memoria física real; '
+            f'la suma de RSS cuenta varias veces las páginas compartidas.'
+        ))
@@ -0,0 +1,65 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.prediction.jobs import claim_next_job, run_job, worker_name
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta en segundo plano los trabajos de re-evaluación encolados desde el admin'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=5.0,
+            help='Segundos de espera entre consultas cuando no hay trabajos pendientes',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=None,
+            help='Estudiantes por bloque (por defecto PREDICTION_BULK_CHUNK_SIZE)',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Procesa los trabajos pendientes y termina',
+        )
+
+    def handle(self, *args, **options):
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+
+        name = worker_name()
+        self.stdout.write(self.style.SUCCESS(f'Worker de predicciones iniciado ({name})'))
+
+        while not self._stopping:
+            close_old_connections()
+            job = claim_next_job(worker=name)
+
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+
+            self.stdout.write(f'Procesando trabajo {job.pk}...')
+            job = run_job(job, chunk_size=options['chunk_size'])
+
+            if job.status == job.STATUS_DONE:
+                self.stdout.write(self.style.SUCCESS(
+                    f'✓ Trabajo {job.pk}: {job.processed} procesados, {job.failed} fallidos '
+                    f'en {job.elapsed_seconds:.2f} s ({job.throughput:.0f} estudiantes/s)'
+                ))
+            else:
+                self.stdout.write(self.style.ERROR(f'✗ Trabajo {job.pk}: {job.errors}'))
+
+        self.stdout.write(self.style.WARNING('Worker de predicciones detenido'))
+
+    def _request_stop(self, signum, frame):
+        # Termina el trabajo en curso antes de salir
+        self._stopping = True
@@ -0,0 +1,74 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.prediction.bulk import ensure_characteristics, rescore_students
+from apps.prediction.parallel import rescore_students_parallel
+
+
+class Command(BaseCommand):
+    help = 'Evalúa el riesgo de deserción de todos los estudiantes usando varios procesos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Procesos en paralelo (1 = sin pool, en el proceso actual)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=None,
+            help='Estudiantes por bloque (por defecto PREDICTION_BULK_CHUNK_SIZE)',
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Solo estudiantes cuyas características o versión del modelo cambiaron',
+        )
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        chunk_size = options['chunk_size']
+        incremental = options['incremental']
+        if workers < 1:
+            raise CommandError('--workers debe ser mayor que 0')
+        if chunk_size is not None and chunk_size < 1:
+            raise CommandError('--chunk-size debe ser mayor que 0')
+
+        created_defaults = ensure_characteristics()
+        if created_defaults:
+            self.stdout.write(self.style.WARNING(
+                f'Se crearon {created_defaults} características por defecto (sin curso asignado)'
+            ))
+
+        mode = ' con predicción obsoleta' if incremental else ''
+        self.stdout.write(self.style.SUCCESS(f'Evaluando estudiantes{mode} con {workers} proceso(s)...'))
+
+        def report(stats):
+            self.stdout.write(f'  {stats.processed} evaluados ({stats.rows_per_second:.0f} estudiantes/s)')
+
+        try:
+            if workers == 1:
+                stats = rescore_students(chunk_size=chunk_size, progress=report, incremental=incremental)
+            else:
+                stats = rescore_students_parallel(
+                    workers=workers,
+                    chunk_size=chunk_size,
+                    progress=report,
+                    incremental=incremental,
+                )
+        except FileNotFoundError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {stats.created} creadas, {stats.updated} actualizadas en {stats.elapsed:.2f} s '
+            f'({stats.rows_per_second:.0f} estudiantes/s)'
+        ))
+        if stats.errors:
+            self.stdout.write(self.style.WARNING(
+                f'{stats.failed} estudiantes sin evaluar ({len(stats.errors)} errores durante el proceso)'
+            ))
+            for error in stats.errors[:10]:
+                self.stdout.write(self.style.WARNING(f'  - {error}'))
@@ -1,7 +1,29 @@
-from django.core.management.base import BaseCommand
+import time
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
 from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+from apps.prediction.features import COLUMN_NAMES, DTYPE, FEATURES, fingerprint
 from apps.prediction.models import Curso, StudentCharacteristics, DropoutPrediction
 
+DATASET_PATH = settings.BASE_DIR / 'análisis' / 'dataset.csv'
+
+# Contraseña de todos los estudiantes generados con --students
+SEED_PASSWORD = 'estudiante123'
+
+_COURSE_INDEX = COLUMN_NAMES.index('Course')
+_FIELDS = [
+    (index, feature.field, feature.dtype)
+    for index, feature in enumerate(FEATURES)
+    if feature.field != 'course'
+]
+
 
 class Command(BaseCommand):
     help = 'Crea datos por defecto para cursos, estudiantes y características'
@@ -12,14 +34,56 @@ class Command(BaseCommand):
             action='store_true',
             help='Elimina todos los datos existentes antes de crear nuevos',
         )
+        parser.add_argument(
+            '--students',
+            type=int,
+            default=None,
+            help='Genera N estudiantes con características muestreadas de análisis/dataset.csv (p. ej. 100000)',
+        )
+        parser.add_argument(
+            '--sampling',
+            choices=['rows', 'columns'],
+            default='rows',
+            help='rows: filas completas del dataset; columns: cada columna según su distribución '
+                 'empírica (vectores nuevos, útil para medir la cache de predicciones)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Estudiantes por lote (una transacción por lote)',
+        )
+        parser.add_argument(
+            '--prefix',
+            default='seed',
+            help='Prefijo de los usernames generados con --students (con --clear también se '
+                 'eliminan los estudiantes existentes con este prefijo)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=None,
+            help='Semilla del muestreo (reproducible)',
+        )
 
     def handle(self, *args, **options):
+        students = options['students']
+        if students is not None and students < 1:
+            raise CommandError('--students debe ser mayor que 0')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size debe ser mayor que 0')
+        if not options['prefix']:
+            raise CommandError('--prefix no puede estar vacío')
+
         if options['clear']:
             self.stdout.write(self.style.WARNING('Eliminando datos existentes...'))
-            DropoutPrediction.objects.all().delete()
-            StudentCharacteristics.objects.all().delete()
-            Curso.objects.all().delete()
-            # No eliminamos usuarios para evitar problemas
+            self.truncate_tables()
+            if students:
+                # Solo se eliminan los usuarios generados antes con --students y el mismo prefijo
+                deleted, _ = User.objects.filter(username__startswith=options['prefix'], is_staff=False).delete()
+                self.stdout.write(self.style.WARNING(
+                    f'Usuarios "{options["prefix"]}*" eliminados ({deleted} registros)'
+                ))
 
         # Crear cursos
         self.stdout.write(self.style.SUCCESS('Creando cursos...'))
@@ -51,6 +115,112 @@ class Command(BaseCommand):
 
         self.stdout.write(self.style.SUCCESS(f'✓ {cursos_created} cursos creados'))
 
+        if students:
+            self.seed_students(students, options)
+        else:
+            self.seed_examples()
+
+        self.stdout.write(self.style.SUCCESS('\n✓ Datos de prueba creados exitosamente!'))
+        self.stdout.write(self.style.SUCCESS(f'  - Cursos: {Curso.objects.count()}'))
+        self.stdout.write(self.style.SUCCESS(f'  - Estudiantes: {User.objects.filter(is_staff=False).count()}'))
+        self.stdout.write(self.style.SUCCESS(f'  - Características: {StudentCharacteristics.objects.count()}'))
+
+    def truncate_tables(self):
+        """Vacía predicciones, características y cursos con TRUNCATE (DELETE en SQLite)"""
+        tables = [model._meta.db_table for model in (DropoutPrediction, StudentCharacteristics, Curso)]
+        connection.ops.execute_sql_flush(connection.ops.sql_flush(no_style(), tables, reset_sequences=True))
+
+    def sample_features(self, n, sampling, rng):
+        """Matriz ``(n, 34)`` muestreada de análisis/dataset.csv"""
+        df = pd.read_csv(DATASET_PATH, encoding='utf-8-sig', usecols=list(COLUMN_NAMES))
+        data = df[list(COLUMN_NAMES)].to_numpy(dtype=DTYPE)
+        if sampling == 'rows':
+            return data[rng.integers(0, len(data), size=n)]
+        # Cada columna por separado: conserva las marginales pero no las correlaciones
+        return np.column_stack([column[rng.integers(0, len(column), size=n)] for column in data.T])
+
+    def seed_students(self, n, options):
+        """Genera ``n`` estudiantes con ``bulk_create`` en lotes, una transacción por lote"""
+        prefix = options['prefix']
+        batch_size = options['batch_size']
+        rng = np.random.default_rng(options['seed'])
+        start = time.perf_counter()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Muestreando {n} vectores de características ({options["sampling"]})...'
+        ))
+        features = self.sample_features(n, options['sampling'], rng)
+
+        # El dataset usa sus propios códigos de curso: se registran los que falten
+        codes = sorted({int(code) for code in np.unique(features[:, _COURSE_INDEX])})
+        Curso.objects.bulk_create(
+            [
+                Curso(codigo=code, nombre=f'Curso {code}', descripcion='Curso de análisis/dataset.csv')
+                for code in codes
+            ],
+            ignore_conflicts=True,
+        )
+        course_ids = dict(Curso.objects.values_list('codigo', 'pk'))
+
+        # Continúa la numeración de una ejecución anterior con el mismo prefijo
+        last = (
+            User.objects.filter(username__startswith=prefix)
+            .order_by('-username')
+            .values_list('username', flat=True)
+            .first()
+        )
+        if last is not None and not last[len(prefix):].isdigit():
+            raise CommandError(f'Ya existe el usuario "{last}" con el prefijo "{prefix}"; usa otro --prefix')
+        first = int(last[len(prefix):]) + 1 if last else 0
+
+        # Un solo hash para todos: PBKDF2 por usuario tardaría horas con 1M de estudiantes
+        password = make_password(SEED_PASSWORD)
+        now = timezone.now()
+
+        self.stdout.write(self.style.SUCCESS(f'Creando {n} estudiantes en lotes de {batch_size}...'))
+        for offset in range(0, n, batch_size):
+            rows = features[offset:offset + batch_size]
+            usernames = [f'{prefix}{first + offset + i:07d}' for i in range(len(rows))]
+            with transaction.atomic():
+                User.objects.bulk_create(
+                    [
+                        User(
+                            username=username,
+                            email=f'{username}@tecsup.edu',
+                            first_name='Estudiante',
+                            last_name=username,
+                            password=password,
+                            date_joined=now,
+                        )
+                        for username in usernames
+                    ],
+                    batch_size=batch_size,
+                )
+                # MySQL no devuelve los pk de bulk_create: se leen en una sola consulta
+                user_ids = dict(User.objects.filter(username__in=usernames).values_list('username', 'pk'))
+                StudentCharacteristics.objects.bulk_create(
+                    [
+                        StudentCharacteristics(
+                            user_id=user_ids[username],
+                            course_id=course_ids[int(row[_COURSE_INDEX])],
+                            fingerprint=fingerprint(row),
+                            **{field: dtype(row[index]) for index, field, dtype in _FIELDS},
+                        )
+                        for username, row in zip(usernames, rows)
+                    ],
+                    batch_size=batch_size,
+                )
+            done = offset + len(rows)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f'  {done}/{n} estudiantes ({done / elapsed:.0f}/s)')
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {n} estudiantes y características creados en {elapsed:.2f} s ({n / elapsed:.0f}/s)'
+        ))
+
+    def seed_examples(self):
+        """Crea los 5 estudiantes de ejemplo con sus características"""
         # Crear usuarios estudiantes si no existen
         self.stdout.write(self.style.SUCCESS('Creando usuarios estudiantes...'))
         estudiantes_data = [
@@ -162,9 +332,3 @@ class Command(BaseCommand):
                 caracteristicas_created += 1
 
         self.stdout.write(self.style.SUCCESS(f'✓ {caracteristicas_created} características creadas'))
-
-        self.stdout.write(self.style.SUCCESS('\n✓ Datos de prueba creados exitosamente!'))
-        self.stdout.write(self.style.SUCCESS(f'  - Cursos: {Curso.objects.count()}'))
-        self.stdout.write(self.style.SUCCESS(f'  - Estudiantes: {User.objects.filter(is_staff=False).count()}'))
-        self.stdout.write(self.style.SUCCESS(f'  - Características: {StudentCharacteristics.objects.count()}'))
-
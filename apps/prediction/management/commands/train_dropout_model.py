@@ -0,0 +1,75 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.prediction.models import ModelVersion
+from apps.prediction.registry import REGISTRY_DIR
+from apps.prediction.training import CACHE_DIR, DATASET_PATH, ESTIMATORS, PhaseTimer, save_artifact, train
+
+
+class Command(BaseCommand):
+    help = 'Entrena el modelo de deserción desde análisis/dataset.csv y lo registra como una nueva versión'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dataset', default=str(DATASET_PATH), help='CSV con el mismo formato que análisis/dataset.csv')
+        parser.add_argument('--estimator', choices=sorted(ESTIMATORS), default='rf', help='Estimador final del Pipeline')
+        parser.add_argument('--cv', type=int, default=3, help='Particiones de validación cruzada')
+        parser.add_argument('--factor', type=int, default=3, help='Factor de eliminación de HalvingGridSearchCV')
+        parser.add_argument('--n-jobs', type=int, default=-1, help='Procesos para la búsqueda (-1 = todos los núcleos)')
+        parser.add_argument('--test-size', type=float, default=0.2, help='Proporción reservada para evaluación')
+        parser.add_argument('--random-state', type=int, default=42)
+        parser.add_argument('--cache-dir', default=str(CACHE_DIR), help='Cache en disco de los folds ya evaluados')
+        parser.add_argument('--no-cache', action='store_true', help='No usar ni guardar la cache de folds')
+        parser.add_argument('--version', dest='model_version', default=None, help='Versión a registrar (por defecto, fecha y hora)')
+        parser.add_argument('--activate', action='store_true', help='Activar la versión al terminar')
+        parser.add_argument('--verbose', type=int, default=0, help='Nivel de detalle de HalvingGridSearchCV')
+
+    def handle(self, *args, **options):
+        dataset = Path(options['dataset'])
+        if not dataset.is_file():
+            raise CommandError(f'No existe el dataset {dataset}')
+
+        version = options['model_version'] or timezone.now().strftime('%Y%m%d-%H%M%S')
+        if ModelVersion.objects.filter(version=version).exists():
+            raise CommandError(f'La versión {version} ya está registrada')
+
+        timer = PhaseTimer()
+        self.stdout.write(self.style.SUCCESS(f"Entrenando modelo '{options['estimator']}' desde {dataset}..."))
+        model, metrics = train(
+            dataset_path=dataset,
+            estimator=options['estimator'],
+            cv=options['cv'],
+            factor=options['factor'],
+            n_jobs=options['n_jobs'],
+            test_size=options['test_size'],
+            random_state=options['random_state'],
+            cache_dir=None if options['no_cache'] else options['cache_dir'],
+            verbose=options['verbose'],
+            timer=timer,
+        )
+
+        with timer.phase('guardado'):
+            metrics['version'] = version
+            metrics['timings_seconds'] = {name: round(seconds, 3) for name, seconds in timer.timings.items()}
+            model_path = save_artifact(model, metrics, REGISTRY_DIR / version)
+            model_version = ModelVersion.objects.create(
+                version=version,
+                artifact_path=str(model_path.relative_to(REGISTRY_DIR)),
+                metrics=metrics,
+                notes=f"train_dropout_model --estimator {options['estimator']} sobre {dataset.name}",
+            )
+            if options['activate']:
+                model_version.activate()
+
+        for name, seconds in timer.timings.items():
+            self.stdout.write(f'  {name:<16} {seconds:8.2f} s')
+        self.stdout.write(f"  Mejores parámetros: {metrics['best_params']}")
+        self.stdout.write(
+            f"  Accuracy CV: {metrics['cv_best_score']:.4f}   "
+            f"Accuracy test: {metrics['test_accuracy']:.4f}   ROC AUC test: {metrics['test_roc_auc']:.4f}"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Versión {version} guardada en {model_path}"
+            f"{' y activada' if options['activate'] else ''}"
+        ))
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-18 10:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prediction', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PredictionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('running', 'En ejecución'), ('done', 'Completado'), ('failed', 'Fallido')], default='pending', max_length=10, verbose_name='Estado')),
+                ('total', models.IntegerField(default=0, verbose_name='Total de Estudiantes')),
+                ('processed', models.IntegerField(default=0, verbose_name='Procesados')),
+                ('failed', models.IntegerField(default=0, verbose_name='Fallidos')),
+                ('errors', models.TextField(blank=True, default='', verbose_name='Errores')),
+                ('worker', models.CharField(blank=True, default='', max_length=100, verbose_name='Worker')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de Inicio')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de Finalización')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='prediction_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Solicitado por')),
+            ],
+            options={
+                'verbose_name': 'Trabajo de Predicción',
+                'verbose_name_plural': 'Trabajos de Predicción',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='prediction_job_status_idx')],
+            },
+        ),
+    ]
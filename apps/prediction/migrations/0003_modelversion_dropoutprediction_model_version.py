@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prediction', '0002_predictionjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.CharField(max_length=50, unique=True, verbose_name='Versión')),
+                ('artifact_path', models.CharField(help_text='Ruta relativa a PREDICTION_MODEL_REGISTRY_DIR', max_length=255, verbose_name='Artefacto')),
+                ('is_active', models.BooleanField(default=False, verbose_name='Activa')),
+                ('metrics', models.JSONField(blank=True, default=dict, verbose_name='Métricas')),
+                ('notes', models.TextField(blank=True, default='', verbose_name='Notas')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Registro')),
+                ('activated_at', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de Activación')),
+            ],
+            options={
+                'verbose_name': 'Versión del Modelo',
+                'verbose_name_plural': 'Versiones del Modelo',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['is_active'], name='prediction_model_active_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='dropoutprediction',
+            name='model_version',
+            field=models.CharField(blank=True, default='', max_length=50, verbose_name='Versión del Modelo'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-18 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prediction', '0003_modelversion_dropoutprediction_model_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentcharacteristics',
+            name='fingerprint',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32, verbose_name='Huella'),
+        ),
+        migrations.AddField(
+            model_name='dropoutprediction',
+            name='features_fingerprint',
+            field=models.CharField(blank=True, default='', help_text='Huella del vector con el que se calculó la predicción', max_length=32, verbose_name='Huella de Características'),
+        ),
+        migrations.AddField(
+            model_name='predictionjob',
+            name='incremental',
+            field=models.BooleanField(default=True, help_text='Solo estudiantes cuyas características o versión del modelo cambiaron', verbose_name='Incremental'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prediction', '0004_incremental_rescoring'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='predictionjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text='Lo actualiza el worker tras cada bloque; si vence el plazo el trabajo se marca como fallido', null=True, verbose_name='Último Latido'),
+        ),
+    ]
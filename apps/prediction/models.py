@@ -2,6 +2,8 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+from .features import FIELD_NAMES, fingerprint, instance_values
+
 
 class Curso(models.Model):
     """Modelo para representar los cursos disponibles"""
@@ -81,6 +83,9 @@ class StudentCharacteristics(models.Model):
     unemployment_rate = models.FloatField(default=0.0, verbose_name="Tasa de Desempleo")
     inflation_rate = models.FloatField(default=0.0, verbose_name="Tasa de Inflación")
     gdp = models.FloatField(default=0.0, verbose_name="PIB")
+
+    # Huella de las 34 características (features.fingerprint); vacía si no hay curso
+    fingerprint = models.CharField(max_length=32, blank=True, default='', editable=False, verbose_name="Huella")
     
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Fecha de Actualización")
@@ -93,44 +98,22 @@ class StudentCharacteristics(models.Model):
     def __str__(self):
         return f"Características de {self.user.username}"
 
+    def save(self, *args, **kwargs):
+        self.fingerprint = self.compute_fingerprint()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'fingerprint' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'fingerprint']
+        super().save(*args, **kwargs)
+
+    def compute_fingerprint(self):
+        """Huella del vector de características actual ('' si falta el curso)"""
+        if self.course_id is None:
+            return ''
+        return fingerprint(instance_values(self))
+
     def to_dict(self):
         """Convierte las características a un diccionario para la predicción"""
-        return {
-            "marital_status": self.marital_status,
-            "application_mode": self.application_mode,
-            "application_order": self.application_order,
-            "course": self.course.codigo if self.course else None,
-            "daytime_evening_attendance": self.daytime_evening_attendance,
-            "previous_qualification": self.previous_qualification,
-            "nacionality": self.nacionality,
-            "mother_qualification": self.mother_qualification,
-            "father_qualification": self.father_qualification,
-            "mother_occupation": self.mother_occupation,
-            "father_occupation": self.father_occupation,
-            "displaced": self.displaced,
-            "educational_special_needs": self.educational_special_needs,
-            "debtor": self.debtor,
-            "tuition_fees_up_to_date": self.tuition_fees_up_to_date,
-            "gender": self.gender,
-            "scholarship_holder": self.scholarship_holder,
-            "age_at_enrollment": self.age_at_enrollment,
-            "international": self.international,
-            "curricular_units_1st_sem_credited": self.curricular_units_1st_sem_credited,
-            "curricular_units_1st_sem_enrolled": self.curricular_units_1st_sem_enrolled,
-            "curricular_units_1st_sem_evaluations": self.curricular_units_1st_sem_evaluations,
-            "curricular_units_1st_sem_approved": self.curricular_units_1st_sem_approved,
-            "curricular_units_1st_sem_grade": self.curricular_units_1st_sem_grade,
-            "curricular_units_1st_sem_without_evaluations": self.curricular_units_1st_sem_without_evaluations,
-            "curricular_units_2nd_sem_credited": self.curricular_units_2nd_sem_credited,
-            "curricular_units_2nd_sem_enrolled": self.curricular_units_2nd_sem_enrolled,
-            "curricular_units_2nd_sem_evaluations": self.curricular_units_2nd_sem_evaluations,
-            "curricular_units_2nd_sem_approved": self.curricular_units_2nd_sem_approved,
-            "curricular_units_2nd_sem_grade": self.curricular_units_2nd_sem_grade,
-            "curricular_units_2nd_sem_without_evaluations": self.curricular_units_2nd_sem_without_evaluations,
-            "unemployment_rate": self.unemployment_rate,
-            "inflation_rate": self.inflation_rate,
-            "gdp": self.gdp,
-        }
+        return dict(zip(FIELD_NAMES, instance_values(self)))
 
 
 class DropoutPrediction(models.Model):
@@ -166,6 +149,14 @@ class DropoutPrediction(models.Model):
     )
     prediction = models.IntegerField(verbose_name="Predicción")  # 0 = No deserta, 1 = Desertará
     prediction_label = models.CharField(max_length=50, verbose_name="Etiqueta de Predicción")
+    model_version = models.CharField(max_length=50, blank=True, default='', verbose_name="Versión del Modelo")
+    features_fingerprint = models.CharField(
+        max_length=32,
+        blank=True,
+        default='',
+        verbose_name="Huella de Características",
+        help_text="Huella del vector con el que se calculó la predicción"
+    )
     
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Predicción")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Fecha de Actualización")
@@ -181,3 +172,118 @@ class DropoutPrediction(models.Model):
 
     def __str__(self):
         return f"Predicción de {self.user.username} - {self.risk_percentage:.2f}% ({self.risk_level})"
+
+
+class ModelVersion(models.Model):
+    """Versión registrada del modelo de predicción (ver ``registry.py``)"""
+    version = models.CharField(max_length=50, unique=True, verbose_name="Versión")
+    artifact_path = models.CharField(
+        max_length=255,
+        verbose_name="Artefacto",
+        help_text="Ruta relativa a PREDICTION_MODEL_REGISTRY_DIR"
+    )
+    is_active = models.BooleanField(default=False, verbose_name="Activa")
+    metrics = models.JSONField(default=dict, blank=True, verbose_name="Métricas")
+    notes = models.TextField(blank=True, default='', verbose_name="Notas")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Registro")
+    activated_at = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de Activación")
+
+    class Meta:
+        verbose_name = "Versión del Modelo"
+        verbose_name_plural = "Versiones del Modelo"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['is_active'], name='prediction_model_active_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.version}{' (activa)' if self.is_active else ''}"
+
+    def activate(self):
+        """Marca esta versión como la única activa"""
+        from django.db import transaction
+        with transaction.atomic():
+            ModelVersion.objects.filter(is_active=True).exclude(pk=self.pk).update(is_active=False)
+            self.is_active = True
+            self.activated_at = timezone.now()
+            self.save(update_fields=['is_active', 'activated_at'])
+
+
+class PredictionJob(models.Model):
+    """Trabajo de re-evaluación masiva ejecutado por ``run_prediction_worker``"""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pendiente'),
+        (STATUS_RUNNING, 'En ejecución'),
+        (STATUS_DONE, 'Completado'),
+        (STATUS_FAILED, 'Fallido'),
+    ]
+
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        verbose_name="Estado"
+    )
+    requested_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        related_name='prediction_jobs',
+        null=True,
+        blank=True,
+        verbose_name="Solicitado por"
+    )
+    total = models.IntegerField(default=0, verbose_name="Total de Estudiantes")
+    processed = models.IntegerField(default=0, verbose_name="Procesados")
+    failed = models.IntegerField(default=0, verbose_name="Fallidos")
+    errors = models.TextField(blank=True, default='', verbose_name="Errores")
+    worker = models.CharField(max_length=100, blank=True, default='', verbose_name="Worker")
+    incremental = models.BooleanField(
+        default=True,
+        verbose_name="Incremental",
+        help_text="Solo estudiantes cuyas características o versión del modelo cambiaron"
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de Inicio")
+    heartbeat_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Último Latido",
+        help_text="Lo actualiza el worker tras cada bloque; si vence el plazo el trabajo se marca como fallido"
+    )
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de Finalización")
+
+    class Meta:
+        verbose_name = "Trabajo de Predicción"
+        verbose_name_plural = "Trabajos de Predicción"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='prediction_job_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"Trabajo {self.pk} - {self.get_status_display()}"
+
+    @property
+    def elapsed_seconds(self):
+        """Segundos de ejecución (hasta ahora si sigue en curso)"""
+        if not self.started_at:
+            return 0.0
+        end = self.finished_at or timezone.now()
+        return (end - self.started_at).total_seconds()
+
+    @property
+    def throughput(self):
+        """Estudiantes procesados por segundo"""
+        elapsed = self.elapsed_seconds
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def progress_percentage(self):
+        if not self.total:
+            return 0.0
+        return min(100.0, (self.processed + self.failed) * 100 / self.total)
@@ -0,0 +1,118 @@
+"""
+Re-evaluación masiva en paralelo con varios procesos.
+
+Divide ``StudentCharacteristics`` en rangos de clave primaria y evalúa cada
+rango en un ``ProcessPoolExecutor``. Cada proceso carga el modelo una sola vez
+(en el inicializador) y guarda en bloque los resultados de su rango con el
+mismo pipeline de ``bulk.rescore_students``.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.db import connections
+from django.db.models import Min, Max
+
+from .bulk import RescoreStats, rescore_students
+from .models import StudentCharacteristics
+
+# Rangos por proceso: más de uno equilibra la carga si los ids no son uniformes
+PARTITIONS_PER_WORKER = 4
+
+_worker_model = None
+
+
+def _init_worker():
+    """Prepara un proceso del pool: Django, conexiones propias y modelo cargado"""
+    global _worker_model
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+    # Las conexiones heredadas del proceso padre no se pueden compartir
+    connections.close_all()
+
+    from .scoring import active_model
+    _worker_model = active_model()
+
+
+def _score_partition(start_pk, end_pk, chunk_size, incremental=False):
+    """Evalúa los estudiantes con ``start_pk <= pk < end_pk``"""
+    queryset = StudentCharacteristics.objects.filter(
+        user__is_staff=False,
+        pk__gte=start_pk,
+        pk__lt=end_pk,
+    )
+    stats = rescore_students(
+        queryset=queryset,
+        chunk_size=chunk_size,
+        loaded_model=_worker_model,
+        incremental=incremental,
+    )
+    return stats.created, stats.updated, stats.failed, stats.errors
+
+
+def partition_ranges(min_pk, max_pk, partitions):
+    """Divide ``[min_pk, max_pk]`` en ``partitions`` rangos semiabiertos contiguos"""
+    span = max_pk - min_pk + 1
+    partitions = max(1, min(partitions, span))
+    step = -(-span // partitions)  # división entera hacia arriba
+    return [
+        (start, min(start + step, max_pk + 1))
+        for start in range(min_pk, max_pk + 1, step)
+    ]
+
+
+def rescore_students_parallel(workers=None, chunk_size=None, progress=None, incremental=False):
+    """
+    Re-evalúa a todos los estudiantes repartiendo rangos de pk entre procesos.
+
+    Args:
+        workers: Número de procesos (por defecto, los núcleos disponibles)
+        chunk_size: Estudiantes por bloque dentro de cada rango
+        progress: Callable opcional que recibe ``RescoreStats`` al terminar cada rango
+        incremental: Evaluar solo los estudiantes con predicción obsoleta
+
+    Returns:
+        ``RescoreStats`` con el resumen agregado.
+    """
+    workers = workers or os.cpu_count() or 1
+    stats = RescoreStats()
+
+    bounds = StudentCharacteristics.objects.filter(user__is_staff=False).aggregate(
+        min_pk=Min('pk'),
+        max_pk=Max('pk'),
+    )
+    if bounds['min_pk'] is None:
+        return stats
+
+    ranges = partition_ranges(bounds['min_pk'], bounds['max_pk'], workers * PARTITIONS_PER_WORKER)
+
+    # No heredar conexiones abiertas en los procesos hijos
+    connections.close_all()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        futures = {
+            executor.submit(_score_partition, start_pk, end_pk, chunk_size, incremental): (start_pk, end_pk)
+            for start_pk, end_pk in ranges
+        }
+        for future in as_completed(futures):
+            try:
+                created, updated, failed, errors = future.result()
+            except Exception as e:
+                start_pk, end_pk = futures[future]
+                stats.errors.append(f"Error en un rango de estudiantes: {str(e)}")
+                stats.failed += StudentCharacteristics.objects.filter(
+                    user__is_staff=False,
+                    pk__gte=start_pk,
+                    pk__lt=end_pk,
+                ).count()
+            else:
+                stats.created += created
+                stats.updated += updated
+                stats.failed += failed
+                stats.errors.extend(errors)
+            if progress:
+                progress(stats)
+
+    return stats
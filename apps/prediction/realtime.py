@@ -0,0 +1,125 @@
+"""
+Re-evaluación casi en tiempo real al guardar ``StudentCharacteristics``.
+
+Con ``PREDICTION_REALTIME_RESCORE`` activo, cada ``save()`` (admin, ORM o
+importación) encola el estudiante al confirmarse la transacción. Un hilo en
+segundo plano agrupa los estudiantes encolados y los evalúa en micro-lotes de
+hasta ``PREDICTION_REALTIME_BATCH_SIZE`` filas o cada
+``PREDICTION_REALTIME_FLUSH_MS`` milisegundos, con el mismo pipeline de
+``bulk.rescore_students`` en modo incremental. Así una edición masiva produce
+unas pocas inferencias matriciales en lugar de una por cada guardado.
+
+Las escrituras en bloque (``bulk_create`` / ``bulk_update``) no emiten
+``post_save``; quien las haga puede encolar los ids con
+``rescore_queue.enqueue(*pks)``.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = getattr(settings, 'PREDICTION_REALTIME_BATCH_SIZE', 500)
+FLUSH_MS = getattr(settings, 'PREDICTION_REALTIME_FLUSH_MS', 200)
+
+
+class RescoreQueue:
+    """Cola de estudiantes pendientes con vaciado por tamaño o por tiempo"""
+
+    def __init__(self, batch_size=BATCH_SIZE, flush_ms=FLUSH_MS):
+        self.batch_size = batch_size
+        self.flush_interval = flush_ms / 1000
+        self._pending = {}  # dict como conjunto ordenado de pks
+        self._first_enqueued = None
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = None
+        self.batches = 0
+        self.rescored = 0
+
+    def enqueue(self, *pks):
+        """Agrega estudiantes (pks de ``StudentCharacteristics``) a la cola"""
+        with self._cond:
+            self._ensure_thread()
+            if not self._pending:
+                self._first_enqueued = time.monotonic()
+            for pk in pks:
+                self._pending[pk] = None
+            self._cond.notify()
+
+    def pending(self):
+        with self._cond:
+            return len(self._pending)
+
+    def _ensure_thread(self):
+        # Llamar con el lock tomado. Tras un fork el hilo no existe en el hijo,
+        # y los pendientes heredados los evalúa el proceso padre.
+        if self._pid != os.getpid():
+            self._pending.clear()
+            self._thread = None
+            self._pid = os.getpid()
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='prediction-rescore', daemon=True)
+            self._thread.start()
+
+    def _take_batch(self):
+        # Llamar con el lock tomado
+        pks = list(islice(self._pending, self.batch_size))
+        for pk in pks:
+            del self._pending[pk]
+        self._first_enqueued = time.monotonic() if self._pending else None
+        return pks
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                deadline = self._first_enqueued + self.flush_interval
+                while len(self._pending) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._take_batch()
+            try:
+                self._rescore(batch)
+            finally:
+                # Conexiones propias de este hilo
+                connections.close_all()
+
+    def _rescore(self, pks):
+        from .bulk import rescore_students
+        from .models import StudentCharacteristics
+
+        queryset = StudentCharacteristics.objects.filter(pk__in=pks, user__is_staff=False)
+        try:
+            stats = rescore_students(queryset=queryset, chunk_size=self.batch_size, incremental=True)
+        except Exception:
+            logger.exception("No se pudo re-evaluar un lote de %s estudiantes", len(pks))
+            return
+        self.batches += 1
+        self.rescored += stats.processed
+        for error in stats.errors:
+            logger.warning("Re-evaluación en tiempo real: %s", error)
+
+    def flush(self):
+        """Evalúa de inmediato, en el hilo actual, todo lo que esté pendiente"""
+        while True:
+            with self._cond:
+                if not self._pending or self._pid != os.getpid():
+                    return
+                batch = self._take_batch()
+            self._rescore(batch)
+
+
+rescore_queue = RescoreQueue()
+
+# Procesos de corta duración (comandos, importaciones): no perder lo pendiente al salir
+atexit.register(rescore_queue.flush)
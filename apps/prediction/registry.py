@@ -0,0 +1,177 @@
+"""
+Registro de versiones del modelo de deserción.
+
+Los artefactos viven en ``PREDICTION_MODEL_REGISTRY_DIR`` y la tabla
+``ModelVersion`` indica cuál está activo. Cada proceso consulta ese puntero
+como máximo cada ``PREDICTION_MODEL_CHECK_INTERVAL`` segundos; si cambió, carga
+la nueva versión en un hilo aparte (fuera del camino de la petición) y la
+reemplaza de forma atómica cuando está lista. Mientras tanto se sigue
+respondiendo con la versión anterior.
+
+Si no hay ninguna versión activa se usa el modelo original
+``análisis/svm_model.pkl`` con la versión ``legacy``.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import joblib
+from django.conf import settings
+from django.db import DatabaseError
+
+from .features import check_schema
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+LEGACY_MODEL_PATH = BASE_DIR / "análisis" / "svm_model.pkl"
+LEGACY_VERSION = 'legacy'
+
+REGISTRY_DIR = Path(getattr(settings, 'PREDICTION_MODEL_REGISTRY_DIR', BASE_DIR / "análisis" / "models"))
+CHECK_INTERVAL = getattr(settings, 'PREDICTION_MODEL_CHECK_INTERVAL', 30)
+
+# Motor de inferencia: 'sklearn' (predict_proba del estimador) o 'flat'
+# (árboles compilados a arreglos planos, ver compiled.py)
+INFERENCE_ENGINE = getattr(settings, 'PREDICTION_INFERENCE_ENGINE', 'sklearn')
+
+# mmap_mode de joblib.load ('r' para compartir entre procesos los arreglos
+# NumPy del artefacto en lugar de copiarlos; requiere un dump sin compresión)
+MMAP_MODE = getattr(settings, 'PREDICTION_MODEL_MMAP_MODE', None)
+
+
+@dataclass(frozen=True)
+class ModelPointer:
+    """Versión que debería estar cargada y dónde está su artefacto"""
+    version: str
+    path: Path
+
+
+@dataclass(frozen=True)
+class LoadedModel:
+    """Modelo ya deserializado junto con su versión"""
+    version: str
+    path: Path
+    model: object  # Lo que se usa para inferir (el estimador o su versión compilada)
+    estimator: object  # Estimador de sklearn tal como se guardó
+
+
+def resolve_pointer():
+    """Versión activa según la base de datos, o el modelo legacy"""
+    from .models import ModelVersion
+    try:
+        active = ModelVersion.objects.filter(is_active=True).values_list('version', 'artifact_path').first()
+    except DatabaseError:
+        # Tabla aún no migrada o base de datos no disponible
+        active = None
+    if active is None:
+        return ModelPointer(LEGACY_VERSION, LEGACY_MODEL_PATH)
+    version, artifact_path = active
+    return ModelPointer(version, REGISTRY_DIR / artifact_path)
+
+
+def load_artifact(pointer):
+    """
+    Carga un artefacto y valida su esquema de columnas una sola vez.
+
+    La inferencia siempre recibe matrices en el orden de ``FEATURES``, así que
+    tras validar se descartan los nombres de columnas del estimador para que
+    sklearn no los vuelva a comprobar en cada llamada.
+    """
+    if not pointer.path.exists():
+        raise FileNotFoundError(f"Modelo no encontrado en {pointer.path}")
+    estimator = joblib.load(pointer.path, mmap_mode=MMAP_MODE)
+    check_schema(estimator)
+    _drop_feature_names(estimator)
+    return LoadedModel(pointer.version, pointer.path, prepare_model(estimator), estimator)
+
+
+def _drop_feature_names(estimator):
+    steps = [step for _, step in getattr(estimator, 'steps', ())] or [estimator]
+    for step in steps:
+        if 'feature_names_in_' in getattr(step, '__dict__', {}):
+            del step.feature_names_in_
+
+
+def prepare_model(estimator, engine=None):
+    """Aplica el motor de inferencia configurado al estimador cargado"""
+    engine = engine or INFERENCE_ENGINE
+    if engine != 'flat':
+        return estimator
+    from .compiled import compile_model
+    try:
+        return compile_model(estimator)
+    except TypeError as e:
+        logger.warning("Motor 'flat' no disponible para este modelo, se usa sklearn: %s", e)
+        return estimator
+
+
+class ModelRegistry:
+    """Modelo activo de este proceso con recarga en caliente"""
+
+    def __init__(self, check_interval=CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._active = None
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        self._loading_version = None
+
+    @property
+    def active_version(self):
+        """Versión cargada en este proceso (``None`` si aún no se cargó)"""
+        active = self._active
+        return active.version if active else None
+
+    def get(self):
+        """Devuelve el ``LoadedModel`` activo (lo carga la primera vez)"""
+        active = self._active
+        if active is None:
+            with self._lock:
+                if self._active is None:
+                    self._active = load_artifact(resolve_pointer())
+                    self._last_check = time.monotonic()
+                return self._active
+
+        self._maybe_reload()
+        return active
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        with self._lock:
+            if now - self._last_check < self.check_interval or self._loading_version:
+                return
+            self._last_check = now
+
+        pointer = resolve_pointer()
+        if pointer.version == self._active.version:
+            return
+
+        with self._lock:
+            if self._loading_version:
+                return
+            self._loading_version = pointer.version
+        threading.Thread(
+            target=self._load_in_background,
+            args=(pointer,),
+            name=f"model-loader-{pointer.version}",
+            daemon=True,
+        ).start()
+
+    def _load_in_background(self, pointer):
+        try:
+            loaded = load_artifact(pointer)
+            # Inferencia de prueba antes de exponer la nueva versión
+            from .scoring import warm_up_model
+            warm_up_model(loaded.model)
+            self._active = loaded
+            logger.info("Modelo de predicción actualizado a la versión %s", pointer.version)
+        except Exception:
+            logger.exception("No se pudo cargar la versión %s del modelo", pointer.version)
+        finally:
+            self._loading_version = None
+
+
+registry = ModelRegistry()
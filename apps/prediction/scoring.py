@@ -0,0 +1,158 @@
+"""
+Capa de inferencia del modelo de deserción.
+
+Centraliza la carga del modelo y la evaluación de estudiantes para que el API,
+el admin y los comandos usen exactamente la misma regla. El modelo se invoca
+una sola vez por lote (``predict_proba``) y la predicción se deriva de la
+probabilidad con un umbral configurable, en lugar de llamar además a
+``predict`` y recorrer todos los árboles dos veces.
+"""
+import numpy as np
+from django.conf import settings
+
+from .cache import prediction_cache
+from .features import DTYPE, N_FEATURES
+from .registry import registry
+
+# Cortes de los niveles de riesgo
+RISK_LEVEL_LOW = 0.3
+RISK_LEVEL_HIGH = 0.6
+
+# Umbral sobre risk_score a partir del cual la predicción es "Deserción".
+# Por defecto coincide con el corte del nivel "Alto", de modo que la etiqueta
+# y el nivel de riesgo nunca se contradicen; 0.5 reproduce model.predict().
+DECISION_THRESHOLD = getattr(settings, 'PREDICTION_DECISION_THRESHOLD', RISK_LEVEL_HIGH)
+
+# True cuando el modelo ya se cargó en este proceso, ya sea con warm_up() al
+# arrancar o en la primera petición que lo necesitó
+_model_ready = False
+
+
+def active_model():
+    """``LoadedModel`` (versión + modelo) activo en este proceso"""
+    global _model_ready
+    loaded = registry.get()
+    _model_ready = True
+    return loaded
+
+
+def load_model():
+    """Modelo activo (se carga una sola vez y se recarga si cambia la versión)"""
+    return active_model().model
+
+
+def warm_up_model(model):
+    """Ejecuta una inferencia de prueba con el modelo dado"""
+    score(np.zeros((1, N_FEATURES), dtype=DTYPE), model=model)
+
+
+def warm_up():
+    """
+    Carga el modelo y ejecuta una inferencia de prueba para que la primera
+    petición real no pague la deserialización ni la inicialización de sklearn.
+    """
+    loaded = active_model()
+    warm_up_model(loaded.model)
+    return loaded
+
+
+def is_model_ready():
+    """Indica si el modelo de este proceso ya está cargado"""
+    return _model_ready
+
+
+def classify_risk(risk_score):
+    """Clasifica el índice de riesgo en Bajo / Medio / Alto"""
+    if risk_score < RISK_LEVEL_LOW:
+        return "Bajo"
+    elif risk_score < RISK_LEVEL_HIGH:
+        return "Medio"
+    return "Alto"
+
+
+def prediction_label(prediction):
+    """Etiqueta legible de la predicción (0 = No deserta, 1 = Desertará)"""
+    return 'Deserción' if prediction == 1 else 'No deserción'
+
+
+def score(students, model=None, threshold=None):
+    """
+    Evalúa un lote de estudiantes con una sola pasada del modelo.
+
+    Args:
+        students: DataFrame o matriz con una fila por estudiante
+        model: Modelo a usar (por defecto el modelo cargado con ``load_model``)
+        threshold: Umbral de decisión (por defecto ``DECISION_THRESHOLD``)
+
+    Returns:
+        Tupla ``(risk_scores, predictions)`` de arreglos NumPy alineados con
+        las filas de entrada.
+    """
+    if model is None:
+        model = load_model()
+    if threshold is None:
+        threshold = DECISION_THRESHOLD
+
+    risk_scores = model.predict_proba(students)[:, 1]  # Probabilidad de deserción
+    predictions = (risk_scores >= threshold).astype(int)
+    return risk_scores, predictions
+
+
+def score_cached(students, loaded=None, threshold=None):
+    """
+    Igual que ``score`` pero consultando primero la cache de predicciones;
+    solo las filas sin acierto pasan por el modelo.
+
+    Args:
+        students: Matriz ``(n, 34)`` en el orden de ``FEATURES``
+        loaded: ``LoadedModel`` a usar (por defecto el activo)
+        threshold: Umbral de decisión (por defecto ``DECISION_THRESHOLD``)
+    """
+    if loaded is None:
+        loaded = active_model()
+    if not prediction_cache.enabled:
+        return score(students, model=loaded.model, threshold=threshold)
+    if threshold is None:
+        threshold = DECISION_THRESHOLD
+
+    students = np.asarray(students, dtype=DTYPE)
+    keys, risk_scores, missing = prediction_cache.lookup(loaded.version, students)
+    if missing.any():
+        computed = loaded.model.predict_proba(students[missing])[:, 1]
+        risk_scores[missing] = computed
+        prediction_cache.store(loaded.version, [keys[i] for i in np.flatnonzero(missing)], computed)
+    predictions = (risk_scores >= threshold).astype(int)
+    return risk_scores, predictions
+
+
+def build_result(risk_score, prediction, model_version=''):
+    """Campos de ``DropoutPrediction`` para un estudiante ya evaluado"""
+    risk_score = float(risk_score)
+    prediction = int(prediction)
+    return {
+        'risk_score': risk_score,
+        'risk_percentage': risk_score * 100,
+        'risk_level': classify_risk(risk_score),
+        'prediction': prediction,
+        'prediction_label': prediction_label(prediction),
+        'model_version': model_version,
+    }
+
+
+def score_one(student, threshold=None):
+    """Evalúa un solo estudiante con el modelo activo y devuelve ``build_result``"""
+    loaded = active_model()
+    risk_scores, predictions = score_cached(student, loaded=loaded, threshold=threshold)
+    return build_result(risk_scores[0], predictions[0], loaded.version)
+
+
+def legacy_score(students, model=None):
+    """
+    Ruta anterior (``predict_proba`` + ``predict``). Solo se conserva para
+    comparar latencias en ``benchmark_prediction``.
+    """
+    if model is None:
+        model = load_model()
+    risk_scores = model.predict_proba(students)[:, 1]
+    predictions = np.asarray(model.predict(students)).astype(int)
+    return risk_scores, predictions
@@ -0,0 +1,23 @@
+"""
+Receptores de señales de la app de predicción.
+
+Solo se conectan si ``PREDICTION_REALTIME_RESCORE`` está activo (ver
+``PredictionConfig.ready``).
+"""
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import StudentCharacteristics
+from .realtime import rescore_queue
+
+
+@receiver(post_save, sender=StudentCharacteristics, dispatch_uid='prediction_rescore_on_save')
+def enqueue_rescore_on_save(sender, instance, raw=False, **kwargs):
+    """Encola al estudiante cuando se confirma la transacción que lo guardó"""
+    if raw:
+        # loaddata: los fixtures no disparan inferencias
+        return
+    transaction.on_commit(partial(rescore_queue.enqueue, instance.pk))
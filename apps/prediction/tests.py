@@ -1,4 +1,383 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.utils import timezone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+from sklearn.tree import DecisionTreeClassifier
 
+from .bulk import RescoreStats
+from .cache import PredictionCache, feature_key
+from .compiled import FlatForest, compile_model
+from .features import COLUMN_NAMES, FEATURES, N_FEATURES, check_schema, schema
+from .jobs import LEASE_SECONDS, LeaseLost, claim_next_job, expire_stale_jobs, heartbeat, run_job
+from .models import PredictionJob
+from .scoring import active_model, build_result, score
+from .training import DATASET_PATH, build_pipeline, load_dataset
+from .views import predict_dropout_risk_batch, prediction_health
+
+
+def _training_data(n_samples=400, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_samples, N_FEATURES)) * 10
+    y = (X[:, 22] + X[:, 28] + rng.normal(size=n_samples) > 0).astype(int)
+    return X, y
+
+
+class FlatForestParityTests(SimpleTestCase):
+    """El motor compilado debe dar las mismas probabilidades que sklearn"""
+
+    def setUp(self):
+        self.X, self.y = _training_data()
+        self.X_test, _ = _training_data(n_samples=200, seed=1)
+
+    def test_random_forest_batch(self):
+        forest = RandomForestClassifier(n_estimators=25, max_depth=8, random_state=42).fit(self.X, self.y)
+        flat = compile_model(forest)
+        np.testing.assert_allclose(flat.predict_proba(self.X_test), forest.predict_proba(self.X_test), atol=1e-12)
+        np.testing.assert_array_equal(flat.predict(self.X_test), forest.predict(self.X_test))
+
+    def test_random_forest_single_row(self):
+        forest = RandomForestClassifier(n_estimators=10, random_state=42).fit(self.X, self.y)
+        flat = compile_model(forest)
+        for row in self.X_test[:20]:
+            np.testing.assert_allclose(flat.predict_proba(row), forest.predict_proba(row.reshape(1, -1)), atol=1e-12)
+
+    def test_thresholds_use_float32_like_sklearn(self):
+        forest = RandomForestClassifier(n_estimators=10, random_state=42).fit(self.X, self.y)
+        flat = compile_model(forest)
+        # Valores justo en los umbrales: la comparación debe hacerse tras convertir a float32
+        X_edge = np.tile(self.X_test[:1], (N_FEATURES, 1))
+        thresholds = forest.estimators_[0].tree_.threshold
+        for column in range(N_FEATURES):
+            X_edge[column, column] = thresholds[0]
+        np.testing.assert_allclose(flat.predict_proba(X_edge), forest.predict_proba(X_edge), atol=1e-12)
+
+    def test_decision_tree(self):
+        tree = DecisionTreeClassifier(max_depth=6, random_state=0).fit(self.X, self.y)
+        flat = FlatForest.from_sklearn(tree)
+        np.testing.assert_allclose(flat.predict_proba(self.X_test), tree.predict_proba(self.X_test), atol=1e-12)
+
+    def test_scaled_pipeline(self):
+        pipeline = Pipeline([
+            ('scaler', StandardScaler()),
+            ('model', RandomForestClassifier(n_estimators=10, random_state=42)),
+        ]).fit(self.X, self.y)
+        flat = compile_model(pipeline)
+        np.testing.assert_allclose(flat.predict_proba(self.X_test), pipeline.predict_proba(self.X_test), atol=1e-12)
+
+    def test_unsupported_model(self):
+        with self.assertRaises(TypeError):
+            compile_model(object())
+        pipeline = Pipeline([('scaler', StandardScaler()), ('model', SVC())]).fit(self.X, self.y)
+        with self.assertRaises(TypeError):
+            compile_model(pipeline)
+
+
+class FeatureSchemaTests(SimpleTestCase):
+    """El esquema embebido en el artefacto se valida al cargarlo"""
+
+    def test_matching_schema(self):
+        X, y = _training_data()
+        model = DecisionTreeClassifier(max_depth=3).fit(X, y)
+        model.feature_schema_ = schema()
+        check_schema(model)
+
+    def test_reordered_columns(self):
+        model = DecisionTreeClassifier()
+        model.feature_schema_ = {'columns': list(reversed(COLUMN_NAMES)), 'dtype': 'float64'}
+        with self.assertRaises(ValueError):
+            check_schema(model)
+
+    def test_wrong_number_of_features(self):
+        X, y = _training_data()
+        model = DecisionTreeClassifier(max_depth=3).fit(X[:, :10], y)
+        with self.assertRaises(ValueError):
+            check_schema(model)
+
+
+class PredictionCacheTests(SimpleTestCase):
+    """Cache LRU en memoria (sin backend de Django)"""
+
+    def setUp(self):
+        self.cache = PredictionCache(maxsize=2, backend=None)
+        self.students, _ = _training_data(n_samples=3)
+
+    def test_hit_after_store(self):
+        keys, risk_scores, missing = self.cache.lookup('v1', self.students[:1])
+        self.assertTrue(missing.all())
+        self.cache.store('v1', keys, [0.75])
+
+        _, risk_scores, missing = self.cache.lookup('v1', self.students[:1])
+        self.assertFalse(missing.any())
+        self.assertEqual(risk_scores[0], 0.75)
+        self.assertEqual(self.cache.stats()['hit_rate'], 0.5)
+
+    def test_lru_eviction(self):
+        keys, _, _ = self.cache.lookup('v1', self.students)
+        self.cache.store('v1', keys, [0.1, 0.2, 0.3])
+        _, _, missing = self.cache.lookup('v1', self.students)
+        np.testing.assert_array_equal(missing, [True, False, False])
+
+    def test_version_change_invalidates(self):
+        keys, _, _ = self.cache.lookup('v1', self.students[:1])
+        self.cache.store('v1', keys, [0.4])
+        _, _, missing = self.cache.lookup('v2', self.students[:1])
+        self.assertTrue(missing.all())
+        self.assertEqual(self.cache.stats()['size'], 0)
+
+        # Resultados tardíos de la versión anterior no se guardan
+        self.cache.store('v1', keys, [0.4])
+        self.assertEqual(self.cache.stats()['size'], 0)
+
+    def test_key_is_canonical(self):
+        row = np.zeros(N_FEATURES)
+        self.assertEqual(feature_key('v1', row), feature_key('v1', -row))
+        self.assertEqual(feature_key('v1', row), feature_key('v1', row.astype(int)))
+        self.assertNotEqual(feature_key('v1', row), feature_key('v2', row))
+
+
+class FixedProbabilityModel:
+    """Modelo que devuelve las probabilidades de deserción indicadas"""
+
+    def __init__(self, risk_scores):
+        self.risk_scores = np.asarray(risk_scores, dtype=float)
+
+    def predict_proba(self, students):
+        return np.column_stack([1 - self.risk_scores, self.risk_scores])
+
+
+class DecisionThresholdTests(SimpleTestCase):
+    """La etiqueta de la predicción coincide con el nivel de riesgo"""
+
+    def test_label_matches_risk_level(self):
+        risk_scores = [0.0, 0.29, 0.3, 0.5, 0.55, 0.5999, 0.6, 0.75, 1.0]
+        model = FixedProbabilityModel(risk_scores)
+        scores, predictions = score(np.zeros((len(risk_scores), N_FEATURES)), model=model)
+        for risk_score, prediction in zip(scores, predictions):
+            result = build_result(risk_score, prediction)
+            self.assertEqual(
+                result['prediction_label'] == 'Deserción', result['risk_level'] == 'Alto', result,
+            )
+
+
+def _student(**overrides):
+    """Estudiante válido para el API con todos los campos requeridos"""
+    student = {feature.field: 1 for feature in FEATURES if feature.required}
+    student['age_at_enrollment'] = 20
+    student.update(overrides)
+    return student
+
+
+class BatchEndpointTests(SimpleTestCase):
+    """Endpoint batch con un modelo de prueba en lugar del modelo activo"""
+
+    def setUp(self):
+        X, y = _training_data()
+        loaded = SimpleNamespace(model=DecisionTreeClassifier(max_depth=3).fit(X, y), version='test')
+        patchers = [
+            mock.patch('apps.prediction.views.active_model', return_value=loaded),
+            mock.patch(
+                'apps.prediction.views.score_cached',
+                side_effect=lambda students, loaded: score(students, model=loaded.model),
+            ),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.factory = RequestFactory()
+
+    def post(self, body, content_type='application/json'):
+        if not isinstance(body, (str, bytes)):
+            body = json.dumps(body)
+        request = self.factory.post('/api/predict-dropout-risk/batch/', data=body, content_type=content_type)
+        response = predict_dropout_risk_batch(request)
+        return response.status_code, json.loads(response.content)
+
+    def test_array(self):
+        status, data = self.post([_student(), _student(gender=0)])
+        self.assertEqual(status, 200)
+        self.assertEqual((data['processed'], data['failed']), (2, 0))
+        self.assertEqual([result['index'] for result in data['results']], [0, 1])
+        self.assertEqual(data['results'][0]['model_version'], 'test')
+
+    def test_array_with_bom(self):
+        body = '\ufeff' + json.dumps([_student()])
+        status, data = self.post(body.encode('utf-8'))
+        self.assertEqual(status, 200)
+        self.assertEqual(data['processed'], 1)
+
+    def test_single_object_rejected(self):
+        # El payload de un solo estudiante va a /api/predict-dropout-risk/, no al batch
+        for body in (json.dumps(_student()), json.dumps(_student(), indent=2)):
+            status, data = self.post(body)
+            self.assertEqual(status, 400)
+            self.assertEqual(data['error'], 'Se esperaba un arreglo JSON de estudiantes')
+
+    def test_ndjson(self):
+        body = '\n'.join(json.dumps(student) for student in [_student(), _student(gender=0)])
+        for content_type in ('application/x-ndjson', 'application/json'):
+            status, data = self.post(body, content_type=content_type)
+            self.assertEqual(status, 200)
+            self.assertEqual(data['processed'], 2)
+
+    def test_ndjson_invalid_line(self):
+        body = json.dumps(_student()) + '\n{"gender": \n'
+        status, data = self.post(body, content_type='application/x-ndjson')
+        self.assertEqual(status, 200)
+        self.assertEqual(data['results'][1], {'index': 1, 'success': False, 'error': 'Formato JSON inválido'})
+
+        # Sin content type NDJSON un cuerpo inválido es un error de todo el lote
+        status, data = self.post(body)
+        self.assertEqual(status, 400)
+        self.assertEqual(data['error'], 'Formato JSON inválido')
+
+    def test_invalid_json(self):
+        status, data = self.post('{"gender": 1,\n "age_at_enrollment": }')
+        self.assertEqual(status, 400)
+        self.assertFalse(data['success'])
+
+    def test_mixed_valid_and_invalid(self):
+        student = _student()
+        del student['gender']
+        status, data = self.post([_student(), student, _student(age_at_enrollment='veinte'), 3])
+        self.assertEqual(status, 200)
+        self.assertEqual((data['total'], data['processed'], data['failed']), (4, 1, 3))
+        self.assertTrue(data['results'][0]['success'])
+        self.assertIn('gender', data['results'][1]['error'])
+        self.assertIn('age_at_enrollment', data['results'][2]['error'])
+        self.assertEqual(data['results'][3]['error'], 'Cada elemento debe ser un objeto JSON')
+
+    def test_non_finite_values(self):
+        # json.loads acepta NaN e Infinity aunque no sean JSON estándar
+        status, data = self.post('[%s]' % json.dumps(_student(age_at_enrollment=float('nan'))))
+        self.assertEqual(status, 200)
+        self.assertIn('no finito', data['results'][0]['error'])
+
+        status, data = self.post([_student(gdp='inf')])
+        self.assertIn('no finito', data['results'][0]['error'])
+
+    def test_too_many_items(self):
+        with mock.patch('apps.prediction.views.BATCH_MAX_ITEMS', 2):
+            status, data = self.post([_student()] * 3)
+        self.assertEqual(status, 413)
+        self.assertFalse(data['success'])
+
+    def test_empty(self):
+        status, _ = self.post([])
+        self.assertEqual(status, 400)
+
+
+class HealthCheckTests(SimpleTestCase):
+    """El health check informa si el modelo está cargado sin cargarlo"""
+
+    def setUp(self):
+        X, y = _training_data()
+        self.loaded = SimpleNamespace(model=DecisionTreeClassifier(max_depth=3).fit(X, y), version='test')
+        patcher = mock.patch('apps.prediction.scoring._model_ready', False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def health(self):
+        response = prediction_health(RequestFactory().get('/api/prediction/health/'))
+        return response.status_code, json.loads(response.content)
+
+    def test_ready_after_first_request(self):
+        with mock.patch('apps.prediction.scoring.registry.get', return_value=self.loaded):
+            active_model()
+            status, data = self.health()
+        self.assertEqual(status, 200)
+        self.assertTrue(data['model_ready'])
+
+    def test_not_ready_until_loaded(self):
+        with mock.patch('apps.prediction.scoring.registry.get', return_value=self.loaded) as get:
+            status, data = self.health()
+        # El health check solo informa; no carga el modelo
+        self.assertEqual(status, 503)
+        self.assertFalse(data['model_ready'])
+        get.assert_not_called()
+
+
+class JobLeaseTests(TestCase):
+    """Un trabajo cuyo plazo venció no se sobrescribe al terminar"""
+
+    def setUp(self):
+        PredictionJob.objects.create()
+        self.job = claim_next_job(worker='worker-a')
+        patchers = [
+            mock.patch('apps.prediction.bulk.ensure_characteristics', return_value=0),
+            mock.patch('apps.prediction.scoring.active_model', return_value=SimpleNamespace(version='test')),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def expire(self):
+        later = timezone.now() + timedelta(seconds=LEASE_SECONDS + 1)
+        self.assertEqual(expire_stale_jobs(now=later), 1)
+
+    def test_heartbeat_after_expiry(self):
+        heartbeat(self.job, processed=10)
+        self.expire()
+        with self.assertRaises(LeaseLost):
+            heartbeat(self.job, processed=20)
+        self.assertEqual(PredictionJob.objects.get(pk=self.job.pk).processed, 10)
+
+    def test_expired_while_running_stays_failed(self):
+        def rescore(progress, **kwargs):
+            stats = RescoreStats(created=5)
+            progress(stats)
+            self.expire()
+            progress(stats)
+            raise AssertionError('El worker debió detenerse al perder el plazo')
+
+        with mock.patch('apps.prediction.bulk.rescore_students', side_effect=rescore):
+            job = run_job(self.job)
+        self.assertEqual(job.status, PredictionJob.STATUS_FAILED)
+        self.assertIn('dejó de responder', job.errors)
+
+    def test_expired_after_last_chunk_is_not_marked_done(self):
+        def rescore(progress, **kwargs):
+            self.expire()
+            return RescoreStats(created=5)
+
+        with mock.patch('apps.prediction.bulk.rescore_students', side_effect=rescore):
+            job = run_job(self.job)
+        self.assertEqual(job.status, PredictionJob.STATUS_FAILED)
+        self.assertEqual(PredictionJob.objects.get(pk=self.job.pk).status, PredictionJob.STATUS_FAILED)
+
+    def test_done(self):
+        with mock.patch('apps.prediction.bulk.rescore_students', return_value=RescoreStats(created=5, updated=2)):
+            job = run_job(self.job)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed), (PredictionJob.STATUS_DONE, 7))
+
+
+class TrainingTargetTests(SimpleTestCase):
+    """Los modelos entrenados publican la probabilidad de deserción en la columna 1"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.X, cls.y = load_dataset(DATASET_PATH)
+
+    def test_dropout_is_positive_class(self):
+        import pandas as pd
+        target = pd.read_csv(DATASET_PATH, encoding='utf-8-sig')['Target']
+        np.testing.assert_array_equal(self.y, (target == 'Dropout').to_numpy(dtype=int))
+
+    def test_dropout_row_scores_high(self):
+        model = build_pipeline('rf', random_state=0)
+        model.set_params(model__n_estimators=50)
+        model.fit(self.X, self.y)
+
+        dropout_row = self.X[np.flatnonzero(self.y == 1)[:1]]
+        risk_scores, predictions = score(dropout_row, model=model, threshold=0.5)
+        self.assertGreater(risk_scores[0], 0.5)
+        self.assertEqual(build_result(risk_scores[0], predictions[0])['prediction_label'], 'Deserción')
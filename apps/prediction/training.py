@@ -0,0 +1,238 @@
+"""
+Entrenamiento reproducible del modelo de deserción.
+
+Reemplaza los pasos manuales de
+``análisis/predict-students-dropout-and-academic-success.ipynb``: carga
+``análisis/dataset.csv``, busca hiperparámetros con ``HalvingGridSearchCV`` y
+guarda el mejor ``Pipeline`` (``StandardScaler`` + estimador, con el esquema de
+columnas embebido) como una versión del registro junto con sus métricas.
+
+La puntuación de cada fold se memoriza en disco con ``joblib.Memory``
+(clave: hiperparámetros + datos del fold), así que volver a ejecutar la
+búsqueda solo entrena las configuraciones que aún no se evaluaron.
+"""
+import hashlib
+import json
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.base import BaseEstimator, ClassifierMixin, clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.metrics import accuracy_score, confusion_matrix, roc_auc_score
+from sklearn.model_selection import HalvingGridSearchCV, train_test_split
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+
+from .features import COLUMN_NAMES, DTYPE, schema
+from .registry import BASE_DIR
+
+DATASET_PATH = BASE_DIR / "análisis" / "dataset.csv"
+CACHE_DIR = BASE_DIR / "análisis" / ".train_cache"
+
+# Estimadores explorados en el notebook. Las grillas usan los nombres de
+# parámetro del paso ``model`` del Pipeline.
+ESTIMATORS = {
+    'rf': (
+        lambda random_state: RandomForestClassifier(random_state=random_state),
+        # Misma grilla que el notebook (432 configuraciones)
+        {
+            'n_estimators': [100, 300, 500],
+            'max_depth': [10, 20, 50, None],
+            'min_samples_split': [2, 5, 10],
+            'min_samples_leaf': [1, 2, 4],
+            'max_features': ['sqrt', 'log2'],
+            'bootstrap': [True, False],
+        },
+    ),
+    'svm': (
+        lambda random_state: SVC(probability=True, random_state=random_state),
+        {
+            'C': [0.1, 1, 10, 100],
+            'gamma': ['scale', 0.1, 0.01, 0.001],
+            'kernel': ['rbf'],
+        },
+    ),
+    'knn': (
+        lambda random_state: KNeighborsClassifier(),
+        {
+            'n_neighbors': [3, 5, 7, 11, 15, 21],
+            'weights': ['uniform', 'distance'],
+            'p': [1, 2],
+        },
+    ),
+}
+
+
+def build_pipeline(estimator='rf', random_state=42):
+    """
+    Pipeline de entrenamiento: ``StandardScaler`` + estimador.
+
+    El escalado viaja dentro del artefacto, así que el API puede enviar los
+    valores crudos de ``FEATURES`` a cualquier estimador (SVM/KNN incluidos).
+    """
+    factory, _ = ESTIMATORS[estimator]
+    return Pipeline([
+        ('scaler', StandardScaler()),
+        ('model', factory(random_state)),
+    ])
+
+
+def param_grid(estimator='rf', prefix='model__'):
+    _, grid = ESTIMATORS[estimator]
+    return {f'{prefix}{name}': values for name, values in grid.items()}
+
+
+def load_dataset(path=DATASET_PATH):
+    """
+    Devuelve ``(X, y)`` con las columnas en el orden de ``features.FEATURES``.
+
+    El objetivo se codifica explícitamente con ``1 = Dropout`` y
+    ``0 = Enrolled / Graduate``: ``scoring`` lee ``predict_proba(...)[:, 1]``
+    como probabilidad de deserción. (El ``LabelEncoder`` del notebook asigna
+    el orden alfabético, ``Dropout = 0``, y produciría un riesgo invertido.)
+    """
+    df = pd.read_csv(path, encoding='utf-8-sig')
+    X = df[list(COLUMN_NAMES)].to_numpy(dtype=DTYPE)
+    y = (df['Target'] == 'Dropout').to_numpy(dtype=int)
+    return X, y
+
+
+def dataset_fingerprint(path=DATASET_PATH):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def _fit_and_score(estimator, X_train, y_train, X_val, y_val):
+    """Entrena una configuración en un fold y devuelve su accuracy de validación"""
+    estimator.fit(X_train, y_train)
+    return accuracy_score(y_val, estimator.predict(X_val))
+
+
+class CachedFoldEstimator(ClassifierMixin, BaseEstimator):
+    """
+    Envoltorio para la búsqueda de hiperparámetros.
+
+    ``fit`` solo guarda los datos del fold; el entrenamiento real ocurre en
+    ``score`` a través de ``joblib.Memory`` (la clave incluye los parámetros
+    del estimador sin entrenar), de modo que un fold ya evaluado en una
+    ejecución anterior no se vuelve a entrenar.
+    """
+
+    def __init__(self, estimator=None, cache_dir=None):
+        self.estimator = estimator
+        self.cache_dir = cache_dir
+
+    def fit(self, X, y):
+        self.X_fit_, self.y_fit_ = X, y
+        self.classes_ = np.unique(y)
+        return self
+
+    def score(self, X, y, sample_weight=None):
+        fit_and_score = _fit_and_score
+        if self.cache_dir:
+            fit_and_score = joblib.Memory(self.cache_dir, verbose=0).cache(_fit_and_score)
+        return fit_and_score(clone(self.estimator), self.X_fit_, self.y_fit_, X, y)
+
+
+class PhaseTimer:
+    """Acumula el tiempo de pared de cada fase del entrenamiento"""
+
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = time.perf_counter() - start
+
+
+def train(dataset_path=DATASET_PATH, estimator='rf', cv=3, factor=3, n_jobs=-1, test_size=0.2, random_state=42,
+          cache_dir=CACHE_DIR, verbose=0, timer=None):
+    """
+    Ejecuta la búsqueda y devuelve ``(pipeline, métricas)``.
+
+    El pipeline se entrena con matrices (sin nombres de columnas) y lleva el
+    esquema de ``FEATURES`` en ``feature_schema_``; el registro lo valida al
+    cargarlo.
+
+    Args:
+        estimator: Clave de ``ESTIMATORS`` (``rf``, ``svm`` o ``knn``)
+        cache_dir: Directorio de ``joblib.Memory`` (``None`` desactiva la cache)
+        timer: ``PhaseTimer`` donde registrar los tiempos de cada fase
+    """
+    timer = timer or PhaseTimer()
+
+    with timer.phase('carga'):
+        X, y = load_dataset(dataset_path)
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
+
+    with timer.phase('busqueda'):
+        search = HalvingGridSearchCV(
+            estimator=CachedFoldEstimator(
+                estimator=build_pipeline(estimator, random_state),
+                cache_dir=str(cache_dir) if cache_dir else None,
+            ),
+            param_grid=param_grid(estimator, prefix='estimator__model__'),
+            cv=cv,
+            factor=factor,
+            min_resources='exhaust',
+            n_jobs=n_jobs,
+            refit=False,
+            random_state=random_state,
+            verbose=verbose,
+        )
+        search.fit(X_train, y_train)
+
+    with timer.phase('reentrenamiento'):
+        best_params = {
+            name.removeprefix('estimator__model__'): value
+            for name, value in search.best_params_.items()
+        }
+        model = build_pipeline(estimator, random_state)
+        model.set_params(**{f'model__{name}': value for name, value in best_params.items()})
+        model.fit(X_train, y_train)
+        model.feature_schema_ = schema()
+
+    with timer.phase('evaluacion'):
+        y_pred = model.predict(X_test)
+        metrics = {
+            'estimator': estimator,
+            'best_params': best_params,
+            'cv_best_score': float(search.best_score_),
+            'test_accuracy': float(accuracy_score(y_test, y_pred)),
+            'test_roc_auc': float(roc_auc_score(y_test, model.predict_proba(X_test)[:, 1])),
+            'confusion_matrix': confusion_matrix(y_test, y_pred).tolist(),
+            'n_candidates': int(search.n_candidates_[0]),
+            'n_iterations': int(search.n_iterations_),
+            'cv': cv,
+            'factor': factor,
+            'test_size': test_size,
+            'random_state': random_state,
+            'n_train': int(len(y_train)),
+            'n_test': int(len(y_test)),
+            'feature_columns': list(COLUMN_NAMES),
+            'dataset_sha256': dataset_fingerprint(dataset_path),
+            'sklearn_version': sklearn.__version__,
+        }
+
+    return model, metrics
+
+
+def save_artifact(model, metrics, directory):
+    """Guarda el modelo (sin compresión, apto para mmap) y ``metrics.json``"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    model_path = directory / 'model.joblib'
+    joblib.dump(model, model_path)
+    (directory / 'metrics.json').write_text(json.dumps(metrics, indent=2, ensure_ascii=False))
+    return model_path
@@ -5,5 +5,6 @@ app_name = 'prediction'
 
 urlpatterns = [
     path('api/predict-dropout-risk/', views.predict_dropout_risk, name='predict_dropout_risk'),
+    path('api/predict-dropout-risk/batch/', views.predict_dropout_risk_batch, name='predict_dropout_risk_batch'),
+    path('api/prediction/health/', views.prediction_health, name='prediction_health'),
 ]
-
@@ -1,28 +1,18 @@
+from django.conf import settings
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.contrib.auth.models import User
 import json
-import joblib
-import pandas as pd
-from pathlib import Path
+from .features import validate_payload, payloads_to_array, fingerprint
 from .models import StudentCharacteristics, DropoutPrediction
+from .registry import registry
+from .cache import prediction_cache
+from .scoring import active_model, score_cached, score_one, build_result, is_model_ready
 
-# Ruta al modelo
-BASE_DIR = Path(__file__).resolve().parent.parent.parent
-MODEL_PATH = BASE_DIR / "análisis" / "svm_model.pkl"
+# Máximo de estudiantes aceptados por petición en el endpoint batch
+BATCH_MAX_ITEMS = getattr(settings, 'PREDICTION_BATCH_MAX_ITEMS', 1000)
 
-# Cargar el modelo una vez al iniciar (cache)
-_model = None
-
-def load_model():
-    """Cargar el modelo una sola vez"""
-    global _model
-    if _model is None:
-        if not MODEL_PATH.exists():
-            raise FileNotFoundError(f"Modelo no encontrado en {MODEL_PATH}")
-        _model = joblib.load(MODEL_PATH)
-    return _model
 
 @csrf_exempt
 @require_http_methods(["POST"])
@@ -36,75 +26,23 @@ def predict_dropout_risk(request):
         # Parsear JSON
         data = json.loads(request.body)
         
-        # Validar y extraer datos
-        student_data = {
-            "Marital status": data.get("marital_status"),
-            "Application mode": data.get("application_mode"),
-            "Application order": data.get("application_order"),
-            "Course": data.get("course"),
-            "Daytime/evening attendance": data.get("daytime_evening_attendance"),
-            "Previous qualification": data.get("previous_qualification"),
-            "Nacionality": data.get("nacionality"),
-            "Mother's qualification": data.get("mother_qualification"),
-            "Father's qualification": data.get("father_qualification"),
-            "Mother's occupation": data.get("mother_occupation"),
-            "Father's occupation": data.get("father_occupation"),
-            "Displaced": data.get("displaced", 0),
-            "Educational special needs": data.get("educational_special_needs", 0),
-            "Debtor": data.get("debtor", 0),
-            "Tuition fees up to date": data.get("tuition_fees_up_to_date", 0),
-            "Gender": data.get("gender"),
-            "Scholarship holder": data.get("scholarship_holder", 0),
-            "Age at enrollment": data.get("age_at_enrollment"),
-            "International": data.get("international", 0),
-            "Curricular units 1st sem (credited)": data.get("curricular_units_1st_sem_credited", 0),
-            "Curricular units 1st sem (enrolled)": data.get("curricular_units_1st_sem_enrolled", 0),
-            "Curricular units 1st sem (evaluations)": data.get("curricular_units_1st_sem_evaluations", 0),
-            "Curricular units 1st sem (approved)": data.get("curricular_units_1st_sem_approved", 0),
-            "Curricular units 1st sem (grade)": data.get("curricular_units_1st_sem_grade", 0.0),
-            "Curricular units 1st sem (without evaluations)": data.get("curricular_units_1st_sem_without_evaluations", 0),
-            "Curricular units 2nd sem (credited)": data.get("curricular_units_2nd_sem_credited", 0),
-            "Curricular units 2nd sem (enrolled)": data.get("curricular_units_2nd_sem_enrolled", 0),
-            "Curricular units 2nd sem (evaluations)": data.get("curricular_units_2nd_sem_evaluations", 0),
-            "Curricular units 2nd sem (approved)": data.get("curricular_units_2nd_sem_approved", 0),
-            "Curricular units 2nd sem (grade)": data.get("curricular_units_2nd_sem_grade", 0.0),
-            "Curricular units 2nd sem (without evaluations)": data.get("curricular_units_2nd_sem_without_evaluations", 0),
-            "Unemployment rate": data.get("unemployment_rate", 0.0),
-            "Inflation rate": data.get("inflation_rate", 0.0),
-            "GDP": data.get("gdp", 0.0),
-        }
-        
-        # Validar campos requeridos
-        required_fields = [
-            "marital_status", "application_mode", "application_order", "course",
-            "daytime_evening_attendance", "previous_qualification", "nacionality",
-            "mother_qualification", "father_qualification", "mother_occupation",
-            "father_occupation", "gender", "age_at_enrollment"
-        ]
-        
-        missing_fields = [field for field in required_fields if data.get(field) is None]
-        if missing_fields:
+        # Validar campos requeridos y tipos
+        error = validate_payload(data)
+        if error:
             return JsonResponse({
                 'success': False,
-                'error': f'Campos requeridos faltantes: {", ".join(missing_fields)}'
+                'error': error
             }, status=400)
         
-        # Convertir a DataFrame
-        student_df = pd.DataFrame([student_data])
+        # Convertir al formato de columnas del modelo
+        student_features = payloads_to_array([data])
         
         # Cargar modelo y hacer predicción
         try:
-            model = load_model()
-            risk_score = model.predict_proba(student_df)[0][1]  # Probabilidad de deserción
-            prediction = model.predict(student_df)[0]  # 0 = No deserta, 1 = Desertará
-            
-            # Clasificar el riesgo
-            if risk_score < 0.3:
-                risk_level = "Bajo"
-            elif risk_score < 0.6:
-                risk_level = "Medio"
-            else:
-                risk_level = "Alto"
+            result = score_one(student_features)
+            risk_score = result['risk_score']
+            risk_level = result['risk_level']
+            prediction = result['prediction']
             
             # Guardar predicción si se proporciona user_id o si el usuario está autenticado
             user_id = data.get("user_id")
@@ -125,11 +63,8 @@ def predict_dropout_risk(request):
                         user=user,
                         defaults={
                             'student_characteristics': characteristics,
-                            'risk_score': float(risk_score),
-                            'risk_percentage': float(risk_score * 100),
-                            'risk_level': risk_level,
-                            'prediction': int(prediction),
-                            'prediction_label': 'Deserción' if prediction == 1 else 'No deserción',
+                            'features_fingerprint': fingerprint(student_features[0]),
+                            **result,
                         }
                     )
                     prediction_saved = True
@@ -145,7 +80,8 @@ def predict_dropout_risk(request):
                 'risk_percentage': round(float(risk_score * 100), 2),
                 'risk_level': risk_level,
                 'prediction': int(prediction),
-                'prediction_label': 'Deserción' if prediction == 1 else 'No deserción',
+                'prediction_label': result['prediction_label'],
+                'model_version': result['model_version'],
                 'message': f'Índice de riesgo de deserción: {risk_score:.2%} ({risk_level})',
                 'prediction_saved': prediction_saved
             }
@@ -174,3 +110,150 @@ def predict_dropout_risk(request):
             'error': f'Error interno: {str(e)}'
         }, status=500)
 
+
+
+def _parse_ndjson(lines):
+    """Un objeto JSON por línea; las líneas inválidas se reportan como error del item"""
+    items = []
+    for line in lines:
+        try:
+            items.append((json.loads(line), None))
+        except json.JSONDecodeError:
+            items.append((None, 'Formato JSON inválido'))
+    return items
+
+
+def _parse_batch_body(request):
+    """
+    Interpreta el cuerpo del endpoint batch como arreglo JSON o como NDJSON
+    (un objeto JSON por línea). Devuelve una lista de (item, error) en el
+    mismo orden de entrada.
+
+    Se usa NDJSON cuando el content type lo indica (``application/x-ndjson``,
+    ``application/jsonl``) o cuando el cuerpo no es un documento JSON pero sí
+    tiene varias líneas que son JSON por separado. Solo en el primer caso las
+    líneas inválidas se reportan como error del item en lugar de invalidar
+    todo el lote; un cuerpo que no es ni JSON ni NDJSON lanza
+    ``JSONDecodeError`` y un documento JSON que no es un arreglo (p. ej. el
+    objeto de un solo estudiante) lanza ``ValueError``.
+    """
+    # utf-8-sig descarta el BOM que añaden algunos clientes
+    body = request.body.decode('utf-8-sig')
+    content_type = request.content_type or ''
+    lines = [line for line in body.splitlines() if line.strip()]
+
+    if 'ndjson' in content_type or 'jsonl' in content_type:
+        return _parse_ndjson(lines)
+
+    try:
+        data = json.loads(body)
+    except json.JSONDecodeError:
+        items = _parse_ndjson(lines) if len(lines) > 1 else []
+        if not items or any(error for _, error in items):
+            raise
+        return items
+
+    if not isinstance(data, list):
+        raise ValueError('Se esperaba un arreglo JSON de estudiantes')
+    return [(item, None) for item in data]
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def predict_dropout_risk_batch(request):
+    """
+    API endpoint para predecir el riesgo de deserción de varios estudiantes
+
+    Recibe un arreglo JSON (o NDJSON) de estudiantes con el mismo formato que
+    ``predict_dropout_risk``. Todos los items válidos se evalúan con una sola
+    llamada vectorizada al modelo y la respuesta devuelve un resultado o un
+    error por item, en el mismo orden de entrada.
+    """
+    try:
+        items = _parse_batch_body(request)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return JsonResponse({
+            'success': False,
+            'error': 'Formato JSON inválido'
+        }, status=400)
+    except ValueError as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+
+    if not items:
+        return JsonResponse({
+            'success': False,
+            'error': 'No se recibieron estudiantes'
+        }, status=400)
+
+    if len(items) > BATCH_MAX_ITEMS:
+        return JsonResponse({
+            'success': False,
+            'error': f'Se permiten como máximo {BATCH_MAX_ITEMS} estudiantes por petición'
+        }, status=413)
+
+    # Validar todos los items antes de tocar el modelo
+    results = [None] * len(items)
+    valid_indexes = []
+    rows = []
+    for index, (item, error) in enumerate(items):
+        error = error or validate_payload(item)
+        if error:
+            results[index] = {'index': index, 'success': False, 'error': error}
+            continue
+        valid_indexes.append(index)
+        rows.append(item)
+
+    if rows:
+        try:
+            loaded = active_model()
+            risk_scores, predictions = score_cached(payloads_to_array(rows), loaded=loaded)
+        except FileNotFoundError as e:
+            return JsonResponse({
+                'success': False,
+                'error': f'Modelo no encontrado: {str(e)}'
+            }, status=500)
+        except Exception as e:
+            return JsonResponse({
+                'success': False,
+                'error': f'Error al procesar la predicción: {str(e)}'
+            }, status=500)
+
+        for index, risk_score, prediction in zip(valid_indexes, risk_scores, predictions):
+            result = build_result(risk_score, prediction, loaded.version)
+            results[index] = {
+                'index': index,
+                'success': True,
+                **result,
+                'risk_score': round(result['risk_score'], 4),
+                'risk_percentage': round(result['risk_percentage'], 2),
+            }
+
+    return JsonResponse({
+        'success': True,
+        'total': len(results),
+        'processed': len(valid_indexes),
+        'failed': len(results) - len(valid_indexes),
+        'results': results,
+    })
+
+
+@require_http_methods(["GET"])
+def prediction_health(request):
+    """
+    Estado del servicio de predicción en este proceso.
+
+    Devuelve 503 mientras el modelo no esté cargado en este proceso, de modo
+    que se puede usar como readiness check del balanceador. Solo informa: la
+    carga la hacen ``PredictionConfig.ready()``, los hooks de gunicorn o la
+    primera petición que necesita el modelo.
+    """
+    model_ready = is_model_ready()
+    return JsonResponse({
+        'success': model_ready,
+        'model_ready': model_ready,
+        'model_version': registry.active_version,
+        'cache': prediction_cache.stats(),
+    }, status=200 if model_ready else 503)
@@ -204,3 +204,95 @@ THEME_VARIABLES = THEME_VARIABLES
 
 # Your stuff...
 # ------------------------------------------------------------------------------
+
+# Prediction settings
+# ------------------------------------------------------------------------------
+
+# Máximo de estudiantes por petición en /api/predict-dropout-risk/batch/
+# (el cuerpo sigue limitado por DATA_UPLOAD_MAX_MEMORY_SIZE)
+PREDICTION_BATCH_MAX_ITEMS = int(os.environ.get("PREDICTION_BATCH_MAX_ITEMS", 1000))
+
+# Umbral de risk_score a partir del cual la predicción es "Deserción"
+# (0.6 alinea la etiqueta con el nivel "Alto"; 0.5 equivale a model.predict())
+PREDICTION_DECISION_THRESHOLD = float(os.environ.get("PREDICTION_DECISION_THRESHOLD", 0.6))
+
+# Estudiantes por bloque en la re-evaluación masiva (consulta, inferencia y escritura)
+PREDICTION_BULK_CHUNK_SIZE = int(os.environ.get("PREDICTION_BULK_CHUNK_SIZE", 2000))
+
+# Segundos sin latido tras los cuales un trabajo "En ejecución" se considera abandonado
+# (worker detenido o caído) y se marca como fallido. Debe superar lo que tarda un bloque.
+PREDICTION_JOB_LEASE_SECONDS = int(os.environ.get("PREDICTION_JOB_LEASE_SECONDS", 600))
+
+# Cargar y precalentar el modelo en AppConfig.ready() en lugar de en la primera petición.
+# Desactivado por defecto para no cargarlo en cada comando de manage.py.
+PREDICTION_PRELOAD_MODEL = os.environ.get("PREDICTION_PRELOAD_MODEL", 'False').lower() in ['true', 'yes', '1']
+
+# mmap_mode para joblib.load del modelo ('r' comparte entre procesos los arreglos NumPy
+# del artefacto; requiere un dump sin compresión). Vacío = carga normal en memoria.
+PREDICTION_MODEL_MMAP_MODE = os.environ.get("PREDICTION_MODEL_MMAP_MODE") or None
+
+# Registro de versiones del modelo: directorio de artefactos y cada cuántos segundos
+# cada proceso revisa si cambió la versión activa
+PREDICTION_MODEL_REGISTRY_DIR = os.environ.get("PREDICTION_MODEL_REGISTRY_DIR", BASE_DIR / "análisis" / "models")
+PREDICTION_MODEL_CHECK_INTERVAL = float(os.environ.get("PREDICTION_MODEL_CHECK_INTERVAL", 30))
+
+# Motor de inferencia: 'sklearn' o 'flat' (árboles compilados a arreglos NumPy planos,
+# misma probabilidad con menor latencia por llamada; solo RandomForest/árboles)
+PREDICTION_INFERENCE_ENGINE = os.environ.get("PREDICTION_INFERENCE_ENGINE", "sklearn")
+
+# Cache de predicciones (clave: hash del vector de características + versión del modelo).
+# PREDICTION_CACHE_SIZE: entradas del LRU en memoria de cada proceso (0 lo desactiva).
+# PREDICTION_CACHE_BACKEND: alias opcional de CACHES como segundo nivel compartido entre workers.
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", 10000))
+PREDICTION_CACHE_BACKEND = os.environ.get("PREDICTION_CACHE_BACKEND") or None
+PREDICTION_CACHE_TIMEOUT = int(os.environ.get("PREDICTION_CACHE_TIMEOUT", 3600))
+
+# Re-evaluar a un estudiante al guardar sus características (admin, ORM, importación).
+# Los guardados se agrupan en micro-lotes de hasta PREDICTION_REALTIME_BATCH_SIZE
+# estudiantes o cada PREDICTION_REALTIME_FLUSH_MS milisegundos.
+PREDICTION_REALTIME_RESCORE = os.environ.get("PREDICTION_REALTIME_RESCORE", 'False').lower() in ['true', 'yes', '1']
+PREDICTION_REALTIME_BATCH_SIZE = int(os.environ.get("PREDICTION_REALTIME_BATCH_SIZE", 500))
+PREDICTION_REALTIME_FLUSH_MS = int(os.environ.get("PREDICTION_REALTIME_FLUSH_MS", 200))
+
+# Filas por bloque al exportar predicciones (admin y export_predictions)
+PREDICTION_EXPORT_CHUNK_SIZE = int(os.environ.get("PREDICTION_EXPORT_CHUNK_SIZE", 5000))
+
+# Filas por bloque al importar características (admin e import_characteristics)
+PREDICTION_IMPORT_CHUNK_SIZE = int(os.environ.get("PREDICTION_IMPORT_CHUNK_SIZE", 5000))
+
+# Importación masiva de usuarios (admin): filas por bloque, procesos para el hash de
+# contraseñas (1 = sin pool) y hasher opcional para las contraseñas iniciales, p. ej.
+# 'md5' en entornos de prueba. Ese hasher debe estar en PASSWORD_HASHERS; Django lo
+# reemplaza por el preferido en el primer inicio de sesión del usuario.
+USER_IMPORT_BATCH_SIZE = int(os.environ.get("USER_IMPORT_BATCH_SIZE", 1000))
+USER_IMPORT_PASSWORD_WORKERS = int(os.environ.get("USER_IMPORT_PASSWORD_WORKERS", os.cpu_count() or 1))
+USER_IMPORT_PASSWORD_HASHER = os.environ.get("USER_IMPORT_PASSWORD_HASHER") or None
+
+# Bytes leídos por bloque del CSV subido (el archivo nunca se carga completo en memoria)
+USER_IMPORT_READ_CHUNK_SIZE = int(os.environ.get("USER_IMPORT_READ_CHUNK_SIZE", 64 * 1024))
+
+# Cliente de Gemini compartido por proceso: pool de conexiones HTTP con keep-alive
+# (GEMINI_KEEPALIVE_EXPIRY y GEMINI_TIMEOUT en segundos). GEMINI_BASE_URL permite
+# apuntar a otro servidor, p. ej. uno local de pruebas.
+GEMINI_MAX_CONNECTIONS = int(os.environ.get("GEMINI_MAX_CONNECTIONS", 20))
+GEMINI_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("GEMINI_MAX_KEEPALIVE_CONNECTIONS", 10))
+GEMINI_KEEPALIVE_EXPIRY = float(os.environ.get("GEMINI_KEEPALIVE_EXPIRY", 60))
+GEMINI_TIMEOUT = float(os.environ.get("GEMINI_TIMEOUT", 30))
+GEMINI_BASE_URL = os.environ.get("GEMINI_BASE_URL") or None
+
+# Prompt del sistema del chatbot como cached content de Gemini: se sube una vez por
+# proceso y se renueva antes de que venza su TTL (segundos). Si el modelo o la cuenta
+# no admiten caching se envía como system_instruction en cada mensaje.
+GEMINI_PROMPT_CACHE = os.environ.get("GEMINI_PROMPT_CACHE", 'True').lower() in ['true', 'yes', '1']
+GEMINI_PROMPT_CACHE_TTL = int(os.environ.get("GEMINI_PROMPT_CACHE_TTL", 3600))
+
+# Cache de respuestas del chatbot para mensajes repetidos (clave: mensaje normalizado +
+# nivel de riesgo y curso del estudiante). Canales separados por comas: web, whatsapp
+# (vacío la desactiva). CHATBOT_RESPONSE_CACHE_BACKEND: alias opcional de CACHES
+# compartido entre workers.
+CHATBOT_RESPONSE_CACHE_CHANNELS = [
+    channel.strip() for channel in os.environ.get("CHATBOT_RESPONSE_CACHE_CHANNELS", "").split(",") if channel.strip()
+]
+CHATBOT_RESPONSE_CACHE_SIZE = int(os.environ.get("CHATBOT_RESPONSE_CACHE_SIZE", 1000))
+CHATBOT_RESPONSE_CACHE_TTL = int(os.environ.get("CHATBOT_RESPONSE_CACHE_TTL", 3600))
+CHATBOT_RESPONSE_CACHE_BACKEND = os.environ.get("CHATBOT_RESPONSE_CACHE_BACKEND") or None
@@ -0,0 +1,19 @@
+# -*- encoding: utf-8 -*-
+# Variante ASGI de gunicorn-cfg.py: workers de uvicorn sobre config.asgi.
+# Las vistas async del chatbot esperan a Gemini sin ocupar el worker, así que
+# un solo proceso atiende cientos de chats concurrentes.
+#
+#   gunicorn -c gunicorn-asgi-cfg.py config.asgi
+import os
+import sys
+
+# gunicorn carga este archivo antes de agregar el directorio de trabajo a sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Misma configuración y hooks (preload del modelo, post_fork, ...) que la versión WSGI
+from gunicorn_common import *  # noqa: E402,F401,F403
+
+worker_class = 'uvicorn_worker.UvicornWorker'
+
+# Segundos que uvicorn mantiene abierta una conexión keep-alive inactiva
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
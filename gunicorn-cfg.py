@@ -1,8 +1,9 @@
 # -*- encoding: utf-8 -*-
+#   gunicorn -c gunicorn-cfg.py config.wsgi
+import os
+import sys
 
-bind = '0.0.0.0:5005'
-workers = 1
-accesslog = '-'
-loglevel = 'debug'
-capture_output = True
-enable_stdio_inheritance = True
+# gunicorn carga este archivo antes de agregar el directorio de trabajo a sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gunicorn_common import *  # noqa: E402,F401,F403
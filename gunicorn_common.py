@@ -0,0 +1,57 @@
+# -*- encoding: utf-8 -*-
+# Configuración y hooks comunes de gunicorn-cfg.py (WSGI) y gunicorn-asgi-cfg.py (ASGI)
+import gc
+import os
+
+__all__ = [
+    'bind', 'workers', 'accesslog', 'loglevel', 'capture_output', 'enable_stdio_inheritance',
+    'preload_app', 'when_ready', 'post_fork', 'post_worker_init',
+]
+
+bind = '0.0.0.0:5005'
+workers = int(os.environ.get('GUNICORN_WORKERS', 1))
+accesslog = '-'
+loglevel = 'debug'
+capture_output = True
+enable_stdio_inheritance = True
+
+# Cargar Django (y el modelo, ver when_ready) una sola vez en el proceso master.
+# Los workers se crean con fork y comparten esas páginas de memoria (copy-on-write)
+# en lugar de deserializar cada uno su propia copia del RandomForest.
+preload_app = os.environ.get('GUNICORN_PRELOAD_APP', 'True').lower() in ['true', 'yes', '1']
+
+
+def when_ready(server):
+    # Con preload_app se ejecuta en el master después de cargar la aplicación
+    # y antes de crear los workers.
+    if not server.cfg.preload_app:
+        return
+    from apps.prediction.scoring import warm_up
+    try:
+        warm_up()
+        server.log.info("Modelo de predicción cargado en el master")
+    except Exception as e:
+        server.log.warning("No se pudo cargar el modelo de predicción en el master: %s", e)
+        return
+    # Mover los objetos ya creados a la generación permanente del GC para que
+    # las recolecciones de los workers no escriban en esas páginas y las dupliquen.
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Las conexiones a la base de datos abiertas en el master no se comparten
+    if server.cfg.preload_app:
+        from django.db import connections
+        connections.close_all()
+
+
+def post_worker_init(worker):
+    # Se ejecuta cuando el worker ya cargó la aplicación Django y antes de
+    # aceptar peticiones: precarga el modelo y hace una inferencia de prueba.
+    # Si el master ya lo cargó (preload_app), solo se hace la inferencia.
+    from apps.prediction.scoring import warm_up
+    try:
+        warm_up()
+        worker.log.info("Modelo de predicción precargado")
+    except Exception as e:
+        worker.log.warning("No se pudo precargar el modelo de predicción: %s", e)